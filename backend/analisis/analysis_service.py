@@ -2,76 +2,126 @@
 Servicio de Análisis Psicosocial — Análisis individual y grupal.
 Combina respuestas de múltiples cuestionarios y produce resultados completos.
 """
-import json
 import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Any, List, Optional
-from collections import defaultdict
+from typing import Dict, Any, List, Optional, Set, Tuple
 
-from .scoring_engine import PsychosocialScoringEngine
+from storage.repository import ResponseRepository, get_repository
+
+from .batch_scoring import pack_responses
+from .group_aggregates import GroupAggregates, aggregate_results
+from .parallel_scoring import ParallelGroupScorer
+from .respondent_table import LevelKey, RespondentTable
+from .scoring_engine import PsychosocialScoringEngine, _classify_tipo_cargo
+
+# Combinaciones de filtros cuyos agregados se guardan mientras el grupo no cambie
+FILTERED_GROUPS_MAX = 64
 
 BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
 DATA_DIR = os.path.join(BACKEND_DIR, "data")
 
+# Calificación de una campaña, en el orden de ``analyze_individual``:
+# (cuestionario, llave en "cuestionarios", forma a la que aplica)
+CAMPAIGN_PLAN = (
+    ("estres",           "estres",       None),
+    ("intralaborales-a", "intralaboral", "A"),
+    ("intralaborales-b", "intralaboral", "B"),
+    ("extralaborales",   "extralaboral", None),
+)
 
-def _load_json(path: str) -> List:
-    if not os.path.exists(path):
-        return []
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return []
 
-
-def _get_cedula_metadata(cedula: str) -> Dict:
+def _get_cedula_metadata(cedula: str, repo: Optional[ResponseRepository] = None) -> Dict:
     """Obtiene datos sociodemográficos del respondente desde datos-generales."""
-    # Nuevo formato (form_datos-generales.json)
-    path = os.path.join(DATA_DIR, "form_datos-generales.json")
-    records = _load_json(path)
-    for record in records:
-        data = record.get("data", {})
-        if str(data.get("numero_identificacion", "")) == str(cedula):
-            return data
-    return {}
-
-
-def _find_responses_for_cedula(questionnaire_id: str, cedula: str) -> Optional[Dict]:
+    record = (repo or get_repository(DATA_DIR)).latest_form_response("datos-generales", cedula)
+    return record.get("data", {}) if record else {}
+
+
+def respondent_routing(metadata: Dict) -> Dict[str, Optional[str]]:
+    """
+    Forma intralaboral y grupo de baremo de un respondente según su ficha de
+    datos generales. ``forma`` es None si la ficha no dice si tiene personal a
+    cargo. ``app.py`` lo guarda en la sesión al recibir la ficha.
+    """
+    personal_cargo = metadata.get("tiene_personal_cargo")
+    return {
+        "forma":            {"si": "A", "no": "B"}.get(personal_cargo),
+        "tipo_cargo_grupo": _classify_tipo_cargo(metadata.get("tipo_cargo") or metadata.get("nombre_cargo")),
+    }
+
+
+def _find_responses_for_cedula(
+    questionnaire_id: str, cedula: str, repo: Optional[ResponseRepository] = None
+) -> Optional[Dict]:
     """Busca las respuestas más recientes de un respondente en un cuestionario."""
-    path = os.path.join(DATA_DIR, f"responses_{questionnaire_id}.json")
-    records = _load_json(path)
-    # Devuelve la más reciente
-    matching = [r for r in records if str(r.get("respondent_cedula", "")) == str(cedula)]
-    if not matching:
-        return None
-    return sorted(matching, key=lambda r: r.get("submitted_at", ""), reverse=True)[0]
+    return (repo or get_repository(DATA_DIR)).latest_response(questionnaire_id, cedula)
 
 
 class AnalysisService:
     """Servicio de análisis psicosocial individual y grupal."""
 
-    def __init__(self, data_dir: str = DATA_DIR):
+    def __init__(
+        self,
+        data_dir: str = DATA_DIR,
+        repository: Optional[ResponseRepository] = None,
+        parallel: Optional[ParallelGroupScorer] = None,
+    ):
         self.data_dir = data_dir
+        self.repo = repository or get_repository(data_dir)
         self.engine = PsychosocialScoringEngine()
+        self.parallel = parallel or ParallelGroupScorer()
+        self._group: Optional[GroupAggregates] = None
+        # Lecturas del grupo (reconstrucción, recalificaciones, agregación)
+        self._group_lock = threading.Lock()
+        # Revisión que reflejan los agregados y cédulas por recalificar. Los envíos
+        # solo toman este lock, que nunca se tiene mientras se califica
+        self._sync_lock = threading.Lock()
+        self._synced = None
+        self._pending: Set[str] = set()
+        # Tabla columnar del grupo actual: (grupo, versión, tabla) y agregados por filtro
+        self._table: Optional[Tuple[GroupAggregates, int, RespondentTable]] = None
+        self._filtered: Dict[Tuple[str, ...], GroupAggregates] = {}
 
     # ──────────────────────────────────────────────────────────
     # ANÁLISIS INDIVIDUAL
     # ──────────────────────────────────────────────────────────
 
-    def analyze_individual(self, cedula: str) -> Dict[str, Any]:
+    def routing(self, cedula: str, metadata: Dict, session: Optional[Dict] = None) -> Tuple[str, str]:
+        """
+        (forma, grupo de tipo de cargo) guardados en la sesión del respondente.
+        Las sesiones anteriores a esos campos se resuelven desde ``metadata``.
+        """
+        if session is None:
+            session = self.repo.get_session(cedula)
+        if session and "forma" in session and "tipo_cargo_grupo" in session:
+            routing = session
+        else:
+            routing = respondent_routing(metadata)
+        return routing["forma"] or "B", routing["tipo_cargo_grupo"]
+
+    def analyze_individual(
+        self, cedula: str, metadata: Optional[Dict] = None, routing: Optional[Tuple[str, str]] = None
+    ) -> Dict[str, Any]:
         """
         Calcula el análisis completo de un respondente.
         Retorna resultados de todos los cuestionarios que haya completado.
+        ``metadata`` y ``routing`` permiten reutilizar la ficha de datos
+        generales y la forma ya cargadas.
         """
-        metadata = _get_cedula_metadata(cedula)
-        tipo_cargo = metadata.get("tipo_cargo") or metadata.get("nombre_cargo")
+        if metadata is None:
+            metadata = _get_cedula_metadata(cedula, self.repo)
+        if routing is None:
+            routing = self.routing(cedula, metadata)
+        forma, grupo = routing
 
         results: Dict[str, Any] = {
             "cedula":       cedula,
             "nombre":       metadata.get("nombre_completo", "Desconocido"),
             "cargo":        metadata.get("nombre_cargo", ""),
             "area":         metadata.get("departamento_area", ""),
-            "tipo_cargo":   tipo_cargo,
+            "tipo_cargo":   metadata.get("tipo_cargo") or metadata.get("nombre_cargo"),
             "calculado_en": datetime.now().isoformat(),
             "version_baremos": self.engine.baremos.get("version"),
             "cuestionarios": {},
@@ -79,35 +129,30 @@ class AnalysisService:
         }
 
         # ── Estrés ──
-        estres_resp = _find_responses_for_cedula("estres", cedula)
+        estres_resp = _find_responses_for_cedula("estres", cedula, self.repo)
         if estres_resp:
             results["cuestionarios"]["estres"] = self.engine.score_estres(
-                estres_resp["responses"], tipo_cargo
+                estres_resp["responses"], grupo
             )
 
-        # ── Determinar Forma (A o B) según datos generales ──
-        personal_cargo = metadata.get("tiene_personal_cargo", "no")
-        forma = "A" if personal_cargo == "si" else "B"
-        intra_qid = "intralaborales-a" if forma == "A" else "intralaborales-b"
-
-        # ── Intralaboral ──
+        # ── Intralaboral (Forma A o B, resuelta al enviar datos generales) ──
         if forma == "A":
-            intra_resp = _find_responses_for_cedula("intralaborales-a", cedula)
+            intra_resp = _find_responses_for_cedula("intralaborales-a", cedula, self.repo)
             if intra_resp:
                 results["cuestionarios"]["intralaboral"] = self.engine.score_intralaboral_a(
-                    intra_resp["responses"], tipo_cargo
+                    intra_resp["responses"], grupo
                 )
         else:
-            intra_resp = _find_responses_for_cedula("intralaborales-b", cedula)
+            intra_resp = _find_responses_for_cedula("intralaborales-b", cedula, self.repo)
             if intra_resp:
                 results["cuestionarios"]["intralaboral"] = self.engine.score_intralaboral_b(
-                    intra_resp["responses"], tipo_cargo
+                    intra_resp["responses"], grupo
                 )
 
         # ── Extralaboral ──
-        extra_resp = _find_responses_for_cedula("extralaborales", cedula)
+        extra_resp = _find_responses_for_cedula("extralaborales", cedula, self.repo)
         if extra_resp:
-            extra_result = self.engine.score_extralaboral(extra_resp["responses"], tipo_cargo=tipo_cargo)
+            extra_result = self.engine.score_extralaboral(extra_resp["responses"], tipo_cargo=grupo)
             results["cuestionarios"]["extralaboral"] = extra_result
 
             # ── Total General (si hay intra y extra sin error) ──
@@ -121,6 +166,76 @@ class AnalysisService:
 
         return results
 
+    def score_campaign(self, cedulas: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Califica a todos los respondentes (o a ``cedulas``) con la calificación por
+        lotes: una llamada a ``score_batch`` por cuestionario en lugar de una
+        calificación individual por respondente y cuestionario.
+
+        Cada fila trae cedula, meta, forma, cuestionarios y total_general, con los
+        mismos valores que ``analyze_individual`` (sin ``hash_respuestas``).
+        """
+        if cedulas is None:
+            cedulas = self._get_all_cedulas()
+        sessions = self.repo.list_sessions()
+        rows = []
+        for cedula in cedulas:
+            meta = _get_cedula_metadata(cedula, self.repo)
+            forma, grupo = self.routing(cedula, meta, sessions.get(cedula, {}))
+            rows.append({
+                "cedula":        cedula,
+                "meta":          meta,
+                "forma":         forma,
+                "tipo_cargo":    meta.get("tipo_cargo") or meta.get("nombre_cargo"),
+                "grupo_cargo":   grupo,
+                "cuestionarios": {},
+                "total_general": None,
+            })
+
+        for questionnaire_id, key, forma in CAMPAIGN_PLAN:
+            scored, responses = [], []
+            for row in rows:
+                if forma and row["forma"] != forma:
+                    continue
+                record = _find_responses_for_cedula(questionnaire_id, row["cedula"], self.repo)
+                if record:
+                    scored.append(row)
+                    responses.append(record["responses"])
+            if not scored:
+                continue
+            tipos = [row["grupo_cargo"] for row in scored]
+            try:
+                matrix = pack_responses(questionnaire_id, responses)
+            except ValueError as e:
+                # Valores fuera de la escala Likert: se califica uno a uno como antes
+                print(f"Calificación por lotes no aplicable a {questionnaire_id}: {e}")
+                results = [self._score_one(questionnaire_id, r, t) for r, t in zip(responses, tipos)]
+            else:
+                results = self.engine.score_batch(questionnaire_id, matrix, tipos).results()
+            for row, result in zip(scored, results):
+                row["cuestionarios"][key] = result
+
+        for row in rows:
+            intra = row["cuestionarios"].get("intralaboral")
+            extra = row["cuestionarios"].get("extralaboral")
+            if intra and extra and "error" not in extra and "puntaje_bruto_total" in intra:
+                row["total_general"] = self.engine.compute_total_general(
+                    intra["puntaje_bruto_total"], extra["puntaje_bruto_total"], row["forma"]
+                )
+        return rows
+
+    def _score_one(self, questionnaire_id: str, responses: List[Dict], tipo_cargo: Optional[str]) -> Dict:
+        if questionnaire_id == "estres":
+            result = self.engine.score_estres(responses, tipo_cargo)
+        elif questionnaire_id == "intralaborales-a":
+            result = self.engine.score_intralaboral_a(responses, tipo_cargo)
+        elif questionnaire_id == "intralaborales-b":
+            result = self.engine.score_intralaboral_b(responses, tipo_cargo)
+        else:
+            result = self.engine.score_extralaboral(responses, tipo_cargo=tipo_cargo)
+        # Mismas llaves que los resultados por lotes; copia porque el resultado puede venir de la caché
+        return {k: v for k, v in result.items() if k != "hash_respuestas"}
+
     # ──────────────────────────────────────────────────────────
     # ANÁLISIS GRUPAL
     # ──────────────────────────────────────────────────────────
@@ -133,333 +248,179 @@ class AnalysisService:
     ) -> Dict[str, Any]:
         """
         Devuelve un análisis agregado de todos los respondentes, con filtros opcionales.
-        """
-        # Obtener todos los respondentes
-        cedulas = self._get_all_cedulas()
-
-        # Filtrar por metadatos
-        filtered_cedulas = []
-        for cedula in cedulas:
-            meta = _get_cedula_metadata(cedula)
-            if filtro_area and meta.get("departamento_area", "").lower() != filtro_area.lower():
-                continue
-            if filtro_cargo and meta.get("nombre_cargo", "").lower() != filtro_cargo.lower():
-                continue
-            if filtro_sexo and meta.get("sexo", "").lower() != filtro_sexo.lower():
-                continue
-            filtered_cedulas.append(cedula)
-
-        results_by_q: Dict[str, List[Dict]] = defaultdict(list)
-        for cedula in filtered_cedulas:
-            individual = self.analyze_individual(cedula)
-            for q_key, q_result in individual.get("cuestionarios", {}).items():
-                if "error" not in q_result and "puntaje_transformado" in q_result:
-                    results_by_q[q_key].append(q_result)
 
-        # Agregar por cuestionario
-        aggregated: Dict[str, Any] = {}
-        for q_key, q_list in results_by_q.items():
-            aggregated[q_key] = self._aggregate_questionnaire(q_list)
-
-        # Ranking de dimensiones
-        ranking = self._compute_dimension_ranking(results_by_q)
-
-        # Distribución demográfica
-        demografico = self._compute_demografico(filtered_cedulas)
-
-        # Desglose por Área (solo para el reporte modular)
-        area_breakdown = self._compute_area_breakdown(filtered_cedulas)
+        Sin filtros se leen los agregados incrementales (``GroupAggregates``), que
+        solo recalifican a quienes enviaron algo desde la última lectura. Con
+        filtros se agregan las filas ya calificadas de quienes pasan el filtro,
+        seleccionadas con una máscara de la tabla columnar (``RespondentTable``);
+        esos agregados se reutilizan hasta que el grupo cambie.
+        """
+        with self._group_lock:
+            group = self._current_group()
+            if filtro_area or filtro_cargo or filtro_sexo:
+                group = self._filtered_group(group, filtro_area, filtro_cargo, filtro_sexo)
+
+            return {
+                "total_respondentes": len(group),
+                "filtros":            {"area": filtro_area, "cargo": filtro_cargo, "sexo": filtro_sexo},
+                "calculado_en":       datetime.now().isoformat(),
+                "cuestionarios":      group.cuestionarios(),
+                "ranking_dimensiones": group.ranking_dimensiones(),
+                "demografico":        group.demografico(),
+                # Desglose por Área (solo para el reporte modular)
+                "area_breakdown":     group.area_breakdown(),
+                # Desglose por Dimensión para el Dominio de Liderazgo (Página 12)
+                "leadership_breakdown": group.domain_breakdown("Liderazgo y relaciones sociales"),
+                "leadership_form_breakdown": group.domain_by_form("Liderazgo y relaciones sociales"),
+                "leadership_focus_areas": {
+                    "liderazgo": group.dimension_by_area("Características del liderazgo"),
+                    "colaboradores": group.dimension_by_area("Relación con los colaboradores"),
+                    "relaciones": group.dimension_by_area("Relaciones sociales en el trabajo"),
+                    "retroalimentacion": group.dimension_by_area("Retroalimentación del desempeño"),
+                },
+                "demands_breakdown": group.domain_breakdown("Demandas del trabajo"),
+                "demands_dist": group.domain_total_dist("Demandas del trabajo"),
+                "demands_area_breakdown": group.domain_area_breakdown("Demandas del trabajo"),
+                "demands_form_breakdown": group.domain_by_form("Demandas del trabajo"),
+                "control_breakdown": group.domain_breakdown("Control sobre el trabajo"),
+                "control_dist": group.domain_total_dist("Control sobre el trabajo"),
+                "control_area_breakdown": group.domain_area_breakdown("Control sobre el trabajo"),
+                "control_form_breakdown": group.domain_by_form("Control sobre el trabajo"),
+                "recompensas_breakdown": group.domain_breakdown("Recompensas"),
+                "recompensas_dist": group.domain_total_dist("Recompensas"),
+                "estres_dist": group.estres_dist(),
+                "estres_tipo_cargo": group.estres_by_cargo(),
+            }
 
-        # Desglose por Dimensión para el Dominio de Liderazgo (Página 12)
-        leadership_breakdown = self._compute_domain_breakdown(filtered_cedulas, "Liderazgo y relaciones sociales")
+    @contextmanager
+    def submission(self, cedula: Optional[str]):
+        """
+        Envuelve la escritura de un envío (cuestionario o ficha) de ``cedula``.
 
+        Si los agregados estaban al día antes de escribir, solo ese respondente se
+        recalifica en la próxima lectura; si el repositorio cambió por otro lado
+        (otro worker, scripts de mantenimiento), se reconstruyen completos.
+        """
+        before = self.repo.revision()
+        yield
+        after = self.repo.revision()
+        with self._sync_lock:
+            # ``after``: una lectura ya tomó la revisión con este envío incluido
+            if self._synced is None or self._synced not in (before, after):
+                self._synced = None
+                return
+            self._synced = after
+            if cedula:
+                self._pending.add(str(cedula))
+
+    def _current_group(self) -> GroupAggregates:
+        """
+        Agregados de todos los respondentes, al día con el repositorio y los baremos.
+        Se llama con ``_group_lock``; la reconstrucción completa corre sin
+        ``_sync_lock``, así los envíos no esperan a que termine.
+        """
+        baremos = self.engine.baremos_fingerprint
+        with self._sync_lock:
+            # Los envíos que terminen durante la reconstrucción quedan en
+            # ``_pending`` sobre esta revisión; una escritura por otro lado la
+            # invalida y fuerza otra reconstrucción en la próxima lectura.
+            revision = self.repo.revision()
+            group = self._group
+            if group is None or self._synced != revision or group.baremos != baremos:
+                group = None
+                self._synced, self._pending = revision, set()
+        if group is None:
+            group = GroupAggregates(self._build_group_rows(self._get_all_cedulas()))
+            group.baremos = baremos
+            with self._sync_lock:
+                self._group = group
+        with self._sync_lock:
+            pending, self._pending = self._pending, set()
+        for cedula in pending:
+            group.upsert(self._group_row(cedula))
+        return group
+
+    def _build_group_rows(self, cedulas: List[str]) -> List[Dict[str, Any]]:
+        """
+        Tabla de resultados del grupo: una fila por respondente. Los grupos
+        grandes se califican por bloques en procesos (ver ``parallel_scoring``).
+        """
+        sessions = self.repo.list_sessions()
+        if self.parallel.applies(len(cedulas)):
+            try:
+                return self.parallel.score(self.repo, self.engine, cedulas, sessions)
+            except (BrokenProcessPool, OSError, ValueError) as e:
+                print(f"Calificación en paralelo no disponible, se califica en serie: {e}")
+        return [self._group_row(cedula, sessions.get(cedula, {})) for cedula in cedulas]
+
+    def _group_row(self, cedula: str, session: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Fila de un respondente: metadatos, forma, área y los cuestionarios ya
+        calificados. Cada respondente se califica una sola vez por fila.
+        """
+        meta = _get_cedula_metadata(cedula, self.repo)
+        routing = self.routing(cedula, meta, session)
         return {
-            "total_respondentes": len(filtered_cedulas),
-            "filtros":            {"area": filtro_area, "cargo": filtro_cargo, "sexo": filtro_sexo},
-            "calculado_en":       datetime.now().isoformat(),
-            "cuestionarios":      aggregated,
-            "ranking_dimensiones": ranking,
-            "demografico":        demografico,
-            "area_breakdown":     area_breakdown,
-            "leadership_breakdown": leadership_breakdown,
-            "leadership_form_breakdown": self._compute_domain_by_form(filtered_cedulas, "Liderazgo y relaciones sociales"),
-            "leadership_focus_areas": {
-                "liderazgo": self._compute_dimension_by_area(filtered_cedulas, "Características del liderazgo"),
-                "colaboradores": self._compute_dimension_by_area(filtered_cedulas, "Relación con los colaboradores"),
-                "relaciones": self._compute_dimension_by_area(filtered_cedulas, "Relaciones sociales en el trabajo"),
-                "retroalimentacion": self._compute_dimension_by_area(filtered_cedulas, "Retroalimentación del desempeño"),
-            },
-            "demands_breakdown": self._compute_domain_breakdown(filtered_cedulas, "Demandas del trabajo"),
-            "demands_dist": self._compute_domain_total_dist(filtered_cedulas, "Demandas del trabajo"),
-            "demands_area_breakdown": self._compute_domain_area_breakdown(filtered_cedulas, "Demandas del trabajo"),
-            "demands_form_breakdown": self._compute_domain_by_form(filtered_cedulas, "Demandas del trabajo"),
-            "control_breakdown": self._compute_domain_breakdown(filtered_cedulas, "Control sobre el trabajo"),
-            "control_dist": self._compute_domain_total_dist(filtered_cedulas, "Control sobre el trabajo"),
-            "control_area_breakdown": self._compute_domain_area_breakdown(filtered_cedulas, "Control sobre el trabajo"),
-            "control_form_breakdown": self._compute_domain_by_form(filtered_cedulas, "Control sobre el trabajo"),
-            "recompensas_breakdown": self._compute_domain_breakdown(filtered_cedulas, "Recompensas"),
-            "recompensas_dist": self._compute_domain_total_dist(filtered_cedulas, "Recompensas"),
-            "estres_dist": self._compute_estres_dist(filtered_cedulas),
-            "estres_tipo_cargo": self._compute_estres_by_cargo(filtered_cedulas),
+            "cedula":        cedula,
+            "meta":          meta,
+            "forma":         routing[0],
+            "grupo_cargo":   routing[1],
+            "area":          str(meta.get("departamento_area") or meta.get("area", "No especificado")),
+            "cuestionarios": self.analyze_individual(cedula, meta, routing).get("cuestionarios", {}),
         }
 
-    def _compute_estres_dist(self, filtered_cedulas: List[str]) -> Dict[str, Any]:
-        """Distribución total de niveles de estrés del grupo."""
-        results = []
-        for c in filtered_cedulas:
-            indiv = self.analyze_individual(c)
-            e = indiv.get("cuestionarios", {}).get("estres")
-            if e and "nivel_riesgo" in e and "error" not in e:
-                results.append(e)
-        if not results:
-            return {}
-        return self._aggregate_questionnaire(results)["distribucion_pct"]
-
-    def _compute_estres_by_cargo(self, filtered_cedulas: List[str]) -> Dict[str, Any]:
-        """Distribución de estrés separada por tipo de cargo (baremo aplicado)."""
-        groups = {"profesionales_directivos": [], "auxiliares_operativos": []}
-        for c in filtered_cedulas:
-            indiv = self.analyze_individual(c)
-            e = indiv.get("cuestionarios", {}).get("estres")
-            if e and "nivel_riesgo" in e and "error" not in e:
-                grupo = e.get("tipo_cargo_grupo", "auxiliares_operativos")
-                groups[grupo].append(e)
-        breakdown = {}
-        for grupo, res_list in groups.items():
-            if res_list:
-                breakdown[grupo] = self._aggregate_questionnaire(res_list)["distribucion_pct"]
-        return breakdown
-
-    def _compute_domain_by_form(self, filtered_cedulas: List[str], domain_name: str) -> Dict[str, Any]:
-        """Calcula distribución de niveles separando por Forma A y Forma B."""
-        form_results = {"A": [], "B": []}
-        for c in filtered_cedulas:
-            meta = _get_cedula_metadata(c)
-            forma = "A" if meta.get("tiene_personal_cargo", "no") == "si" else "B"
-            
-            indiv = self.analyze_individual(c)
-            intra = indiv.get("cuestionarios", {}).get("intralaboral")
-            if intra and "dominios" in intra:
-                dom_data = intra["dominios"].get(domain_name)
-                if dom_data and "nivel_riesgo" in dom_data:
-                    form_results[forma].append(dom_data)
-
-        breakdown = {}
-        for f, res_list in form_results.items():
-            if res_list:
-                breakdown[f] = self._aggregate_questionnaire(res_list)["distribucion_pct"]
-        return breakdown
-
-    def _compute_domain_area_breakdown(self, filtered_cedulas: List[str], domain_name: str) -> Dict[str, Any]:
-        """Calcula distribución de niveles por área específicamente para un dominio."""
-        breakdown = {}
-        cedulas_by_area = defaultdict(list)
-        for c in filtered_cedulas:
-            meta = _get_cedula_metadata(c)
-            area = meta.get("departamento_area") or meta.get("area", "No especificado")
-            cedulas_by_area[str(area)].append(c)
-
-        for area, c_list in cedulas_by_area.items():
-            dom_results = []
-            for c in c_list:
-                indiv = self.analyze_individual(c)
-                intra = indiv.get("cuestionarios", {}).get("intralaboral")
-                if intra and "dominios" in intra:
-                    dom_data = intra["dominios"].get(domain_name)
-                    if dom_data and "nivel_riesgo" in dom_data:
-                        dom_results.append(dom_data)
-            
-            if dom_results:
-                breakdown[area] = self._aggregate_questionnaire(dom_results)["distribucion_pct"]
-        
-        return breakdown
-
-    def _compute_domain_total_dist(self, filtered_cedulas: List[str], domain_name: str) -> Dict[str, Any]:
-        """Calcula la distribución agregada de niveles para un dominio completo."""
-        results = []
-        for c in filtered_cedulas:
-            indiv = self.analyze_individual(c)
-            intra = indiv.get("cuestionarios", {}).get("intralaboral")
-            if intra and "dominios" in intra:
-                dom_data = intra["dominios"].get(domain_name)
-                if dom_data and "nivel_riesgo" in dom_data:
-                    results.append(dom_data)
-        
-        if not results: return {}
-        return self._aggregate_questionnaire(results)["distribucion_pct"]
-
-    def _compute_dimension_by_area(self, filtered_cedulas: List[str], dimension_name: str) -> Dict[str, Any]:
-        """Calcula distribución de niveles de una dimensión específica desglosada por área."""
-        breakdown = {}
-        cedulas_by_area = defaultdict(list)
-        for c in filtered_cedulas:
-            meta = _get_cedula_metadata(c)
-            area = meta.get("departamento_area") or meta.get("area", "No especificado")
-            cedulas_by_area[str(area)].append(c)
-
-        for area, c_list in cedulas_by_area.items():
-            dim_results = []
-            for c in c_list:
-                indiv = self.analyze_individual(c)
-                intra = indiv.get("cuestionarios", {}).get("intralaboral")
-                if intra and "dominios" in intra:
-                    # Buscar la dimensión en cualquier dominio
-                    found = False
-                    for dom_data in intra["dominios"].values():
-                        if dimension_name in dom_data.get("dimensiones", {}):
-                            dim_results.append(dom_data["dimensiones"][dimension_name])
-                            found = True
-                            break
-            
-            if dim_results:
-                breakdown[area] = self._aggregate_questionnaire(dim_results)["distribucion_pct"]
-        
-        return breakdown
-
-    def _compute_domain_breakdown(self, filtered_cedulas: List[str], domain_name: str) -> Dict[str, Any]:
-        """Calcula distribución de niveles para todas las dimensiones de un dominio específico."""
-        dims_results = defaultdict(list)
-        
-        for c in filtered_cedulas:
-            indiv = self.analyze_individual(c)
-            intra = indiv.get("cuestionarios", {}).get("intralaboral")
-            if intra and "dominios" in intra:
-                dom_data = intra["dominios"].get(domain_name)
-                if dom_data and "dimensiones" in dom_data:
-                    for dim_name, dim_data in dom_data["dimensiones"].items():
-                        dims_results[dim_name].append(dim_data)
-        
-        breakdown = {}
-        for dim_name, results in dims_results.items():
-            if results:
-                breakdown[dim_name] = self._aggregate_questionnaire(results)["distribucion_pct"]
-        
-        return breakdown
-
-    def _compute_area_breakdown(self, filtered_cedulas: List[str]) -> Dict[str, Any]:
-        """Calcula distribución de niveles por área específicamente para Intra."""
-        breakdown = {}
-        # Agrupar cédulas por área
-        cedulas_by_area = defaultdict(list)
-        for c in filtered_cedulas:
-            meta = _get_cedula_metadata(c)
-            area = meta.get("departamento_area") or meta.get("area", "No especificado")
-            cedulas_by_area[str(area)].append(c)
-
-        for area, c_list in cedulas_by_area.items():
-            intra_results = []
-            for c in c_list:
-                indiv = self.analyze_individual(c)
-                q_res = indiv.get("cuestionarios", {}).get("intralaboral")
-                if q_res and "error" not in q_res:
-                    intra_results.append(q_res)
-            
-            if intra_results:
-                breakdown[area] = self._aggregate_questionnaire(intra_results)["distribucion_pct"]
-        
-        return breakdown
+    def level_distribution(
+        self,
+        indicador: LevelKey,
+        por: Optional[str] = None,
+        filtro_area: Optional[str] = None,
+        filtro_cargo: Optional[str] = None,
+        filtro_sexo: Optional[str] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Respondentes por nivel de riesgo de un indicador (``(cuestionario,)``,
+        ``(cuestionario, dominio)`` o ``(cuestionario, dominio, dimensión)``),
+        agrupados por una columna de la tabla (``area``, ``forma``,
+        ``grupo_cargo``, ``sexo``...) y con los filtros de ``analyze_group``.
+        """
+        with self._group_lock:
+            table = self._respondent_table(self._current_group())
+            mask = table.mask(filtro_area, filtro_cargo, filtro_sexo)
+            return table.level_counts(tuple(indicador), by=por, mask=mask)
+
+    def _respondent_table(self, group: GroupAggregates) -> RespondentTable:
+        """Tabla columnar del grupo actual; se rearma cuando cambia alguna fila."""
+        cached = self._table
+        if cached is None or cached[0] is not group or cached[1] != group.version:
+            cached = self._table = (group, group.version, RespondentTable(group.rows()))
+            self._filtered = {}
+        return cached[2]
+
+    def _filtered_group(
+        self,
+        group: GroupAggregates,
+        filtro_area: Optional[str],
+        filtro_cargo: Optional[str],
+        filtro_sexo: Optional[str],
+    ) -> GroupAggregates:
+        table = self._respondent_table(group)
+        key = tuple((f or "").lower() for f in (filtro_area, filtro_cargo, filtro_sexo))
+        filtered = self._filtered.get(key)
+        if filtered is None:
+            if len(self._filtered) >= FILTERED_GROUPS_MAX:
+                self._filtered.clear()
+            filtered = GroupAggregates(table.select(table.mask(filtro_area, filtro_cargo, filtro_sexo)))
+            self._filtered[key] = filtered
+        return filtered
 
     def _get_all_cedulas(self) -> List[str]:
-        """Devuelve la lista de cédulas únicas de todos los respondentes."""
-        path = os.path.join(self.data_dir, "form_datos-generales.json")
-        records = _load_json(path)
-        cedulas = set()
-        for r in records:
-            c = r.get("data", {}).get("numero_identificacion")
-            if c:
-                cedulas.add(str(c))
-
-        # También recoger cédulas de los cuestionarios Likert
-        for q in ["estres", "extralaborales", "intralaborales-a", "intralaborales-b"]:
-            path2 = os.path.join(self.data_dir, f"responses_{q}.json")
-            for r in _load_json(path2):
-                c = r.get("respondent_cedula")
-                if c:
-                    cedulas.add(str(c))
-        return list(cedulas)
+        """Devuelve la lista de cédulas únicas de todos los respondentes
+        (datos generales + cuestionarios Likert)."""
+        return self.repo.list_cedulas(["estres", "extralaborales", "intralaborales-a", "intralaborales-b"])
 
     def _aggregate_questionnaire(self, q_list: List[Dict]) -> Dict:
         """Agrega resultados de múltiples respondentes para un cuestionario."""
-        scores = [q["puntaje_transformado"] for q in q_list]
-        promedio = round(sum(scores) / len(scores), 1) if scores else 0
-
-        # Distribución de niveles
-        dist: Dict[str, int] = {"Sin Riesgo": 0, "Bajo": 0, "Medio": 0, "Alto": 0, "Muy Alto": 0}
-        for q in q_list:
-            lvl = q.get("nivel_riesgo", "Sin Riesgo")
-            if lvl in dist:
-                dist[lvl] += 1
-
-        n = len(q_list)
-        dist_pct = {k: round(v / n * 100, 1) if n > 0 else 0 for k, v in dist.items()}
-
-        # Agregar dimensiones si existen
-        dims_agg: Dict[str, Dict] = {}
-        for q in q_list:
-            for dom_name, dom_data in q.get("dominios", {}).items():
-                for dim_name, dim_data in dom_data.get("dimensiones", {}).items():
-                    if dim_name not in dims_agg:
-                        dims_agg[dim_name] = {"scores": [], "dominio": dom_name}
-                    dims_agg[dim_name]["scores"].append(dim_data["puntaje_transformado"])
-
-        dims_result = {}
-        for dim_name, d in dims_agg.items():
-            sc = d["scores"]
-            avg = round(sum(sc) / len(sc), 1) if sc else 0
-            dims_result[dim_name] = {
-                "promedio_transformado": avg,
-                "n":                     len(sc),
-                "dominio":               d["dominio"],
-            }
-
-        return {
-            "n":                     n,
-            "promedio_transformado": promedio,
-            "distribucion":          dist,
-            "distribucion_pct":      dist_pct,
-            "dimensiones":           dims_result,
-        }
-
-    def _compute_dimension_ranking(self, results_by_q: Dict[str, List[Dict]]) -> List[Dict]:
-        """Retorna top 10 dimensiones con mayor puntaje promedio (mayor riesgo)."""
-        all_dims: Dict[str, List[float]] = defaultdict(list)
-
-        for q_list in results_by_q.values():
-            for q in q_list:
-                for dom_data in q.get("dominios", {}).values():
-                    for dim_name, dim_data in dom_data.get("dimensiones", {}).items():
-                        all_dims[dim_name].append(dim_data["puntaje_transformado"])
-
-        ranking = []
-        for dim_name, scores in all_dims.items():
-            avg = round(sum(scores) / len(scores), 1)
-            ranking.append({"dimension": dim_name, "promedio": avg, "n": len(scores)})
-
-        ranking.sort(key=lambda x: x["promedio"], reverse=True)
-        return ranking[:10]
-
-    def _compute_demografico(self, cedulas: List[str]) -> Dict:
-        """Calcula distribución demográfica del grupo."""
-        counters: Dict[str, Dict[str, int]] = {
-            "sexo": defaultdict(int),
-            "area": defaultdict(int),
-            "tipo_cargo": defaultdict(int),
-            "nivel_estudios": defaultdict(int),
-            "estado_civil": defaultdict(int),
-            "ciudad_residencia": defaultdict(int),
-            "estrato": defaultdict(int),
-            "tipo_vivienda": defaultdict(int),
-        }
-        for cedula in cedulas:
-            meta = _get_cedula_metadata(cedula)
-            for field, counter in counters.items():
-                val = meta.get(field) or meta.get({
-                    "area": "departamento_area",
-                    "tipo_cargo": "tipo_cargo",
-                }.get(field, field), "No especificado")
-                counter[str(val)] += 1
-
-        return {k: dict(v) for k, v in counters.items()}
+        return aggregate_results(q_list)
 
     # ──────────────────────────────────────────────────────────
     # MANEJO DE BAREMOS
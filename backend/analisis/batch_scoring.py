@@ -0,0 +1,448 @@
+"""
+Calificación vectorizada por lotes (NumPy) para campañas completas.
+
+``PsychosocialScoringEngine`` califica un respondente a la vez. Este módulo
+califica N respondentes de un cuestionario en una sola pasada:
+
+1. ``pack_responses`` empaqueta las respuestas en una matriz int8 (N × ítems),
+   columna j = ítem j+1, ``MISSING`` (-1) donde no hay respuesta.
+2. ``score_batch`` aplica la escala directa/inversa como máscara, suma
+   dimensiones, dominios y total con matrices de índices precalculadas y
+   clasifica contra los baremos con ``searchsorted``.
+3. ``BatchScores.results`` reconstruye los dicts de los calificadores
+   individuales, idénticos campo a campo (incluido el tipo int/float).
+
+El redondeo oficial (ROUND_HALF_UP sobre el texto del puntaje) no se puede
+emular con aritmética binaria; en su lugar se calcula el mismo float que el
+calificador individual y se redondea una sola vez cada valor distinto
+(``np.unique``), lo que da resultados exactos con unas pocas decenas de
+conversiones ``Decimal`` por lote.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .scoring_engine import (
+    ESTRES_DIVISOR,
+    ESTRES_GRUPOS,
+    EXTRALABORAL_STRUCTURE,
+    EXTRALABORAL_TOTAL_FACTOR,
+    INTRA_A_STRUCTURE,
+    INTRA_B_STRUCTURE,
+    INVERSE_ITEMS,
+    PsychosocialScoringEngine,
+    _classify_tipo_cargo,
+)
+
+MISSING = -1
+
+# Número de columnas de la matriz de respuestas por cuestionario
+N_ITEMS = {"intralaboral_a": 123, "intralaboral_b": 97, "extralaboral": 31, "estres": 31}
+
+# Identificador del cuestionario en la API → llave del baremo
+CUESTIONARIO_IDS = {
+    "intralaborales-a": "intralaboral_a",
+    "intralaborales-b": "intralaboral_b",
+    "extralaborales":   "extralaboral",
+    "estres":           "estres",
+}
+
+GRUPOS_CARGO = ("profesionales_directivos", "auxiliares_operativos")
+
+RISK_COLORS = {
+    "Sin Riesgo": "#27ae60",
+    "Bajo":       "#2ecc71",
+    "Medio":      "#f39c12",
+    "Alto":       "#e74c3c",
+    "Muy Alto":   "#8e44ad",
+}
+
+# Solo para reutilizar _responses_to_dict y classify_risk (no dependen del baremo cargado)
+_ENGINE = PsychosocialScoringEngine()
+
+
+def _normalize_cuestionario(cuestionario: str) -> str:
+    cuestionario = CUESTIONARIO_IDS.get(cuestionario, cuestionario)
+    if cuestionario not in N_ITEMS:
+        raise ValueError(f"Cuestionario no soportado para calificación por lotes: {cuestionario}")
+    return cuestionario
+
+
+# ──────────────────────────────────────────────────────────────
+# Empaquetado
+# ──────────────────────────────────────────────────────────────
+
+def pack_responses(cuestionario: str, responses_list: Sequence[List[Dict]]) -> np.ndarray:
+    """
+    Convierte listas de respuestas (formato almacenado) en una matriz int8 N × ítems.
+    Se interpretan igual que ``_responses_to_dict``: IDs y valores numéricos, la
+    última respuesta de un ítem repetido gana y los IDs no numéricos se ignoran.
+    """
+    cuestionario = _normalize_cuestionario(cuestionario)
+    n_items = N_ITEMS[cuestionario]
+    matrix = np.full((len(responses_list), n_items), MISSING, dtype=np.int8)
+    for row, responses in enumerate(responses_list):
+        for qid, value in _ENGINE._responses_to_dict(responses).items():
+            if not isinstance(qid, int) or not 1 <= qid <= n_items:
+                continue
+            if not isinstance(value, int) or not 0 <= value <= 127:
+                raise ValueError(f"Valor de respuesta no calificable en el ítem {qid}: {value!r}")
+            matrix[row, qid - 1] = value
+    return matrix
+
+
+# ──────────────────────────────────────────────────────────────
+# Redondeo y clasificación vectorizados
+# ──────────────────────────────────────────────────────────────
+
+def _round_half_up(values: np.ndarray) -> np.ndarray:
+    """``float(Decimal(str(v)).quantize(Decimal('.1'), ROUND_HALF_UP))`` elemento a elemento."""
+    if values.size == 0:
+        return values.astype(np.float64)
+    uniq, inverse = np.unique(values, return_inverse=True)
+    rounded = np.array(
+        [float(Decimal(str(float(v))).quantize(Decimal(".1"), rounding=ROUND_HALF_UP)) for v in uniq],
+        dtype=np.float64,
+    )
+    return rounded[inverse.reshape(values.shape)]
+
+
+def _transformed(raw: np.ndarray, max_raw: float) -> np.ndarray:
+    """Equivalente vectorizado de ``_transformed_score``."""
+    if max_raw == 0:
+        return np.zeros(raw.shape, dtype=np.float64)
+    return _round_half_up(raw / max_raw * 100)
+
+
+def classify_batch(scores: np.ndarray, table: Dict) -> np.ndarray:
+    """
+    Equivalente vectorizado de ``classify_risk``: nivel (str) de cada puntaje.
+    Con rangos ascendentes y sin solapes usa ``searchsorted``; si la tabla no
+    cumple esa forma se clasifica cada valor distinto con ``classify_risk``.
+    """
+    ranges = [
+        (level, value) for level, value in table.items()
+        if isinstance(value, (list, tuple)) and len(value) == 2
+    ]
+    levels = np.array([level for level, _ in ranges] + ["Muy Alto"], dtype=object)
+    los = np.array([v[0] for _, v in ranges], dtype=np.float64)
+    his = np.array([v[1] for _, v in ranges], dtype=np.float64)
+    ordered = all(los[i] <= his[i] for i in range(len(ranges))) and all(
+        his[i] < los[i + 1] for i in range(len(ranges) - 1)
+    )
+    scores = _round_half_up(np.asarray(scores, dtype=np.float64))
+    if not ordered:
+        uniq, inverse = np.unique(scores, return_inverse=True)
+        mapped = np.array([_ENGINE.classify_risk(float(s), table) for s in uniq], dtype=object)
+        return mapped[inverse.reshape(scores.shape)]
+
+    if not ranges:
+        return np.full(scores.shape, "Muy Alto", dtype=object)
+    idx = np.searchsorted(los, scores, side="right") - 1
+    inside = (idx >= 0) & (scores <= his[np.clip(idx, 0, None)])
+    return levels[np.where(inside, idx, len(ranges))]
+
+
+def _classify_by_group(scores: np.ndarray, tables: Dict[str, Dict], grupos: np.ndarray) -> np.ndarray:
+    levels = np.empty(scores.shape, dtype=object)
+    for grupo in GRUPOS_CARGO:
+        mask = grupos == grupo
+        if mask.any():
+            levels[mask] = classify_batch(scores[mask], tables[grupo])
+    return levels
+
+
+# ──────────────────────────────────────────────────────────────
+# Resultado por lotes
+# ──────────────────────────────────────────────────────────────
+
+class BatchScores:
+    """Puntajes de N respondentes de un cuestionario, en arreglos por respondente."""
+
+    def __init__(self, cuestionario: str, n: int, version_baremos: Any):
+        self.cuestionario = cuestionario
+        self.n = n
+        self.version_baremos = version_baremos
+        self.total_raw: Optional[np.ndarray] = None
+        self.total_score: Optional[np.ndarray] = None
+        self.total_level: Optional[np.ndarray] = None
+        # nombre → {"raw", "max", "score", "level"} (+ "answered" en extralaboral)
+        self.dimensions: Dict[str, Dict[str, Any]] = {}
+        self.domains: Dict[str, Dict[str, Any]] = {}
+        # Estrés: pasos a-d; extralaboral/estrés: grupo de tipo de cargo por fila
+        self.pasos: Dict[str, np.ndarray] = {}
+        self.grupos: Optional[np.ndarray] = None
+        # Extralaboral: filas con todas las dimensiones respondidas
+        self.valid: np.ndarray = np.ones(n, dtype=bool)
+
+    def results(self, hashes: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Dicts idénticos a los de ``score_*``; ``hash_respuestas`` solo si se pasan ``hashes``."""
+        builder = {
+            "intralaboral_a": self._intra_result,
+            "intralaboral_b": self._intra_result,
+            "extralaboral":   self._extra_result,
+            "estres":         self._estres_result,
+        }[self.cuestionario]
+        out = []
+        for i in range(self.n):
+            result = builder(i)
+            if hashes is not None and "error" not in result:
+                version = result.pop("version_baremos")
+                result["hash_respuestas"] = hashes[i]
+                result["version_baremos"] = version
+            out.append(result)
+        return out
+
+    @staticmethod
+    def _entry(block: Dict[str, Any], i: int, max_key: str) -> Dict:
+        level = block["level"][i]
+        return {
+            "puntaje_bruto":        round(int(block["raw"][i]), 2),
+            max_key:                block["max"],
+            "puntaje_transformado": float(block["score"][i]),
+            "nivel_riesgo":         level,
+            "color":                RISK_COLORS.get(level, "#95a5a6"),
+        }
+
+    def _intra_result(self, i: int) -> Dict:
+        structure = INTRA_A_STRUCTURE if self.cuestionario == "intralaboral_a" else INTRA_B_STRUCTURE
+        dominios = {}
+        for dominio, dims in structure.items():
+            dims_calc = {name: self._entry(self.dimensions[name], i, "puntaje_maximo") for name in dims}
+            dominios[dominio] = self._entry(self.domains[dominio], i, "puntaje_maximo")
+            dominios[dominio]["dimensiones"] = dims_calc
+        level = self.total_level[i]
+        forma = "A" if self.cuestionario == "intralaboral_a" else "B"
+        return {
+            "cuestionario":           f"intralaborales-{forma.lower()}",
+            "forma":                  forma,
+            "puntaje_bruto_total":    round(int(self.total_raw[i]), 2),
+            "puntaje_maximo_total":   int(sum(d["max"] for d in self.domains.values())),
+            "puntaje_transformado":   float(self.total_score[i]),
+            "nivel_riesgo":           level,
+            "color":                  RISK_COLORS.get(level, "#95a5a6"),
+            "dominios":               dominios,
+            "version_baremos":        self.version_baremos,
+        }
+
+    def _extra_result(self, i: int) -> Dict:
+        grupo = self.grupos[i]
+        dimensiones = {}
+        for name, block in self.dimensions.items():
+            if block["answered"][i] == 0:
+                continue
+            dimensiones[name] = self._entry(block, i, "factor_transformacion")
+        if not self.valid[i]:
+            return {
+                "cuestionario":  "extralaborales",
+                "tipo_cargo_grupo": grupo,
+                "baremo_aplicado": grupo,
+                "error":         "Dimensiones sin respuesta — no se puede calcular el total",
+                "missing_dims":  [name for name, b in self.dimensions.items() if b["answered"][i] == 0],
+                "dimensiones":   dimensiones,
+                "version_baremos": self.version_baremos,
+            }
+        level = self.total_level[i]
+        return {
+            "cuestionario":           "extralaborales",
+            "tipo_cargo_grupo":       grupo,
+            "baremo_aplicado":        grupo,
+            "puntaje_bruto_total":    round(int(self.total_raw[i]), 2),
+            "factor_total":           EXTRALABORAL_TOTAL_FACTOR,
+            "puntaje_transformado":   float(self.total_score[i]),
+            "nivel_riesgo":           level,
+            "color":                  RISK_COLORS.get(level, "#95a5a6"),
+            "dimensiones":            dimensiones,
+            "version_baremos":        self.version_baremos,
+        }
+
+    def _estres_result(self, i: int) -> Dict:
+        grupo = self.grupos[i]
+        pasos = {}
+        for paso in ("a", "b", "c", "d"):
+            # Un paso sin ítems respondidos vale 0 (int) en el calificador individual
+            pasos[paso] = round(float(self.pasos[paso][i]), 2) if self.pasos[f"n_{paso}"][i] else 0
+        answered_any = any(self.pasos[f"n_{p}"][i] for p in ("a", "b", "c", "d"))
+        level = self.total_level[i]
+        return {
+            "cuestionario":           "estres",
+            "tipo_cargo_grupo":       grupo,
+            "baremo_aplicado":        grupo,
+            "paso_a":                 pasos["a"],
+            "paso_b":                 pasos["b"],
+            "paso_c":                 pasos["c"],
+            "paso_d":                 pasos["d"],
+            "puntaje_bruto_total":    round(float(self.total_raw[i]), 2) if answered_any else 0,
+            "divisor":                ESTRES_DIVISOR,
+            "puntaje_transformado":   float(self.total_score[i]),
+            "nivel_riesgo":           level,
+            "color":                  RISK_COLORS.get(level, "#95a5a6"),
+            "version_baremos":        self.version_baremos,
+        }
+
+
+# ──────────────────────────────────────────────────────────────
+# Calificadores por lotes
+# ──────────────────────────────────────────────────────────────
+
+def _membership(n_items: int, groups: Dict[str, List[int]]) -> np.ndarray:
+    """Matriz ítems × grupos con 1 donde el ítem pertenece al grupo."""
+    matrix = np.zeros((n_items, len(groups)), dtype=np.int32)
+    for col, items in enumerate(groups.values()):
+        for q in items:
+            matrix[q - 1, col] = 1
+    return matrix
+
+
+def _score_intralaboral(cuestionario: str, matrix: np.ndarray, baremos: Dict) -> BatchScores:
+    structure = INTRA_A_STRUCTURE if cuestionario == "intralaboral_a" else INTRA_B_STRUCTURE
+    n_items = N_ITEMS[cuestionario]
+    baremo_total = baremos[cuestionario]["total"]
+    baremo_dominios = baremos[cuestionario]["dominios"]
+    baremo_dims = baremos[cuestionario]["dimensiones"]
+
+    values = matrix.astype(np.int32)
+    inverse = np.zeros(n_items, dtype=bool)
+    inverse[[q - 1 for q in INVERSE_ITEMS[cuestionario] if q <= n_items]] = True
+    points = np.where(inverse, values - 1, 5 - values)
+    points[matrix == MISSING] = 0
+
+    dim_items = {name: items for dims in structure.values() for name, items in dims.items()}
+    dim_raw = points @ _membership(n_items, dim_items)
+
+    result = BatchScores(cuestionario, matrix.shape[0], baremos.get("version"))
+    total_raw = np.zeros(matrix.shape[0], dtype=np.int64)
+    total_max = 0
+    col = 0
+    for dominio, dims in structure.items():
+        dom_raw = np.zeros(matrix.shape[0], dtype=np.int64)
+        dom_max = 0
+        for name, items in dims.items():
+            raw = dim_raw[:, col]
+            dim_max = len(items) * 4
+            score = _transformed(raw, dim_max)
+            result.dimensions[name] = {
+                "raw": raw, "max": dim_max, "score": score,
+                "level": classify_batch(score, baremo_dims.get(name, baremo_total)),
+            }
+            dom_raw = dom_raw + raw
+            dom_max += dim_max
+            col += 1
+        score = _transformed(dom_raw, dom_max)
+        result.domains[dominio] = {
+            "raw": dom_raw, "max": dom_max, "score": score,
+            "level": classify_batch(score, baremo_dominios.get(dominio, baremo_total)),
+        }
+        total_raw = total_raw + dom_raw
+        total_max += dom_max
+
+    result.total_raw = total_raw
+    result.total_score = _transformed(total_raw, total_max)
+    result.total_level = classify_batch(result.total_score, baremo_total)
+    return result
+
+
+def _score_extralaboral(matrix: np.ndarray, grupos: np.ndarray, baremos: Dict) -> BatchScores:
+    n_items = N_ITEMS["extralaboral"]
+    values = matrix.astype(np.int32)
+    answered_mask = matrix != MISSING
+
+    inverse = np.zeros(n_items, dtype=bool)
+    for config in EXTRALABORAL_STRUCTURE.values():
+        if config["escala"] == "inversa":
+            inverse[[q - 1 for q in config["items"]]] = True
+    points = np.clip(np.where(inverse, values - 1, 5 - values), 0, 4)
+    points[~answered_mask] = 0
+
+    membership = _membership(n_items, {n: c["items"] for n, c in EXTRALABORAL_STRUCTURE.items()})
+    dim_raw = points @ membership
+    dim_answered = answered_mask.astype(np.int32) @ membership
+
+    tables = {g: baremos["extralaboral"][g] for g in GRUPOS_CARGO}
+    result = BatchScores("extralaboral", matrix.shape[0], baremos.get("version"))
+    result.grupos = grupos
+    result.valid = (dim_answered > 0).all(axis=1)
+    for col, (name, config) in enumerate(EXTRALABORAL_STRUCTURE.items()):
+        raw = dim_raw[:, col]
+        score = _transformed(raw, config["factor"])
+        dim_tables = {g: t["dimensiones"].get(name, t["total"]) for g, t in tables.items()}
+        result.dimensions[name] = {
+            "raw": raw, "max": config["factor"], "score": score,
+            "level": _classify_by_group(score, dim_tables, grupos),
+            "answered": dim_answered[:, col],
+        }
+
+    result.total_raw = dim_raw.sum(axis=1)
+    result.total_score = _transformed(result.total_raw, EXTRALABORAL_TOTAL_FACTOR)
+    result.total_level = _classify_by_group(result.total_score, {g: t["total"] for g, t in tables.items()}, grupos)
+    return result
+
+
+def _score_estres(matrix: np.ndarray, grupos: np.ndarray, baremos: Dict) -> BatchScores:
+    n_items = N_ITEMS["estres"]
+    # Tabla ítem × valor crudo → puntos (valores fuera de la escala valen 0)
+    lut = np.zeros((n_items, 128), dtype=np.float64)
+    for grupo_cfg in ESTRES_GRUPOS.values():
+        for q in grupo_cfg["items"]:
+            for raw_val, pts in grupo_cfg["escala"].items():
+                lut[q - 1, raw_val] = pts
+    answered = matrix != MISSING
+    points = lut[np.arange(n_items), np.clip(matrix, 0, 127).astype(np.intp)]
+    points[~answered] = 0
+
+    result = BatchScores("estres", matrix.shape[0], baremos.get("version"))
+    result.grupos = grupos
+    bloques = {"a": (range(1, 9), 4), "b": (range(9, 13), 3), "c": (range(13, 23), 2), "d": (range(23, 32), None)}
+    bruto = np.zeros(matrix.shape[0], dtype=np.float64)
+    for paso, (items, factor) in bloques.items():
+        cols = [q - 1 for q in items]
+        total = points[:, cols].sum(axis=1)
+        count = answered[:, cols].sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg = total / count
+            value = avg * factor if factor is not None else avg
+        value = np.where(count > 0, value, 0.0)
+        result.pasos[paso] = value
+        result.pasos[f"n_{paso}"] = count
+        bruto = bruto + value
+
+    result.total_raw = bruto
+    result.total_score = np.clip(_round_half_up(bruto / ESTRES_DIVISOR * 100), 0.0, 100.0)
+    result.total_level = _classify_by_group(
+        result.total_score, {g: baremos["estres"][g] for g in GRUPOS_CARGO}, grupos
+    )
+    return result
+
+
+def score_batch(
+    cuestionario: str,
+    responses_matrix: np.ndarray,
+    tipo_cargo_groups: Optional[Sequence[Optional[str]]] = None,
+    baremos: Optional[Dict] = None,
+) -> BatchScores:
+    """
+    Califica una matriz de respuestas (ver ``pack_responses``).
+
+    ``tipo_cargo_groups`` admite por fila el grupo del baremo o el tipo de cargo
+    tal como está en la ficha (se clasifica con ``_classify_tipo_cargo``); solo
+    afecta a estrés y extralaboral.
+    """
+    cuestionario = _normalize_cuestionario(cuestionario)
+    matrix = np.asarray(responses_matrix)
+    if matrix.ndim != 2 or matrix.shape[1] != N_ITEMS[cuestionario]:
+        raise ValueError(f"La matriz de {cuestionario} debe tener {N_ITEMS[cuestionario]} columnas")
+    if baremos is None:
+        baremos = PsychosocialScoringEngine().baremos
+
+    if cuestionario.startswith("intralaboral"):
+        return _score_intralaboral(cuestionario, matrix, baremos)
+
+    if tipo_cargo_groups is None:
+        tipo_cargo_groups = [None] * matrix.shape[0]
+    grupos = np.array(
+        [g if g in GRUPOS_CARGO else _classify_tipo_cargo(g) for g in tipo_cargo_groups], dtype=object
+    )
+    if cuestionario == "extralaboral":
+        return _score_extralaboral(matrix, grupos, baremos)
+    return _score_estres(matrix, grupos, baremos)
@@ -0,0 +1,267 @@
+"""
+Agregados grupales incrementales.
+
+El análisis grupal se arma desde contadores por grupo en lugar de recorrer los
+resultados de todos los respondentes:
+
+    cuestionario / dominio / dimensión × (total, área, forma, grupo de cargo)
+        → n, suma de puntaje_transformado y conteo por nivel de riesgo
+
+Cada respondente aporta una lista de contribuciones derivada de su fila de
+resultados (ver ``AnalysisService._group_row``). Cuando vuelve a enviar un
+cuestionario o su ficha, su fila se reemplaza: se restan sus contribuciones
+anteriores y se suman las nuevas, así cada respondente cuenta siempre con su
+último resultado. Leer el resumen cuesta O(grupos), no O(respondentes).
+
+Los puntajes transformados tienen una décima, de modo que las sumas se llevan
+en décimas enteras: sumar y restar en cualquier orden da exactamente el mismo
+promedio que calcularlo desde cero.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .scoring_plan import to_tenths
+
+NIVELES = ("Sin Riesgo", "Bajo", "Medio", "Alto", "Muy Alto")
+GRUPOS_CARGO = ("profesionales_directivos", "auxiliares_operativos")
+CAMPOS_DEMOGRAFICOS = (
+    "sexo", "area", "tipo_cargo", "nivel_estudios", "estado_civil", "ciudad_residencia", "estrato", "tipo_vivienda",
+)
+
+# (tipo de agregado, llave dentro del tipo, décimas, nivel)
+Contribution = Tuple[str, Tuple, int, str]
+
+
+class LevelStats:
+    """n, suma de puntajes (en décimas) y conteo por nivel de un grupo de resultados."""
+
+    __slots__ = ("n", "suma", "niveles")
+
+    def __init__(self):
+        self.n = 0
+        self.suma = 0
+        self.niveles: Dict[str, int] = defaultdict(int)
+
+    def add(self, tenths: int, nivel: str, sign: int = 1):
+        self.n += sign
+        self.suma += sign * tenths
+        self.niveles[nivel] += sign
+
+    def merge(self, other: "LevelStats"):
+        self.n += other.n
+        self.suma += other.suma
+        for nivel, count in other.niveles.items():
+            self.niveles[nivel] += count
+
+    def promedio(self) -> float:
+        return round(self.suma / (10 * self.n), 1) if self.n else 0
+
+    def distribucion(self) -> Dict[str, int]:
+        return {nivel: self.niveles.get(nivel, 0) for nivel in NIVELES}
+
+    def distribucion_pct(self) -> Dict[str, float]:
+        n = self.n
+        return {k: round(v / n * 100, 1) if n > 0 else 0 for k, v in self.distribucion().items()}
+
+
+def _tenths(result: Dict) -> int:
+    return to_tenths(result["puntaje_transformado"]) or 0
+
+
+def _nivel(result: Dict) -> str:
+    return result.get("nivel_riesgo", "Sin Riesgo")
+
+
+def aggregate_results(q_list: List[Dict]) -> Dict:
+    """Agrega resultados de múltiples respondentes para un cuestionario."""
+    stats = LevelStats()
+    dims: Dict[Tuple[str, str], LevelStats] = {}
+    for q in q_list:
+        stats.add(_tenths(q), _nivel(q))
+        for dom_name, dom_data in q.get("dominios", {}).items():
+            for dim_name, dim_data in dom_data.get("dimensiones", {}).items():
+                dims.setdefault((dim_name, dom_name), LevelStats()).add(_tenths(dim_data), _nivel(dim_data))
+    return _questionnaire_summary(stats, dims)
+
+
+def _questionnaire_summary(stats: LevelStats, dims: Dict[Tuple[str, str], LevelStats]) -> Dict:
+    return {
+        "n":                     stats.n,
+        "promedio_transformado": stats.promedio(),
+        "distribucion":          stats.distribucion(),
+        "distribucion_pct":      stats.distribucion_pct(),
+        "dimensiones": {
+            dim_name: {"promedio_transformado": d.promedio(), "n": d.n, "dominio": dom_name}
+            for (dim_name, dom_name), d in dims.items()
+        },
+    }
+
+
+def demographic_value(meta: Dict, field: str) -> str:
+    """Valor de un campo sociodemográfico de la ficha, como se cuenta en el resumen."""
+    val = meta.get(field) or meta.get({
+        "area": "departamento_area",
+        "tipo_cargo": "tipo_cargo",
+    }.get(field, field), "No especificado")
+    return str(val)
+
+
+def row_contributions(row: Dict) -> List[Contribution]:
+    """Contribuciones de la fila de un respondente a cada agregado grupal."""
+    out: List[Contribution] = []
+
+    def add(kind: str, key: Tuple, result: Dict):
+        out.append((kind, key, _tenths(result), _nivel(result)))
+
+    cuestionarios = row["cuestionarios"]
+    for q_key, q in cuestionarios.items():
+        if "error" in q or "puntaje_transformado" not in q:
+            continue
+        add("cuestionario", (q_key,), q)
+        for dom_name, dom_data in q.get("dominios", {}).items():
+            for dim_name, dim_data in dom_data.get("dimensiones", {}).items():
+                add("cuestionario_dimension", (q_key, dim_name, dom_name), dim_data)
+
+    intra = cuestionarios.get("intralaboral")
+    if intra and "error" not in intra:
+        add("area", (row["area"],), intra)
+    if intra and "dominios" in intra:
+        seen_dims = set()
+        for dom_name, dom_data in intra["dominios"].items():
+            if "nivel_riesgo" in dom_data:
+                add("dominio", (dom_name,), dom_data)
+                add("dominio_forma", (dom_name, row["forma"]), dom_data)
+                add("dominio_area", (dom_name, row["area"]), dom_data)
+            for dim_name, dim_data in dom_data.get("dimensiones", {}).items():
+                add("dimension", (dom_name, dim_name), dim_data)
+                # Una dimensión cuenta por área en el primer dominio que la contiene
+                if dim_name not in seen_dims:
+                    seen_dims.add(dim_name)
+                    add("dimension_area", (dim_name, row["area"]), dim_data)
+
+    estres = cuestionarios.get("estres")
+    if estres and "nivel_riesgo" in estres and "error" not in estres:
+        grupo = estres.get("tipo_cargo_grupo", "auxiliares_operativos")
+        if grupo in GRUPOS_CARGO:
+            add("estres_grupo", (grupo,), estres)
+    return out
+
+
+class GroupAggregates:
+    """Agregados de un grupo de respondentes, actualizables respondente por respondente."""
+
+    def __init__(self, rows: Iterable[Dict] = ()):
+        self._rows: Dict[str, Dict] = {}
+        self._contributions: Dict[str, List[Contribution]] = {}
+        self._stats: Dict[str, Dict[Tuple, LevelStats]] = defaultdict(dict)
+        self._demografico: Dict[str, Dict[str, int]] = {campo: {} for campo in CAMPOS_DEMOGRAFICOS}
+        # Baremos con que se calcularon (los fija AnalysisService)
+        self.baremos: Optional[str] = None
+        # Cambia con cada fila agregada o quitada (invalida las vistas derivadas)
+        self.version = 0
+        for row in rows:
+            self.upsert(row)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def rows(self) -> List[Dict]:
+        return list(self._rows.values())
+
+    # ─── Actualización ─────────────────────────────────────────
+
+    def upsert(self, row: Dict):
+        """Agrega la fila de un respondente, reemplazando la anterior si existía."""
+        self.remove(row["cedula"])
+        contributions = row_contributions(row)
+        self._rows[row["cedula"]] = row
+        self._contributions[row["cedula"]] = contributions
+        self._apply(row, contributions, 1)
+        self.version += 1
+
+    def remove(self, cedula: str):
+        row = self._rows.pop(cedula, None)
+        if row is not None:
+            self._apply(row, self._contributions.pop(cedula), -1)
+            self.version += 1
+
+    def _apply(self, row: Dict, contributions: List[Contribution], sign: int):
+        for kind, key, tenths, nivel in contributions:
+            by_key = self._stats[kind]
+            stats = by_key.get(key)
+            if stats is None:
+                stats = by_key[key] = LevelStats()
+            stats.add(tenths, nivel, sign)
+            if stats.n == 0:
+                del by_key[key]
+        for campo, counter in self._demografico.items():
+            val = demographic_value(row["meta"], campo)
+            counter[val] = counter.get(val, 0) + sign
+            if counter[val] == 0:
+                del counter[val]
+
+    # ─── Resumen ───────────────────────────────────────────────
+
+    def cuestionarios(self) -> Dict[str, Dict]:
+        dims_by_q: Dict[str, Dict[Tuple[str, str], LevelStats]] = defaultdict(dict)
+        for (q_key, dim_name, dom_name), stats in self._stats["cuestionario_dimension"].items():
+            dims_by_q[q_key][(dim_name, dom_name)] = stats
+        return {
+            q_key: _questionnaire_summary(stats, dims_by_q.get(q_key, {}))
+            for (q_key,), stats in self._stats["cuestionario"].items()
+        }
+
+    def ranking_dimensiones(self, top: int = 10) -> List[Dict]:
+        """Dimensiones con mayor puntaje promedio (mayor riesgo)."""
+        all_dims: Dict[str, LevelStats] = {}
+        for (_, dim_name, _), stats in self._stats["cuestionario_dimension"].items():
+            all_dims.setdefault(dim_name, LevelStats()).merge(stats)
+        ranking = [
+            {"dimension": dim_name, "promedio": stats.promedio(), "n": stats.n}
+            for dim_name, stats in all_dims.items()
+        ]
+        ranking.sort(key=lambda x: x["promedio"], reverse=True)
+        return ranking[:top]
+
+    def demografico(self) -> Dict[str, Dict[str, int]]:
+        return {campo: dict(counter) for campo, counter in self._demografico.items()}
+
+    def _dist_by(self, kind: str, prefix: Tuple = ()) -> Dict[str, Dict]:
+        """distribucion_pct por el último componente de la llave, filtrando por prefijo."""
+        n = len(prefix)
+        return {
+            key[n]: stats.distribucion_pct()
+            for key, stats in self._stats[kind].items()
+            if key[:n] == prefix
+        }
+
+    def area_breakdown(self) -> Dict[str, Dict]:
+        """Distribución de niveles intralaborales por área."""
+        return self._dist_by("area")
+
+    def domain_breakdown(self, domain_name: str) -> Dict[str, Dict]:
+        """Distribución de niveles de cada dimensión de un dominio."""
+        return self._dist_by("dimension", (domain_name,))
+
+    def domain_by_form(self, domain_name: str) -> Dict[str, Dict]:
+        """Distribución de niveles de un dominio separando Forma A y Forma B."""
+        by_form = self._dist_by("dominio_forma", (domain_name,))
+        return {forma: by_form[forma] for forma in ("A", "B") if forma in by_form}
+
+    def domain_area_breakdown(self, domain_name: str) -> Dict[str, Dict]:
+        return self._dist_by("dominio_area", (domain_name,))
+
+    def domain_total_dist(self, domain_name: str) -> Dict[str, float]:
+        stats = self._stats["dominio"].get((domain_name,))
+        return stats.distribucion_pct() if stats else {}
+
+    def dimension_by_area(self, dimension_name: str) -> Dict[str, Dict]:
+        return self._dist_by("dimension_area", (dimension_name,))
+
+    def estres_dist(self) -> Dict[str, float]:
+        stats = self._stats["cuestionario"].get(("estres",))
+        return stats.distribucion_pct() if stats else {}
+
+    def estres_by_cargo(self) -> Dict[str, Dict]:
+        by_grupo = self._dist_by("estres_grupo")
+        return {grupo: by_grupo[grupo] for grupo in GRUPOS_CARGO if grupo in by_grupo}
@@ -0,0 +1,127 @@
+"""
+Calificación grupal en paralelo con un pool de procesos.
+
+Reconstruir los agregados grupales califica a cada respondente uno tras otro en
+un solo hilo de Python. Con al menos ``GROUP_PARALLEL_MIN`` respondentes (500),
+las cédulas se reparten en bloques que califican ``GROUP_SCORING_WORKERS``
+procesos (por defecto, uno por núcleo):
+
+- cada proceso arranca una vez con los baremos vigentes ya cargados y su propio
+  repositorio de solo lectura sobre los mismos datos (sin sesiones: las pasa el
+  proceso principal, y así ningún worker escribe sesiones al salir); si los
+  baremos cambian, el pool se reemplaza;
+- cada bloque devuelve sus filas (``AnalysisService._group_row``) y las filas se
+  unen en el orden de las cédulas, así el resultado es el mismo que en serie.
+
+Con 0 o 1 workers, con grupos pequeños o si el pool falla, se califica en serie.
+"""
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from storage.repository import JsonRepository, ResponseRepository
+
+from .scoring_engine import PsychosocialScoringEngine
+
+GROUP_SCORING_WORKERS = int(os.getenv("GROUP_SCORING_WORKERS", str(os.cpu_count() or 1)))
+GROUP_PARALLEL_MIN = int(os.getenv("GROUP_PARALLEL_MIN", "500"))
+# Varios bloques por worker reparten mejor la carga cuando unos tardan más
+CHUNKS_PER_WORKER = 4
+
+# (tipo, ubicación) del repositorio que abre cada worker
+RepositorySpec = Tuple[str, str]
+
+_worker_service = None
+
+
+def repository_spec(repo: ResponseRepository) -> Optional[RepositorySpec]:
+    """Cómo abrir ``repo`` en otro proceso, o None si no se sabe."""
+    if isinstance(repo, JsonRepository):
+        return ("json", repo.data_dir)
+    db_path = getattr(repo, "db_path", None)
+    return ("sqlite", db_path) if db_path else None
+
+
+def _open_repository(spec: RepositorySpec) -> ResponseRepository:
+    kind, location = spec
+    if kind == "json":
+        return JsonRepository(location, read_only=True)
+    from storage.sqlite_repository import SqliteRepository
+    return SqliteRepository(location, read_only=True)
+
+
+def _init_worker(spec: RepositorySpec, baremos_path: str, baremos: Dict):
+    """Prepara el servicio del proceso: repositorio de solo lectura y baremos ya cargados."""
+    global _worker_service
+    from .analysis_service import AnalysisService
+    service = AnalysisService(repository=_open_repository(spec))
+    service.engine = PsychosocialScoringEngine(baremos_path)
+    service.engine._set_baremos(baremos)
+    _worker_service = service
+
+
+def _score_chunk(cedulas: List[str], sessions: Dict[str, Dict]) -> List[Dict[str, Any]]:
+    return [_worker_service._group_row(cedula, sessions.get(cedula, {})) for cedula in cedulas]
+
+
+class ParallelGroupScorer:
+    """Pool de procesos que califica filas del análisis grupal por bloques."""
+
+    def __init__(self, workers: int = GROUP_SCORING_WORKERS, min_rows: int = GROUP_PARALLEL_MIN):
+        self.workers = workers
+        self.min_rows = min_rows
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._key = None
+        self._lock = threading.Lock()
+
+    def applies(self, n_rows: int) -> bool:
+        return self.workers > 1 and n_rows >= self.min_rows
+
+    def score(
+        self,
+        repo: ResponseRepository,
+        engine: PsychosocialScoringEngine,
+        cedulas: List[str],
+        sessions: Dict[str, Dict],
+    ) -> List[Dict[str, Any]]:
+        """Filas de ``cedulas`` calificadas en los procesos, en el mismo orden."""
+        spec = repository_spec(repo)
+        if spec is None:
+            raise ValueError(f"Repositorio sin equivalente en otro proceso: {type(repo).__name__}")
+        executor = self._get_executor(spec, engine)
+        size = max(1, math.ceil(len(cedulas) / (self.workers * CHUNKS_PER_WORKER)))
+        futures = []
+        for start in range(0, len(cedulas), size):
+            chunk = cedulas[start:start + size]
+            futures.append(executor.submit(
+                _score_chunk, chunk, {c: sessions[c] for c in chunk if c in sessions}
+            ))
+        rows: List[Dict[str, Any]] = []
+        for future in futures:
+            rows.extend(future.result())
+        return rows
+
+    def _get_executor(self, spec: RepositorySpec, engine: PsychosocialScoringEngine) -> ProcessPoolExecutor:
+        key = (spec, engine.baremos_fingerprint)
+        with self._lock:
+            if self._executor is None or self._key != key:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                # spawn: el servidor tiene hilos (pools, fsync) que fork copiaría a medias
+                self._executor = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(spec, engine.baremos_path, engine.baremos),
+                )
+                self._key = key
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -1,11 +1,14 @@
 """
 Generador de Reportes HTML/PDF para el Módulo de Análisis Psicosocial.
-Usa plantillas HTML embebidas y Playwright para exportar a PDF.
+Usa plantillas HTML embebidas y Playwright para exportar a PDF; el navegador es
+el compartido de ``services.browser_pool``.
 """
 import os
 from datetime import datetime
 from typing import Dict, Any
 
+from services.browser_pool import browser_pool
+
 
 RISK_COLORS = {
     "Sin Riesgo": "#27ae60",
@@ -445,19 +448,13 @@ class ReportGenerator:
     """Genera reportes HTML y los exporta a PDF con Playwright."""
 
     async def _html_to_pdf(self, html: str, landscape: bool = False) -> bytes:
-        from playwright.async_api import async_playwright
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-            await page.set_content(html, wait_until="networkidle")
-            pdf_bytes = await page.pdf(
-                format="Letter",
-                landscape=landscape,
-                margin={"top": "1.2cm", "bottom": "1.2cm", "left": "1.5cm", "right": "1.5cm"},
-                print_background=True,
-            )
-            await browser.close()
-        return pdf_bytes
+        return await browser_pool.render_pdf(
+            html,
+            format="Letter",
+            landscape=landscape,
+            margin={"top": "1.2cm", "bottom": "1.2cm", "left": "1.5cm", "right": "1.5cm"},
+            print_background=True,
+        )
 
     async def generate_individual_pdf(self, analysis: Dict) -> bytes:
         html = build_individual_html(analysis)
@@ -0,0 +1,152 @@
+"""
+Tabla columnar de respondentes para filtrar y agrupar el análisis grupal.
+
+Las filas calificadas del grupo (``AnalysisService._group_row``) se pasan a
+columnas NumPy:
+
+- columnas categóricas codificadas por diccionario (códigos int32 sobre la lista
+  de valores distintos): ``departamento_area``, ``nombre_cargo`` y ``sexo`` tal
+  como están en la ficha (las usan los filtros), ``area``, ``forma`` y
+  ``grupo_cargo``;
+- una columna int8 de nivel de riesgo (índice en ``NIVELES``, -1 sin dato) por
+  cuestionario, dominio y dimensión calificados.
+
+Un filtro es una máscara booleana: comparar un valor contra las pocas
+categorías distintas y ``np.isin`` sobre los códigos. Los conteos por grupo y
+nivel salen de un ``np.bincount`` sobre códigos combinados, sin recorrer dicts.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .group_aggregates import NIVELES
+
+# Filtros de la API → campo de la ficha de datos generales
+FILTER_FIELDS = {"area": "departamento_area", "cargo": "nombre_cargo", "sexo": "sexo"}
+
+# Columnas por las que se puede agrupar
+GROUP_BY_COLUMNS = ("area", "forma", "grupo_cargo", "departamento_area", "nombre_cargo", "sexo")
+
+NO_LEVEL = -1
+_NIVEL_INDEX = {nivel: i for i, nivel in enumerate(NIVELES)}
+
+# (cuestionario,) · (cuestionario, dominio) · (cuestionario, dominio, dimensión)
+LevelKey = Tuple[str, ...]
+
+
+class CategoricalColumn:
+    """Columna codificada por diccionario: ``codes[i]`` indexa ``categories``."""
+
+    def __init__(self, values: Sequence[str]):
+        index: Dict[str, int] = {}
+        self.codes = np.fromiter(
+            (index.setdefault(v, len(index)) for v in values), dtype=np.int32, count=len(values)
+        )
+        self.categories: List[str] = list(index)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def equals(self, value: str) -> np.ndarray:
+        """Máscara de las filas iguales a ``value`` (sin distinguir mayúsculas)."""
+        wanted = value.lower()
+        matching = [code for code, category in enumerate(self.categories) if category.lower() == wanted]
+        return np.isin(self.codes, matching)
+
+    def counts(self, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        codes = self.codes if mask is None else self.codes[mask]
+        totals = np.bincount(codes, minlength=len(self.categories))
+        return {category: int(n) for category, n in zip(self.categories, totals) if n}
+
+
+def _level_code(result: Dict) -> int:
+    return _NIVEL_INDEX.get(result.get("nivel_riesgo"), NO_LEVEL)
+
+
+def _row_levels(row: Dict) -> Dict[LevelKey, int]:
+    levels: Dict[LevelKey, int] = {}
+    for q_key, q in row["cuestionarios"].items():
+        if "error" in q:
+            continue
+        levels[(q_key,)] = _level_code(q)
+        for dom_name, dom_data in q.get("dominios", {}).items():
+            levels[(q_key, dom_name)] = _level_code(dom_data)
+            for dim_name, dim_data in dom_data.get("dimensiones", {}).items():
+                levels[(q_key, dom_name, dim_name)] = _level_code(dim_data)
+    return levels
+
+
+class RespondentTable:
+    """Filas del análisis grupal en columnas, para máscaras y conteos vectorizados."""
+
+    def __init__(self, rows: Iterable[Dict]):
+        self.rows: List[Dict] = list(rows)
+        n = len(self.rows)
+        self.cedulas = np.array([row["cedula"] for row in self.rows], dtype=object)
+
+        def ficha(field: str) -> CategoricalColumn:
+            return CategoricalColumn([str(row["meta"].get(field) or "") for row in self.rows])
+
+        self.columns: Dict[str, CategoricalColumn] = {field: ficha(field) for field in FILTER_FIELDS.values()}
+        self.columns["area"] = CategoricalColumn([row["area"] for row in self.rows])
+        self.columns["forma"] = CategoricalColumn([row["forma"] for row in self.rows])
+        self.columns["grupo_cargo"] = CategoricalColumn([row.get("grupo_cargo") or "" for row in self.rows])
+
+        self.levels: Dict[LevelKey, np.ndarray] = {}
+        for i, row in enumerate(self.rows):
+            for key, code in _row_levels(row).items():
+                column = self.levels.get(key)
+                if column is None:
+                    column = self.levels[key] = np.full(n, NO_LEVEL, dtype=np.int8)
+                column[i] = code
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # ─── Filtros ───────────────────────────────────────────────
+
+    def mask(self, area: Optional[str] = None, cargo: Optional[str] = None, sexo: Optional[str] = None) -> np.ndarray:
+        """Filas que cumplen los filtros de ``/grupo/resumen`` (vacíos = sin filtro)."""
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in (("area", area), ("cargo", cargo), ("sexo", sexo)):
+            if value:
+                mask &= self.columns[FILTER_FIELDS[name]].equals(value)
+        return mask
+
+    def select(self, mask: np.ndarray) -> List[Dict]:
+        """Filas de la máscara, en el orden de la tabla."""
+        rows = self.rows
+        return [rows[i] for i in np.flatnonzero(mask)]
+
+    # ─── Agrupaciones ──────────────────────────────────────────
+
+    def counts(self, column: str, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        return self.columns[column].counts(mask)
+
+    def level_counts(
+        self, key: LevelKey, by: Optional[str] = None, mask: Optional[np.ndarray] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Respondentes por nivel de riesgo del indicador ``key``, por categoría de
+        la columna ``by`` (o ``{"total": ...}``). Solo cuentan quienes tienen
+        ese indicador calificado.
+        """
+        levels = self.levels.get(key)
+        if levels is None:
+            return {}
+        valid = levels != NO_LEVEL
+        if mask is not None:
+            valid &= mask
+        n_levels = len(NIVELES)
+        if by is None:
+            categories, combined = ["total"], levels[valid].astype(np.int64)
+        else:
+            column = self.columns[by]
+            categories = column.categories
+            combined = column.codes[valid].astype(np.int64) * n_levels + levels[valid]
+        table = np.bincount(combined, minlength=len(categories) * n_levels).reshape(len(categories), n_levels)
+        return {
+            category: {nivel: int(n) for nivel, n in zip(NIVELES, counts)}
+            for category, counts in zip(categories, table)
+            if counts.any()
+        }
@@ -1,6 +1,8 @@
 """
 Router FastAPI — Módulo de Análisis Psicosocial
 Todos los endpoints del módulo de análisis se registran aquí.
+La calificación corre en el pool de análisis y la escritura de baremos en el de
+almacenamiento (``services.concurrency``), nunca en el event loop.
 """
 import io
 import os
@@ -12,8 +14,11 @@ from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from services.concurrency import run_analysis, run_storage
+
 from .analysis_service import AnalysisService
 from .report_generator import ReportGenerator
+from .respondent_table import GROUP_BY_COLUMNS
 
 router = APIRouter(prefix="/api/analisis", tags=["Análisis Psicosocial"])
 service = AnalysisService()
@@ -39,7 +44,7 @@ async def get_individual_analysis(cedula: str):
     Incluye todos los cuestionarios completados, dominios, dimensiones y nivel de riesgo.
     """
     try:
-        result = service.analyze_individual(cedula)
+        result = await run_analysis(service.analyze_individual, cedula)
         if not result["cuestionarios"]:
             raise HTTPException(
                 status_code=404,
@@ -66,7 +71,7 @@ async def download_individual_report(cedula: str):
     Genera y descarga el reporte PDF individual del respondente.
     """
     try:
-        analysis = service.analyze_individual(cedula)
+        analysis = await run_analysis(service.analyze_individual, cedula)
         if not analysis["cuestionarios"]:
             raise HTTPException(status_code=404, detail=f"No hay datos para {cedula}")
 
@@ -98,7 +103,8 @@ async def get_group_analysis(
     por cuestionario y filtros opcionales.
     """
     try:
-        result = service.analyze_group(
+        result = await run_analysis(
+            service.analyze_group,
             filtro_area=area,
             filtro_cargo=cargo,
             filtro_sexo=sexo,
@@ -122,7 +128,7 @@ async def get_dimension_ranking(
     Retorna el ranking de las 10 dimensiones con mayor puntaje promedio de riesgo.
     """
     try:
-        group = service.analyze_group(filtro_area=area, filtro_cargo=cargo, filtro_sexo=sexo)
+        group = await run_analysis(service.analyze_group, filtro_area=area, filtro_cargo=cargo, filtro_sexo=sexo)
         return {
             "success": True,
             "data":    group["ranking_dimensiones"],
@@ -142,7 +148,9 @@ async def download_group_report(
     Genera y descarga el reporte PDF grupal.
     """
     try:
-        group_data = service.analyze_group(filtro_area=area, filtro_cargo=cargo, filtro_sexo=sexo)
+        group_data = await run_analysis(
+            service.analyze_group, filtro_area=area, filtro_cargo=cargo, filtro_sexo=sexo
+        )
         pdf_bytes = await report_gen.generate_group_pdf(group_data)
         filename = f"reporte_grupal_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
         return StreamingResponse(
@@ -154,6 +162,40 @@ async def download_group_report(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/grupo/distribucion")
+async def get_level_distribution(
+    cuestionario: str = Query(..., description="intralaboral, extralaboral o estres"),
+    dominio:      Optional[str] = Query(None),
+    dimension:    Optional[str] = Query(None, description="Requiere dominio"),
+    por:          Optional[str] = Query(None, description=f"Agrupar por: {', '.join(GROUP_BY_COLUMNS)}"),
+    area:         Optional[str] = Query(None),
+    cargo:        Optional[str] = Query(None),
+    sexo:         Optional[str] = Query(None),
+):
+    """
+    Respondentes por nivel de riesgo de un cuestionario, dominio o dimensión,
+    agrupados por una columna y con los filtros de ``/grupo/resumen``.
+    """
+    if por is not None and por not in GROUP_BY_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Columna no válida: {por}. Opciones: {', '.join(GROUP_BY_COLUMNS)}")
+    if dimension and not dominio:
+        raise HTTPException(status_code=400, detail="La dimensión requiere el dominio")
+    indicador = tuple(k for k in (cuestionario, dominio, dimension) if k)
+    try:
+        data = await run_analysis(
+            service.level_distribution, indicador, por,
+            filtro_area=area, filtro_cargo=cargo, filtro_sexo=sexo,
+        )
+        return {
+            "success": True,
+            "data": data,
+            "meta": {"indicador": list(indicador), "por": por,
+                     "filtros": {"area": area, "cargo": cargo, "sexo": sexo}},
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ──────────────────────────────────────────────────────────────
 # BAREMOS
 # ──────────────────────────────────────────────────────────────
@@ -171,7 +213,7 @@ async def update_baremos(body: BaremosUpdate):
     Persiste los cambios a baremos.json.
     """
     try:
-        result = service.update_baremos(body.baremos)
+        result = await run_storage(service.update_baremos, body.baremos)
         return {"success": True, "data": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -180,5 +222,5 @@ async def update_baremos(body: BaremosUpdate):
 @router.post("/baremos/recargar")
 async def reload_baremos():
     """Recarga los baremos desde el archivo JSON sin reiniciar."""
-    result = service.reload_baremos()
+    result = await run_storage(service.reload_baremos)
     return {"success": True, "data": result}
@@ -0,0 +1,154 @@
+"""
+Caché de resultados calificados del Motor de Calificación Psicosocial.
+
+La calificación de un cuestionario depende solo de sus respuestas, del baremo
+vigente y (en estrés y extralaboral) del grupo de tipo de cargo. La llave es:
+
+    (cuestionario, hash_respuestas, huella del baremo, grupo de tipo de cargo)
+
+- Nivel 1: LRU en memoria (``SCORE_CACHE_SIZE`` entradas, 0 la desactiva).
+- Nivel 2 (opcional): SQLite en disco si se define ``SCORE_CACHE_DB``; sobrevive
+  reinicios y se comparte entre workers.
+
+La huella del baremo es un hash de su contenido, no solo de ``version``, de modo
+que editar una tabla sin cambiar la versión también invalida los resultados.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+SCORE_CACHE_SIZE = int(os.getenv("SCORE_CACHE_SIZE", "4096"))
+SCORE_CACHE_DB = os.getenv("SCORE_CACHE_DB") or None
+
+CacheKey = Tuple[str, str, str, str]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS score_cache (
+    cuestionario TEXT NOT NULL,
+    hash         TEXT NOT NULL,
+    baremos      TEXT NOT NULL,
+    grupo        TEXT NOT NULL,
+    resultado    TEXT NOT NULL,
+    PRIMARY KEY (cuestionario, hash, baremos, grupo)
+);
+"""
+
+
+def baremos_fingerprint(baremos: Dict) -> str:
+    """Huella estable del contenido de los baremos."""
+    data_str = json.dumps(baremos, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data_str.encode()).hexdigest()[:16]
+
+
+class ScoreCache:
+    """LRU en memoria con respaldo opcional en SQLite.
+
+    En memoria se guardan los dicts tal cual (solo el nivel SQLite los
+    serializa en JSON): un acierto devuelve el mismo objeto a todos los
+    llamadores, así que quien necesite modificarlo debe copiarlo antes.
+    """
+
+    def __init__(self, max_entries: int = SCORE_CACHE_SIZE, db_path: Optional[str] = SCORE_CACHE_DB):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            conn.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or bool(self.db_path)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ─── Lectura / escritura ───────────────────────────────────
+
+    def get(self, key: CacheKey) -> Optional[Dict]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+        if result is None and self.db_path:
+            result = self._db_get(key)
+            if result is not None:
+                self._remember(key, result)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return result
+
+    def put(self, key: CacheKey, result: Dict):
+        self._remember(key, result)
+        if self.db_path:
+            self._db_put(key, result)
+
+    def _remember(self, key: CacheKey, result: Dict):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _db_get(self, key: CacheKey) -> Optional[Dict]:
+        try:
+            row = self._conn().execute(
+                "SELECT resultado FROM score_cache WHERE cuestionario = ? AND hash = ? AND baremos = ? AND grupo = ?",
+                key,
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading score cache: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _db_put(self, key: CacheKey, result: Dict):
+        payload = json.dumps(result, ensure_ascii=False)
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO score_cache (cuestionario, hash, baremos, grupo, resultado) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (*key, payload),
+                )
+        except sqlite3.Error as e:
+            print(f"Error writing score cache: {e}")
+
+    # ─── Invalidación ──────────────────────────────────────────
+
+    def invalidate(self, current_fingerprint: Optional[str] = None):
+        """Descarta los resultados calculados con baremos distintos al vigente."""
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            conn = self._conn()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM score_cache WHERE baremos != ?", (current_fingerprint or "",))
+            except sqlite3.Error as e:
+                print(f"Error clearing score cache: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entradas": len(self._entries), "aciertos": self.hits, "fallos": self.misses}
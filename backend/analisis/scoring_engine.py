@@ -5,10 +5,15 @@ Implementa la calificación oficial de la Batería de Riesgo Psicosocial - MinTr
 import json
 import os
 import hashlib
+import functools
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from decimal import Decimal, ROUND_HALF_UP
 
+from . import scoring_plan
+from .score_cache import ScoreCache, baremos_fingerprint
+from .scoring_plan import RiskTable, classify_tenths, compile_risk_table, is_exact_tenths, lookup_grade, to_tenths
+
 # ──────────────────────────────────────────────────────────────
 # Configuración de ítems inversos por cuestionario
 # ──────────────────────────────────────────────────────────────
@@ -137,6 +142,14 @@ ESTRES_DIVISOR = 61.16  # Máximo teórico del instrumento (tercera versión)
 # Ítems del bloque 1 (se suman directamente sin ponderación)
 ESTRES_BLOQUE1 = {1, 2, 3, 4, 5, 6, 7, 8}
 
+# Pasos a-d del Manual de Estrés: (ítems, multiplicador del promedio)
+ESTRES_PASOS = (
+    (tuple(sorted(ESTRES_BLOQUE1)), 4),
+    ((9, 10, 11, 12), 3),
+    (tuple(range(13, 23)), 2),
+    (tuple(range(23, 32)), None),
+)
+
 
 def _classify_tipo_cargo(tipo_cargo: Optional[str]) -> str:
     """Clasifica el tipo de cargo en uno de los dos grupos del baremo."""
@@ -148,14 +161,46 @@ def _classify_tipo_cargo(tipo_cargo: Optional[str]) -> str:
     return "auxiliares_operativos"
 
 
+def _cached_score(cuestionario: str, por_tipo_cargo: bool):
+    """
+    Reutiliza resultados ya calculados (ver ``score_cache``). La llave incluye el
+    grupo de tipo de cargo solo en los cuestionarios cuyo baremo depende de él.
+    El hash de las respuestas se calcula una vez y el calificador lo reutiliza
+    como ``hash_respuestas``.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, responses: List[Dict], tipo_cargo: Optional[str] = None) -> Dict:
+            if not self.cache.enabled:
+                return method(self, responses, tipo_cargo)
+            try:
+                respuestas_hash = self._compute_hash(responses)
+            except (KeyError, TypeError):
+                # Respuestas sin question_id comparable: calificar sin caché
+                return method(self, responses, tipo_cargo)
+            grupo = _classify_tipo_cargo(tipo_cargo) if por_tipo_cargo else ""
+            key = (cuestionario, respuestas_hash, self.baremos_fingerprint, grupo)
+            result = self.cache.get(key)
+            if result is None:
+                result = method(self, responses, tipo_cargo, respuestas_hash)
+                self.cache.put(key, result)
+            return result
+        return wrapper
+    return decorator
+
+
 class PsychosocialScoringEngine:
     """Motor de calificación oficial para la Batería de Riesgo Psicosocial."""
 
-    def __init__(self, baremos_path: Optional[str] = None):
+    def __init__(self, baremos_path: Optional[str] = None, cache: Optional[ScoreCache] = None):
         if baremos_path is None:
             baremos_path = os.path.join(os.path.dirname(__file__), "baremos.json")
         self.baremos_path = baremos_path
         self._baremos: Optional[Dict] = None
+        self._baremos_fingerprint: Optional[str] = None
+        self._plans: Dict[Any, Any] = {}
+        self._risk_tables: Dict[int, Any] = {}
+        self.cache = cache if cache is not None else ScoreCache()
 
     # ─── Baremos ───────────────────────────────────────────────
 
@@ -166,9 +211,25 @@ class PsychosocialScoringEngine:
             self._reload_baremos()
         return self._baremos
 
+    @property
+    def baremos_fingerprint(self) -> str:
+        """Huella del contenido de los baremos vigentes (llave de la caché)."""
+        if self._baremos is None:
+            self._reload_baremos()
+        return self._baremos_fingerprint
+
     def _reload_baremos(self):
         with open(self.baremos_path, "r", encoding="utf-8") as f:
-            self._baremos = json.load(f)
+            self._set_baremos(json.load(f))
+
+    def _set_baremos(self, baremos: Dict):
+        fingerprint = baremos_fingerprint(baremos)
+        if fingerprint != self._baremos_fingerprint:
+            self.cache.invalidate(fingerprint)
+            self._plans = {}
+            self._risk_tables = {}
+        self._baremos = baremos
+        self._baremos_fingerprint = fingerprint
 
     def reload_baremos(self) -> Dict:
         """Fuerza recarga de baremos sin reiniciar el servicio."""
@@ -179,13 +240,36 @@ class PsychosocialScoringEngine:
         """Actualiza los baremos en memoria y persiste a disco."""
         with open(self.baremos_path, "w", encoding="utf-8") as f:
             json.dump(new_baremos, f, ensure_ascii=False, indent=2)
-        self._baremos = new_baremos
+        self._set_baremos(new_baremos)
         return {"version": new_baremos.get("version"), "updated_at": datetime.now().isoformat()}
 
     # ─── Clasificación de riesgo ───────────────────────────────
 
     def classify_risk(self, score: float, table: Dict) -> str:
         """Clasifica un puntaje transformado usando la tabla de baremo dada."""
+        return self._classify_compiled(score, self._risk_table(table))
+
+    def _risk_table(self, table: Dict) -> RiskTable:
+        """Tabla compilada a décimas, cacheada por identidad de la tabla."""
+        entry = self._risk_tables.get(id(table))
+        if entry is None or entry[0] is not table:
+            if len(self._risk_tables) > 1024:
+                self._risk_tables = {}
+            # Se guarda la tabla para que su id no pueda reutilizarse
+            entry = self._risk_tables[id(table)] = (table, compile_risk_table(table))
+        return entry[1]
+
+    def _classify_compiled(self, score: float, risk: RiskTable) -> str:
+        """``classify_risk`` sobre una tabla precompilada: redondeo a décimas y comparación entera."""
+        t = to_tenths(score)
+        if t is None:
+            return "Muy Alto"
+        if not is_exact_tenths(t):
+            return self._classify_risk_decimal(score, risk.table)
+        return classify_tenths(t, risk)
+
+    def _classify_risk_decimal(self, score: float, table: Dict) -> str:
+        """Clasificación por Decimal (puntajes fuera del rango exacto en décimas)."""
         for level, value in table.items():
             # Skip non-range entries like 'factor_transformacion'
             if not isinstance(value, (list, tuple)) or len(value) != 2:
@@ -196,6 +280,32 @@ class PsychosocialScoringEngine:
                 return level
         return "Muy Alto"
 
+    def _grade(self, raw: float, max_raw: float, risk: RiskTable):
+        """(puntaje transformado, nivel) de un puntaje bruto."""
+        score = self._transformed_score(raw, max_raw)
+        return score, self._classify_compiled(score, risk)
+
+    # ─── Planes de calificación ────────────────────────────────
+
+    def _plan(self, key: str, grupo: Optional[str] = None):
+        """Plan precompilado del cuestionario con los baremos vigentes."""
+        plan = self._plans.get((key, grupo))
+        if plan is None:
+            baremos = self.baremos
+            if key == "intralaboral_a":
+                plan = scoring_plan.compile_intralaboral(
+                    key, INTRA_A_STRUCTURE, INVERSE_ITEMS[key], baremos, self._grade)
+            elif key == "intralaboral_b":
+                plan = scoring_plan.compile_intralaboral(
+                    key, INTRA_B_STRUCTURE, INVERSE_ITEMS[key], baremos, self._grade)
+            elif key == "extralaboral":
+                plan = scoring_plan.compile_extralaboral(
+                    EXTRALABORAL_STRUCTURE, EXTRALABORAL_TOTAL_FACTOR, grupo, baremos, self._grade)
+            else:
+                plan = scoring_plan.compile_estres(ESTRES_GRUPOS, ESTRES_PASOS, grupo, baremos)
+            self._plans[(key, grupo)] = plan
+        return plan
+
     def _get_risk_color(self, level: str) -> str:
         colors = {
             "Sin Riesgo": "#27ae60",
@@ -232,7 +342,12 @@ class PsychosocialScoringEngine:
                 # Intentar convertir a int si es posible para el motor de calificación
                 qid_raw = r["question_id"]
                 val_raw = r["response_value"]
-                
+
+                # Caso común (respuestas Likert ya numéricas): mismo resultado que abajo
+                if type(qid_raw) is int and type(val_raw) is int:
+                    result[qid_raw] = val_raw
+                    continue
+
                 # Si ambos son numéricos, los guardamos como int
                 if str(qid_raw).isdigit() and str(val_raw).isdigit():
                     result[int(qid_raw)] = int(val_raw)
@@ -244,201 +359,124 @@ class PsychosocialScoringEngine:
         return result
 
     def _compute_hash(self, responses: List[Dict]) -> str:
-        """Hash SHA256 del conjunto de respuestas para trazabilidad."""
-        data_str = json.dumps(sorted(responses, key=lambda r: r["question_id"]), ensure_ascii=False)
-        return hashlib.sha256(data_str.encode()).hexdigest()[:16]
+        """Hash SHA256 de los pares (pregunta, valor) ordenados, para trazabilidad y la caché."""
+        pairs = sorted((r["question_id"], r["response_value"]) for r in responses)
+        return hashlib.sha256(repr(pairs).encode()).hexdigest()[:16]
 
     # ─── Scorer: Intralaboral A ────────────────────────────────
 
-    def score_intralaboral_a(self, responses: List[Dict], tipo_cargo: Optional[str] = None) -> Dict:
+    @_cached_score("intralaboral_a", por_tipo_cargo=False)
+    def score_intralaboral_a(
+        self, responses: List[Dict], tipo_cargo: Optional[str] = None, respuestas_hash: Optional[str] = None
+    ) -> Dict:
         """Califica el Cuestionario Intralaboral Forma A (123 ítems)."""
-        resp_dict = self._responses_to_dict(responses)
-        cuestionario = "intralaboral_a"
-        baremo_total = self.baremos["intralaboral_a"]["total"]
-        baremo_dominios = self.baremos["intralaboral_a"]["dominios"]
-        baremo_dims = self.baremos["intralaboral_a"]["dimensiones"]
-
-        # Puntaje total
-        total_raw = 0
-        total_max = 0
-        dominios_result = {}
-        dimensiones_result = {}
-
-        for dominio, dims in INTRA_A_STRUCTURE.items():
-            dom_raw = 0
-            dom_max = 0
-            dims_calc = {}
-
-            for dim_name, items in dims.items():
-                dim_raw = 0
-                dim_max = len(items) * 4
-                for q in items:
-                    if q in resp_dict:
-                        dim_raw += self._score_item(q, resp_dict[q], cuestionario)
-
-                dim_score = self._transformed_score(dim_raw, dim_max)
-                baremo_dim = baremo_dims.get(dim_name, baremo_total)
-                nivel = self.classify_risk(dim_score, baremo_dim)
-
-                dims_calc[dim_name] = {
-                    "puntaje_bruto":       round(dim_raw, 2),
-                    "puntaje_maximo":      dim_max,
-                    "puntaje_transformado": dim_score,
-                    "nivel_riesgo":        nivel,
-                    "color":               self._get_risk_color(nivel),
-                }
-                dom_raw += dim_raw
-                dom_max += dim_max
-
-            dom_score = self._transformed_score(dom_raw, dom_max)
-            baremo_dom = baremo_dominios.get(dominio, baremo_total)
-            dom_nivel = self.classify_risk(dom_score, baremo_dom)
-
-            dominios_result[dominio] = {
-                "puntaje_bruto":       round(dom_raw, 2),
-                "puntaje_maximo":      dom_max,
-                "puntaje_transformado": dom_score,
-                "nivel_riesgo":        dom_nivel,
-                "color":               self._get_risk_color(dom_nivel),
-                "dimensiones":         dims_calc,
-            }
-            dimensiones_result.update(dims_calc)
-            total_raw += dom_raw
-            total_max += dom_max
-
-        total_score = self._transformed_score(total_raw, total_max)
-        total_nivel = self.classify_risk(total_score, baremo_total)
-
-        return {
-            "cuestionario":           "intralaborales-a",
-            "forma":                  "A",
-            "puntaje_bruto_total":    round(total_raw, 2),
-            "puntaje_maximo_total":   total_max,
-            "puntaje_transformado":   total_score,
-            "nivel_riesgo":           total_nivel,
-            "color":                  self._get_risk_color(total_nivel),
-            "dominios":               dominios_result,
-            "hash_respuestas":        self._compute_hash(responses),
-            "version_baremos":        self.baremos.get("version"),
-        }
+        return self._score_intralaboral(self._plan("intralaboral_a"), responses, respuestas_hash)
 
     # ─── Scorer: Intralaboral B ────────────────────────────────
 
-    def score_intralaboral_b(self, responses: List[Dict], tipo_cargo: Optional[str] = None) -> Dict:
+    @_cached_score("intralaboral_b", por_tipo_cargo=False)
+    def score_intralaboral_b(
+        self, responses: List[Dict], tipo_cargo: Optional[str] = None, respuestas_hash: Optional[str] = None
+    ) -> Dict:
         """Califica el Cuestionario Intralaboral Forma B (97 ítems)."""
+        return self._score_intralaboral(self._plan("intralaboral_b"), responses, respuestas_hash)
+
+    def _score_intralaboral(self, plan, responses: List[Dict], respuestas_hash: Optional[str] = None) -> Dict:
+        """Ejecuta un plan intralaboral (Forma A o B) sobre las respuestas."""
         resp_dict = self._responses_to_dict(responses)
-        cuestionario = "intralaboral_b"
-        baremo_total = self.baremos["intralaboral_b"]["total"]
-        baremo_dominios = self.baremos["intralaboral_b"]["dominios"]
-        baremo_dims = self.baremos["intralaboral_b"]["dimensiones"]
 
         total_raw = 0
-        total_max = 0
         dominios_result = {}
 
-        for dominio, dims in INTRA_B_STRUCTURE.items():
+        for dom in plan.domains:
             dom_raw = 0
-            dom_max = 0
             dims_calc = {}
 
-            for dim_name, items in dims.items():
+            for dim in dom.dimensions:
                 dim_raw = 0
-                dim_max = len(items) * 4
-                for q in items:
+                for q, scale, inverse in dim.items:
                     if q in resp_dict:
-                        dim_raw += self._score_item(q, resp_dict[q], cuestionario)
-
-                dim_score = self._transformed_score(dim_raw, dim_max)
-                baremo_dim = baremo_dims.get(dim_name, baremo_total)
-                nivel = self.classify_risk(dim_score, baremo_dim)
-
-                dims_calc[dim_name] = {
+                        v = resp_dict[q]
+                        if 0 <= v <= 5:
+                            dim_raw += scale[v]
+                        else:
+                            dim_raw += v - 1 if inverse else 5 - v
+
+                dim_score, nivel = lookup_grade(dim_raw, dim.max, dim.risk, dim.grades, self._grade)
+                dims_calc[dim.name] = {
                     "puntaje_bruto":       round(dim_raw, 2),
-                    "puntaje_maximo":      dim_max,
+                    "puntaje_maximo":      dim.max,
                     "puntaje_transformado": dim_score,
                     "nivel_riesgo":        nivel,
                     "color":               self._get_risk_color(nivel),
                 }
                 dom_raw += dim_raw
-                dom_max += dim_max
-
-            dom_score = self._transformed_score(dom_raw, dom_max)
-            baremo_dom = baremo_dominios.get(dominio, baremo_total)
-            dom_nivel = self.classify_risk(dom_score, baremo_dom)
 
-            dominios_result[dominio] = {
+            dom_score, dom_nivel = lookup_grade(dom_raw, dom.max, dom.risk, dom.grades, self._grade)
+            dominios_result[dom.name] = {
                 "puntaje_bruto":       round(dom_raw, 2),
-                "puntaje_maximo":      dom_max,
+                "puntaje_maximo":      dom.max,
                 "puntaje_transformado": dom_score,
                 "nivel_riesgo":        dom_nivel,
                 "color":               self._get_risk_color(dom_nivel),
                 "dimensiones":         dims_calc,
             }
             total_raw += dom_raw
-            total_max += dom_max
 
-        total_score = self._transformed_score(total_raw, total_max)
-        total_nivel = self.classify_risk(total_score, baremo_total)
+        total_score, total_nivel = lookup_grade(total_raw, plan.max, plan.risk, plan.grades, self._grade)
 
         return {
-            "cuestionario":           "intralaborales-b",
-            "forma":                  "B",
+            "cuestionario":           plan.cuestionario,
+            "forma":                  plan.forma,
             "puntaje_bruto_total":    round(total_raw, 2),
-            "puntaje_maximo_total":   total_max,
+            "puntaje_maximo_total":   plan.max,
             "puntaje_transformado":   total_score,
             "nivel_riesgo":           total_nivel,
             "color":                  self._get_risk_color(total_nivel),
             "dominios":               dominios_result,
-            "hash_respuestas":        self._compute_hash(responses),
+            "hash_respuestas":        respuestas_hash or self._compute_hash(responses),
             "version_baremos":        self.baremos.get("version"),
         }
 
     # ─── Scorer: Extralaboral ──────────────────────────────────
 
-    def score_extralaboral(self, responses: List[Dict], tipo_cargo: Optional[str] = None) -> Dict:
+    @_cached_score("extralaboral", por_tipo_cargo=True)
+    def score_extralaboral(
+        self, responses: List[Dict], tipo_cargo: Optional[str] = None, respuestas_hash: Optional[str] = None
+    ) -> Dict:
         """Califica el Cuestionario Extralaboral (31 ítems, 7 dimensiones)."""
         resp_dict = self._responses_to_dict(responses)
         tipo_grupo = _classify_tipo_cargo(tipo_cargo)
-        baremo = self.baremos["extralaboral"][tipo_grupo]
-        baremo_total = baremo["total"]
-        baremo_dims = baremo["dimensiones"]
+        plan = self._plan("extralaboral", tipo_grupo)
 
         total_raw = 0
         dimensiones_result = {}
         missing_dims = []
 
-        for dim_name, config in EXTRALABORAL_STRUCTURE.items():
-            items = config["items"]
-            factor = config["factor"]
-            escala = config["escala"]
-
+        for dim in plan.dimensions:
             dim_raw = 0
             answered = 0
 
-            for q in items:
+            for q, scale, inverse in dim.items:
                 if q in resp_dict:
                     raw_val = resp_dict[q]
-                    if escala == "inversa":
-                        # Inversa: Siempre(1)=4, CasiSiempre(2)=3, Aveces(3)=2, CasiNunca(4)=1, Nunca(5)=0
-                        pts = raw_val - 1
+                    if 0 <= raw_val <= 5:
+                        dim_raw += scale[raw_val]
                     else:
-                        # Directa: Siempre(1)=0 ... Nunca(5)=4
-                        pts = 5 - raw_val
-                    pts = max(0, min(4, pts))
-                    dim_raw += pts
+                        # Inversa: Siempre(1)=4 … Nunca(5)=0; Directa: Siempre(1)=0 … Nunca(5)=4
+                        pts = raw_val - 1 if inverse else 5 - raw_val
+                        dim_raw += max(0, min(4, pts))
                     answered += 1
 
             if answered == 0:
-                missing_dims.append(dim_name)
+                missing_dims.append(dim.name)
                 continue
 
-            dim_score = self._transformed_score(dim_raw, factor)
-            baremo_dim = baremo_dims.get(dim_name, baremo_total)
-            nivel = self.classify_risk(dim_score, baremo_dim)
+            dim_score, nivel = lookup_grade(dim_raw, dim.max, dim.risk, dim.grades, self._grade)
 
-            dimensiones_result[dim_name] = {
+            dimensiones_result[dim.name] = {
                 "puntaje_bruto":       round(dim_raw, 2),
-                "factor_transformacion": factor,
+                "factor_transformacion": dim.max,
                 "puntaje_transformado": dim_score,
                 "nivel_riesgo":        nivel,
                 "color":               self._get_risk_color(nivel),
@@ -456,8 +494,7 @@ class PsychosocialScoringEngine:
                 "version_baremos": self.baremos.get("version"),
             }
 
-        total_score = self._transformed_score(total_raw, EXTRALABORAL_TOTAL_FACTOR)
-        total_nivel = self.classify_risk(total_score, baremo_total)
+        total_score, total_nivel = lookup_grade(total_raw, plan.max, plan.risk, plan.grades, self._grade)
 
         return {
             "cuestionario":           "extralaborales",
@@ -469,71 +506,45 @@ class PsychosocialScoringEngine:
             "nivel_riesgo":           total_nivel,
             "color":                  self._get_risk_color(total_nivel),
             "dimensiones":            dimensiones_result,
-            "hash_respuestas":        self._compute_hash(responses),
+            "hash_respuestas":        respuestas_hash or self._compute_hash(responses),
             "version_baremos":        self.baremos.get("version"),
         }
 
     # ─── Scorer: Estrés ────────────────────────────────────────
 
-    def score_estres(self, responses: List[Dict], tipo_cargo: Optional[str] = None) -> Dict:
+    @_cached_score("estres", por_tipo_cargo=True)
+    def score_estres(
+        self, responses: List[Dict], tipo_cargo: Optional[str] = None, respuestas_hash: Optional[str] = None
+    ) -> Dict:
         """
         Califica el Cuestionario de Estrés (31 ítems).
         Usa 3 grupos de escala distintos y ponderaciones especiales en los pasos b, c, d.
         """
         resp_dict = self._responses_to_dict(responses)
         tipo_grupo = _classify_tipo_cargo(tipo_cargo)
-        baremo = self.baremos["estres"][tipo_grupo]
+        plan = self._plan("estres", tipo_grupo)
 
         # Paso a: ítems 1–8 → promedio × 4  (Manual Estrés, Paso 2a)
-        paso_a_vals = []
-        for q in sorted(ESTRES_BLOQUE1):  # {1,2,3,4,5,6,7,8}
-            if q in resp_dict:
-                for grupo_name, grupo_cfg in ESTRES_GRUPOS.items():
-                    if q in grupo_cfg["items"]:
-                        raw_val = resp_dict[q]
-                        paso_a_vals.append(grupo_cfg["escala"].get(raw_val, 0))
-                        break
-        paso_a = (sum(paso_a_vals) / len(paso_a_vals) * 4) if paso_a_vals else 0
-
         # Paso b: ítems 9–12 → promedio × 3
-        paso_b_vals = []
-        for q in [9, 10, 11, 12]:
-            if q in resp_dict:
-                for grupo_name, grupo_cfg in ESTRES_GRUPOS.items():
-                    if q in grupo_cfg["items"]:
-                        raw_val = resp_dict[q]
-                        paso_b_vals.append(grupo_cfg["escala"].get(raw_val, 0))
-                        break
-        paso_b = (sum(paso_b_vals) / len(paso_b_vals) * 3) if paso_b_vals else 0
-
         # Paso c: ítems 13–22 → promedio × 2
-        paso_c_vals = []
-        for q in range(13, 23):
-            if q in resp_dict:
-                for grupo_name, grupo_cfg in ESTRES_GRUPOS.items():
-                    if q in grupo_cfg["items"]:
-                        raw_val = resp_dict[q]
-                        paso_c_vals.append(grupo_cfg["escala"].get(raw_val, 0))
-                        break
-        paso_c = (sum(paso_c_vals) / len(paso_c_vals) * 2) if paso_c_vals else 0
-
         # Paso d: ítems 23–31 → promedio (× 1)
-        paso_d_vals = []
-        for q in range(23, 32):
-            if q in resp_dict:
-                for grupo_name, grupo_cfg in ESTRES_GRUPOS.items():
-                    if q in grupo_cfg["items"]:
-                        raw_val = resp_dict[q]
-                        paso_d_vals.append(grupo_cfg["escala"].get(raw_val, 0))
-                        break
-        paso_d = (sum(paso_d_vals) / len(paso_d_vals)) if paso_d_vals else 0
+        pasos = []
+        for items, factor in plan.pasos:
+            vals = [escala.get(resp_dict[q], 0) for q, escala in items if q in resp_dict]
+            if not vals:
+                pasos.append(0)
+            elif factor is None:
+                pasos.append(sum(vals) / len(vals))
+            else:
+                pasos.append(sum(vals) / len(vals) * factor)
+        paso_a, paso_b, paso_c, paso_d = pasos
 
         puntaje_bruto = paso_a + paso_b + paso_c + paso_d
         val_str = str((puntaje_bruto / ESTRES_DIVISOR) * 100)
         puntaje_transformado = float(Decimal(val_str).quantize(Decimal('.1'), rounding=ROUND_HALF_UP))
         puntaje_transformado = max(0.0, min(100.0, puntaje_transformado))
 
-        nivel = self.classify_risk(puntaje_transformado, baremo)
+        nivel = self._classify_compiled(puntaje_transformado, plan.risk)
 
         return {
             "cuestionario":           "estres",
@@ -548,10 +559,20 @@ class PsychosocialScoringEngine:
             "puntaje_transformado":   puntaje_transformado,
             "nivel_riesgo":           nivel,
             "color":                  self._get_risk_color(nivel),
-            "hash_respuestas":        self._compute_hash(responses),
+            "hash_respuestas":        respuestas_hash or self._compute_hash(responses),
             "version_baremos":        self.baremos.get("version"),
         }
 
+    # ─── Calificación por lotes ────────────────────────────────
+
+    def score_batch(self, cuestionario: str, responses_matrix, tipo_cargo_groups=None):
+        """
+        Califica N respondentes a la vez con NumPy (ver ``analisis.batch_scoring``).
+        Devuelve un ``BatchScores``; ``.results()`` da los mismos dicts que ``score_*``.
+        """
+        from .batch_scoring import score_batch
+        return score_batch(cuestionario, responses_matrix, tipo_cargo_groups, baremos=self.baremos)
+
     # ─── Total General (Intra + Extra) ────────────────────────
 
     def compute_total_general(
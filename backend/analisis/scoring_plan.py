@@ -0,0 +1,243 @@
+"""
+Planes de calificación precompilados.
+
+Cada cuestionario (y grupo de tipo de cargo, cuando el baremo depende de él) se
+compila una sola vez en un plan inmutable: tuplas planas de ítems por
+dimensión con su tabla de puntos por valor crudo, máximos precalculados y las
+tablas de baremo ya resueltas por nombre como puntos de corte ordenados.
+
+Como los puntajes brutos de dimensiones, dominios y totales son enteros entre
+0 y el máximo, el plan guarda además ``grades``: (puntaje transformado, nivel)
+para cada puntaje bruto posible. Calificar un respondente se reduce a sumar
+puntos y consultar tablas.
+
+``PsychosocialScoringEngine`` ejecuta el plan en lugar de recorrer las
+estructuras y buscar baremos en cada respondente; los planes se descartan
+cuando cambian los baremos.
+
+Clasificación en décimas enteras
+--------------------------------
+``classify_risk`` redondea el puntaje a una décima (ROUND_HALF_UP sobre su
+texto) y busca el primer rango [lo, hi] que lo contiene. Como el puntaje
+redondeado siempre es t/10 para un entero t, cada rango se precompila como el
+intervalo de enteros [lo_t, hi_t] tal que lo <= t/10 <= hi, y la
+clasificación se reduce a comparar enteros (``to_tenths`` + ``classify_tenths``).
+"""
+import math
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+# Puntos por valor crudo (índice 0-5). Los valores fuera de rango se calculan
+# con la fórmula, como en ``_score_item``.
+DIRECT_SCALE = (5, 4, 3, 2, 1, 0)       # Siempre(1)=4 … Nunca(5)=0
+INVERSE_SCALE = (-1, 0, 1, 2, 3, 4)     # Siempre(1)=0 … Nunca(5)=4
+# Extralaboral recorta a 0-4: todo valor ≥ 5 cae en el último índice
+EXTRA_DIRECT_SCALE = (4, 4, 3, 2, 1, 0)
+EXTRA_INVERSE_SCALE = (0, 0, 1, 2, 3, 4)
+
+
+Bound = Union[int, float]  # décimas enteras, o ±inf si el límite no es finito
+
+
+class RiskTable(NamedTuple):
+    """Tabla de baremo: (lo_t, hi_t, nivel) en décimas, en el orden del JSON."""
+    bounds: Tuple[Tuple[Bound, Bound, str], ...]
+    table: Dict     # tabla original
+
+
+Grade = Tuple[float, str]
+# (puntaje bruto, máximo, tabla) → (puntaje transformado, nivel)
+Grader = Callable[[int, int, RiskTable], Grade]
+
+
+class DimensionPlan(NamedTuple):
+    name: str
+    items: Tuple[Tuple[int, Tuple[int, ...], bool], ...]  # (ítem, puntos por valor crudo, inverso)
+    max: int
+    risk: RiskTable
+    grades: Tuple[Grade, ...]  # índice = puntaje bruto
+
+
+class DomainPlan(NamedTuple):
+    name: str
+    dimensions: Tuple[DimensionPlan, ...]
+    max: int
+    risk: RiskTable
+    grades: Tuple[Grade, ...]
+
+
+class IntraPlan(NamedTuple):
+    cuestionario: str
+    forma: str
+    domains: Tuple[DomainPlan, ...]
+    max: int
+    risk: RiskTable
+    grades: Tuple[Grade, ...]
+
+
+class ExtraPlan(NamedTuple):
+    grupo: str
+    dimensions: Tuple[DimensionPlan, ...]  # ``max`` = factor de transformación
+    max: int
+    risk: RiskTable
+    grades: Tuple[Grade, ...]
+
+
+class EstresPlan(NamedTuple):
+    grupo: str
+    # (ítems del paso con su escala, multiplicador del promedio o None)
+    pasos: Tuple[Tuple[Tuple[Tuple[int, Dict[int, int]], ...], Optional[int]], ...]
+    risk: RiskTable
+
+
+# Por encima de este valor t/10 deja de ser exacto en float
+_MAX_EXACT_TENTHS = 2 ** 52
+
+
+def to_tenths(score) -> Optional[int]:
+    """
+    Décimas enteras de ``Decimal(str(score)).quantize(Decimal('.1'), ROUND_HALF_UP)``.
+    Devuelve None si el puntaje no es un número (NaN).
+    """
+    if type(score) is float or type(score) is int:
+        try:
+            t = round(score * 10)
+        except (OverflowError, ValueError):
+            t = None
+        # Si score ya es el float de t/10, su texto es "t/10" y redondear no lo cambia
+        if t is not None and t / 10 == score:
+            return t
+    quantized = Decimal(str(score)).quantize(Decimal('.1'), rounding=ROUND_HALF_UP)
+    if quantized.is_nan():
+        return None
+    return int(quantized.scaleb(1))
+
+
+def _lower_tenths(lo) -> Optional[Bound]:
+    """Menor t con lo <= t/10 (comparación en float, como ``classify_risk``)."""
+    if lo != lo:
+        return None
+    if math.isinf(lo):
+        return lo
+    t = math.ceil(lo * 10)
+    while (t - 1) / 10 >= lo:
+        t -= 1
+    while t / 10 < lo:
+        t += 1
+    return t
+
+
+def _upper_tenths(hi) -> Optional[Bound]:
+    """Mayor t con t/10 <= hi."""
+    if hi != hi:
+        return None
+    if math.isinf(hi):
+        return hi
+    t = math.floor(hi * 10)
+    while (t + 1) / 10 <= hi:
+        t += 1
+    while t / 10 > hi:
+        t -= 1
+    return t
+
+
+def compile_risk_table(table: Dict) -> RiskTable:
+    bounds = []
+    for level, value in table.items():
+        # Omitir entradas que no son rangos, como 'factor_transformacion'
+        if not isinstance(value, (list, tuple)) or len(value) != 2:
+            continue
+        lo_t, hi_t = _lower_tenths(value[0]), _upper_tenths(value[1])
+        if lo_t is not None and hi_t is not None:
+            bounds.append((lo_t, hi_t, level))
+    return RiskTable(tuple(bounds), table)
+
+
+def classify_tenths(t: int, risk: RiskTable) -> str:
+    """Primer nivel cuyo rango contiene el puntaje ``t`` (en décimas)."""
+    for lo_t, hi_t, level in risk.bounds:
+        if lo_t <= t <= hi_t:
+            return level
+    return "Muy Alto"
+
+
+def is_exact_tenths(t: Optional[int]) -> bool:
+    return t is not None and -_MAX_EXACT_TENTHS < t < _MAX_EXACT_TENTHS
+
+
+def _grades(max_raw: int, risk: RiskTable, grade: Grader) -> Tuple[Grade, ...]:
+    return tuple(grade(raw, max_raw, risk) for raw in range(max_raw + 1))
+
+
+def lookup_grade(raw: int, max_raw: int, risk: RiskTable, grades: Tuple[Grade, ...], grade: Grader) -> Grade:
+    """Calificación precalculada; los brutos fuera de 0..máximo se calculan al vuelo."""
+    if 0 <= raw < len(grades):
+        return grades[raw]
+    return grade(raw, max_raw, risk)
+
+
+def compile_intralaboral(
+    cuestionario: str, structure: Dict, inverse_items, baremos: Dict, grade: Grader
+) -> IntraPlan:
+    baremo = baremos[cuestionario]
+    baremo_total = baremo["total"]
+    domains = []
+    for dominio, dims in structure.items():
+        dim_plans = []
+        for dim_name, items in dims.items():
+            risk = compile_risk_table(baremo["dimensiones"].get(dim_name, baremo_total))
+            dim_max = len(items) * 4
+            dim_plans.append(DimensionPlan(
+                name=dim_name,
+                items=tuple(
+                    (q, INVERSE_SCALE, True) if q in inverse_items else (q, DIRECT_SCALE, False) for q in items
+                ),
+                max=dim_max,
+                risk=risk,
+                grades=_grades(dim_max, risk, grade),
+            ))
+        risk = compile_risk_table(baremo["dominios"].get(dominio, baremo_total))
+        dom_max = sum(d.max for d in dim_plans)
+        domains.append(DomainPlan(dominio, tuple(dim_plans), dom_max, risk, _grades(dom_max, risk, grade)))
+    forma = "A" if cuestionario.endswith("_a") else "B"
+    risk = compile_risk_table(baremo_total)
+    total_max = sum(d.max for d in domains)
+    return IntraPlan(
+        cuestionario=f"intralaborales-{forma.lower()}",
+        forma=forma,
+        domains=tuple(domains),
+        max=total_max,
+        risk=risk,
+        grades=_grades(total_max, risk, grade),
+    )
+
+
+def compile_extralaboral(structure: Dict, total_factor: int, grupo: str, baremos: Dict, grade: Grader) -> ExtraPlan:
+    baremo = baremos["extralaboral"][grupo]
+    dim_plans = []
+    for dim_name, config in structure.items():
+        inverse = config["escala"] == "inversa"
+        risk = compile_risk_table(baremo["dimensiones"].get(dim_name, baremo["total"]))
+        dim_plans.append(DimensionPlan(
+            name=dim_name,
+            items=tuple(
+                (q, EXTRA_INVERSE_SCALE if inverse else EXTRA_DIRECT_SCALE, inverse) for q in config["items"]
+            ),
+            max=config["factor"],
+            risk=risk,
+            grades=_grades(config["factor"], risk, grade),
+        ))
+    risk = compile_risk_table(baremo["total"])
+    return ExtraPlan(grupo, tuple(dim_plans), total_factor, risk, _grades(total_factor, risk, grade))
+
+
+def compile_estres(grupos_escala: Dict, bloques, grupo: str, baremos: Dict) -> EstresPlan:
+    escala_por_item = {}
+    for grupo_cfg in grupos_escala.values():
+        for q in grupo_cfg["items"]:
+            escala_por_item.setdefault(q, grupo_cfg["escala"])
+    pasos = tuple(
+        (tuple((q, escala_por_item[q]) for q in items if q in escala_por_item), factor)
+        for items, factor in bloques
+    )
+    return EstresPlan(grupo=grupo, pasos=pasos, risk=compile_risk_table(baremos["estres"][grupo]))
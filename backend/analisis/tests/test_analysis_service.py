@@ -0,0 +1,301 @@
+"""
+Pruebas del Servicio de Análisis: análisis grupal calculado en una sola pasada,
+agregados grupales incrementales, filtros sobre la tabla columnar de
+respondentes, calificación en paralelo por procesos,
+calificación por lotes de la campaña y forma guardada en la sesión.
+"""
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from analisis.analysis_service import AnalysisService, respondent_routing
+from analisis.parallel_scoring import ParallelGroupScorer, _open_repository, repository_spec
+from storage import sessions as sessions_module
+from storage.repository import JsonRepository
+from storage.sqlite_repository import SqliteRepository
+
+
+def _responses(n_items: int, value: int) -> list:
+    return [{"question_id": i, "response_value": value} for i in range(1, n_items + 1)]
+
+
+@pytest.fixture
+def service(tmp_path):
+    repo = JsonRepository(str(tmp_path))
+    grupo = [
+        ("1", "ti", "si", 1), ("2", "ti", "no", 3), ("3", "ventas", "no", 5), ("4", "ventas", "si", 2),
+    ]
+    for cedula, area, personal, value in grupo:
+        repo.add_form_response("datos-generales", {"id": f"f{cedula}", "data": {
+            "numero_identificacion": cedula, "departamento_area": area, "sexo": "F",
+            "tiene_personal_cargo": personal, "tipo_cargo": "profesional",
+        }})
+        intra_id, n_intra = ("intralaborales-a", 123) if personal == "si" else ("intralaborales-b", 97)
+        for qid, n_items in ((intra_id, n_intra), ("extralaborales", 31), ("estres", 31)):
+            repo.add_response(qid, {
+                "id": f"{qid}-{cedula}", "submitted_at": "2026-01-01T00:00:00",
+                "respondent_cedula": cedula, "responses": _responses(n_items, value),
+            })
+    return AnalysisService(str(tmp_path), repository=repo)
+
+
+def _group(service, **filtros):
+    result = service.analyze_group(**filtros)
+    result.pop("calculado_en")
+    return result
+
+
+def _spy_scoring(service, monkeypatch) -> list:
+    calls = []
+    original = service.analyze_individual
+    monkeypatch.setattr(service, "analyze_individual", lambda c, *args: calls.append(c) or original(c, *args))
+    return calls
+
+
+class TestAnalyzeGroup:
+    def test_scores_each_respondent_once(self, service, monkeypatch):
+        calls = []
+        original = service.analyze_individual
+        monkeypatch.setattr(service, "analyze_individual", lambda c, *args: calls.append(c) or original(c, *args))
+        result = service.analyze_group()
+        assert result["total_respondentes"] == 4
+        assert sorted(calls) == ["1", "2", "3", "4"]
+
+    def test_breakdowns_match_individual_results(self, service):
+        result = service.analyze_group()
+        estres = [service.analyze_individual(c)["cuestionarios"]["estres"] for c in "1234"]
+        assert result["estres_dist"] == service._aggregate_questionnaire(estres)["distribucion_pct"]
+        assert set(result["area_breakdown"]) == {"ti", "ventas"}
+        assert set(result["demands_form_breakdown"]) == {"A", "B"}
+
+    def test_filters_apply_before_scoring(self, service):
+        result = service.analyze_group(filtro_area="Ventas")
+        assert result["total_respondentes"] == 2
+        assert result["demografico"]["area"] == {"ventas": 2}
+
+
+class TestGroupAggregates:
+    def test_unchanged_repository_is_not_rescored(self, service, monkeypatch):
+        service.analyze_group()
+        calls = _spy_scoring(service, monkeypatch)
+        service.analyze_group()
+        assert calls == []
+
+    def test_resubmission_replaces_latest_result(self, service, monkeypatch):
+        service.analyze_group()
+        calls = _spy_scoring(service, monkeypatch)
+        with service.submission("3"):
+            service.repo.add_response("estres", {
+                "id": "estres-3b", "submitted_at": "2026-02-01T00:00:00",
+                "respondent_cedula": "3", "responses": _responses(31, 1),
+            })
+        result = _group(service)
+        assert calls == ["3"]
+        assert result["cuestionarios"]["estres"]["n"] == 4
+        fresh = AnalysisService(service.data_dir, repository=service.repo)
+        assert result == _group(fresh)
+
+    def test_form_resubmission_moves_respondent_between_groups(self, service):
+        service.analyze_group()
+        with service.submission("2"):
+            service.repo.add_form_response("datos-generales", {"id": "f2b", "data": {
+                "numero_identificacion": "2", "departamento_area": "ventas", "sexo": "M",
+                "tiene_personal_cargo": "no", "tipo_cargo": "profesional",
+            }})
+        result = _group(service)
+        assert result["demografico"]["area"] == {"ti": 1, "ventas": 3}
+        assert result["demografico"]["sexo"] == {"F": 3, "M": 1}
+        fresh = AnalysisService(service.data_dir, repository=service.repo)
+        assert result == _group(fresh)
+
+    def test_external_write_triggers_rebuild(self, service, monkeypatch):
+        service.analyze_group()
+        # Otro proceso escribe sin pasar por ``submission``
+        other = JsonRepository(service.data_dir)
+        other.add_response("estres", {
+            "id": "estres-5", "submitted_at": "2026-02-01T00:00:00",
+            "respondent_cedula": "5", "responses": _responses(31, 4),
+        })
+        calls = _spy_scoring(service, monkeypatch)
+        result = _group(service)
+        assert sorted(calls) == ["1", "2", "3", "4", "5"]
+        assert result["total_respondentes"] == 5
+
+    def test_submission_does_not_wait_for_a_rebuild(self, service, monkeypatch):
+        building, release = threading.Event(), threading.Event()
+        original = service._build_group_rows
+
+        def slow_build(cedulas):
+            building.set()
+            release.wait(5)
+            return original(cedulas)
+
+        monkeypatch.setattr(service, "_build_group_rows", slow_build)
+        reader = threading.Thread(target=service.analyze_group)
+        reader.start()
+        assert building.wait(5)
+        done = threading.Event()
+
+        def submit():
+            with service.submission("3"):
+                service.repo.add_response("estres", {
+                    "id": "estres-3b", "submitted_at": "2026-02-01T00:00:00",
+                    "respondent_cedula": "3", "responses": _responses(31, 1),
+                })
+            done.set()
+
+        threading.Thread(target=submit).start()
+        assert done.wait(5)
+        release.set()
+        reader.join(5)
+        calls = _spy_scoring(service, monkeypatch)
+        result = _group(service)
+        assert calls in ([], ["3"])
+        fresh = AnalysisService(service.data_dir, repository=service.repo)
+        assert result == _group(fresh)
+
+    def test_filters_reuse_scored_rows(self, service, monkeypatch):
+        service.analyze_group()
+        calls = _spy_scoring(service, monkeypatch)
+        result = _group(service, filtro_area="ti")
+        assert calls == []
+        assert result["total_respondentes"] == 2
+        assert set(result["leadership_form_breakdown"]) == {"A", "B"}
+
+
+class TestRespondentTable:
+    def test_mask_ignores_case_and_combines_filters(self, service):
+        service.analyze_group()
+        table = service._respondent_table(service._current_group())
+        assert sorted(table.cedulas[table.mask(area="TI")]) == ["1", "2"]
+        assert list(table.cedulas[table.mask(area="ventas", sexo="m")]) == []
+        assert table.mask().all()
+
+    def test_filtered_group_is_cached_until_a_submission(self, service):
+        first = _group(service, filtro_area="ventas")
+        again = _group(service, filtro_area="VENTAS")
+        assert again.pop("filtros") != first.pop("filtros")
+        assert again == first
+        assert len(service._filtered) == 1
+        with service.submission("2"):
+            service.repo.add_form_response("datos-generales", {"id": "f2b", "data": {
+                "numero_identificacion": "2", "departamento_area": "ventas", "sexo": "F",
+                "tiene_personal_cargo": "no", "tipo_cargo": "profesional",
+            }})
+        result = _group(service, filtro_area="ventas")
+        assert result["total_respondentes"] == 3
+        fresh = AnalysisService(service.data_dir, repository=service.repo)
+        assert result == _group(fresh, filtro_area="ventas")
+
+    def test_level_distribution_matches_individual_levels(self, service):
+        expected = {}
+        for cedula, area in zip("1234", ("ti", "ti", "ventas", "ventas")):
+            nivel = service.analyze_individual(cedula)["cuestionarios"]["estres"]["nivel_riesgo"]
+            expected.setdefault(area, {}).setdefault(nivel, 0)
+            expected[area][nivel] += 1
+        result = service.level_distribution(("estres",), por="area")
+        assert {area: {n: c for n, c in counts.items() if c} for area, counts in result.items()} == expected
+        total = service.level_distribution(("estres",), filtro_area="ti")
+        assert sum(total["total"].values()) == 2
+        assert service.level_distribution(("estres", "no existe")) == {}
+
+
+class TestParallelScoring:
+    def test_process_pool_matches_serial(self, service):
+        service.repo.save_session({
+            "cedula": "2", "completed_forms": [], "forma": "A", "tipo_cargo_grupo": "auxiliares_operativos",
+        })
+        cedulas = ["1", "2", "3", "4"]
+        serial = service._build_group_rows(cedulas)
+        scorer = ParallelGroupScorer(workers=2, min_rows=1)
+        try:
+            parallel = AnalysisService(service.data_dir, repository=service.repo, parallel=scorer)
+            assert parallel._build_group_rows(cedulas) == serial
+            assert _group(parallel) == _group(service)
+        finally:
+            scorer.shutdown()
+
+    def test_workers_open_read_only_repositories(self, service, tmp_path):
+        stores = len(sessions_module._stores)
+        worker_repo = _open_repository(repository_spec(service.repo))
+        assert len(sessions_module._stores) == stores
+        assert worker_repo.latest_response("estres", "1") == service.repo.latest_response("estres", "1")
+        with pytest.raises(PermissionError):
+            worker_repo.save_session({"cedula": "1"})
+
+        db = SqliteRepository(str(tmp_path / "c.db"))
+        db.add_response("estres", {"id": "a", "respondent_cedula": "1", "submitted_at": "2026", "responses": []})
+        worker_db = _open_repository(repository_spec(db))
+        assert worker_db.latest_response("estres", "1")["id"] == "a"
+        with pytest.raises(sqlite3.OperationalError):
+            worker_db.add_response("estres", {"id": "b", "respondent_cedula": "1", "responses": []})
+
+    def test_small_groups_and_single_worker_stay_serial(self):
+        assert not ParallelGroupScorer(workers=8, min_rows=500).applies(499)
+        assert not ParallelGroupScorer(workers=1, min_rows=1).applies(10_000)
+        assert ParallelGroupScorer(workers=2, min_rows=500).applies(500)
+
+    def test_falls_back_to_serial(self, service, monkeypatch):
+        scorer = ParallelGroupScorer(workers=2, min_rows=1)
+        monkeypatch.setattr(scorer, "score", lambda *args: (_ for _ in ()).throw(OSError("sin procesos")))
+        service.parallel = scorer
+        assert [row["cedula"] for row in service._build_group_rows(["1", "2"])] == ["1", "2"]
+
+
+def _sin_hash(value):
+    if isinstance(value, dict):
+        return {k: _sin_hash(v) for k, v in value.items() if k != "hash_respuestas"}
+    return value
+
+
+class TestScoreCampaign:
+    def test_matches_individual_analysis(self, service, monkeypatch):
+        calls = _spy_scoring(service, monkeypatch)
+        rows = service.score_campaign()
+        assert calls == []
+        assert sorted(row["cedula"] for row in rows) == ["1", "2", "3", "4"]
+        for row in rows:
+            individual = service.analyze_individual(row["cedula"])
+            assert row["cuestionarios"] == _sin_hash(individual["cuestionarios"])
+            assert row["total_general"] == individual["total_general"]
+            assert list(row["cuestionarios"]) == ["estres", "intralaboral", "extralaboral"]
+
+    def test_unscorable_values_fall_back_to_individual_scoring(self, service):
+        service.repo.add_response("estres", {
+            "id": "estres-1b", "submitted_at": "2026-02-01T00:00:00",
+            "respondent_cedula": "1", "responses": _responses(31, 500),
+        })
+        rows = {row["cedula"]: row for row in service.score_campaign(["1", "2"])}
+        assert rows["1"]["cuestionarios"]["estres"] == _sin_hash(
+            service.analyze_individual("1")["cuestionarios"]["estres"]
+        )
+
+
+class TestRouting:
+    def test_routing_from_datos_generales(self):
+        assert respondent_routing({"tiene_personal_cargo": "si", "tipo_cargo": "Jefe de área"}) == {
+            "forma": "A", "tipo_cargo_grupo": "profesionales_directivos",
+        }
+        assert respondent_routing({"tiene_personal_cargo": "no"})["forma"] == "B"
+        assert respondent_routing({}) == {"forma": None, "tipo_cargo_grupo": "auxiliares_operativos"}
+
+    def test_session_routing_is_used(self, service, monkeypatch):
+        service.repo.save_session({
+            "cedula": "1", "completed_forms": [], "forma": "A", "tipo_cargo_grupo": "profesionales_directivos",
+        })
+        monkeypatch.setattr(
+            "analisis.analysis_service.respondent_routing", lambda meta: pytest.fail("forma re-derived")
+        )
+        assert service.routing("1", {"tiene_personal_cargo": "no"}) == ("A", "profesionales_directivos")
+        assert "intralaboral" in service.analyze_individual("1")["cuestionarios"]
+
+    def test_sessions_without_routing_fall_back_to_metadata(self, service):
+        service.repo.save_session({"cedula": "2", "completed_forms": []})
+        assert service.routing("2", {"tiene_personal_cargo": "no"}) == ("B", "auxiliares_operativos")
+        assert service.routing("9", {}) == ("B", "auxiliares_operativos")
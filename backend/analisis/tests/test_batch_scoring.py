@@ -0,0 +1,86 @@
+"""
+Pruebas de la calificación por lotes: debe coincidir exactamente con los
+calificadores individuales del motor.
+"""
+import json
+import os
+import random
+import sys
+
+import pytest
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+np = pytest.importorskip("numpy")
+
+from analisis.batch_scoring import N_ITEMS, classify_batch, pack_responses, score_batch
+from analisis.score_cache import ScoreCache
+from analisis.scoring_engine import PsychosocialScoringEngine
+
+
+@pytest.fixture
+def engine():
+    return PsychosocialScoringEngine(cache=ScoreCache(max_entries=0))
+
+
+def _random_campaign(cuestionario: str, n: int, seed: int):
+    """Respuestas aleatorias con ítems faltantes y valores fuera de escala."""
+    rng = random.Random(seed)
+    campaign = []
+    for _ in range(n):
+        missing_rate = rng.choice([0.0, 0.0, 0.1, 0.6, 1.0])
+        responses = [
+            {"question_id": q, "response_value": rng.choice([1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 0, 6])}
+            for q in range(1, N_ITEMS[cuestionario] + 1)
+            if rng.random() >= missing_rate
+        ]
+        rng.shuffle(responses)
+        campaign.append(responses)
+    tipos = [rng.choice([None, "Auxiliar", "Profesional", "Jefe de área", "operario"]) for _ in range(n)]
+    return campaign, tipos
+
+
+SCORERS = {
+    "intralaboral_a": "score_intralaboral_a",
+    "intralaboral_b": "score_intralaboral_b",
+    "extralaboral":   "score_extralaboral",
+    "estres":         "score_estres",
+}
+
+
+@pytest.mark.parametrize("cuestionario", list(SCORERS))
+def test_batch_matches_individual_scorers(engine, cuestionario):
+    campaign, tipos = _random_campaign(cuestionario, 150, seed=len(cuestionario))
+    scorer = getattr(engine, SCORERS[cuestionario])
+    expected = [scorer(responses, tipo) for responses, tipo in zip(campaign, tipos)]
+
+    batch = engine.score_batch(cuestionario, pack_responses(cuestionario, campaign), tipos)
+    hashes = [engine._compute_hash(responses) for responses in campaign]
+    actual = batch.results(hashes)
+
+    assert [json.dumps(r, ensure_ascii=False) for r in actual] == \
+           [json.dumps(r, ensure_ascii=False) for r in expected]
+
+
+def test_pack_accepts_string_ids_and_keeps_last_duplicate():
+    matrix = pack_responses("estres", [[
+        {"question_id": "1", "response_value": "2"},
+        {"question_id": 1, "response_value": 3},
+        {"question_id": "atiende_clientes", "response_value": "si"},
+    ]])
+    assert matrix.shape == (1, 31)
+    assert matrix[0, 0] == 3
+    assert (matrix[0, 1:] == -1).all()
+
+
+def test_score_batch_rejects_wrong_width():
+    with pytest.raises(ValueError):
+        score_batch("intralaborales-b", np.zeros((2, 123), dtype=np.int8))
+
+
+def test_classify_batch_handles_unsorted_tables(engine):
+    table = {"Alto": [50.0, 100], "Sin Riesgo": [0.0, 20.0], "Medio": [20.1, 49.9]}
+    scores = np.array([0.0, 20.0, 20.05, 35.0, 49.95, 100.0])
+    expected = [engine.classify_risk(float(s), table) for s in scores]
+    assert list(classify_batch(scores, table)) == expected
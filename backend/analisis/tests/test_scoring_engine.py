@@ -2,6 +2,7 @@
 Pruebas unitarias del Motor de Calificación Psicosocial.
 Cubre los criterios de aceptación CA-01 a CA-20 del documento de requerimientos.
 """
+import json
 import pytest
 import os
 import sys
@@ -176,6 +177,66 @@ class TestRiskClassification:
             assert result["nivel_riesgo"] in valid_levels
 
 
+def _classify_risk_reference(score, table):
+    """Algoritmo original de classify_risk (Decimal por nivel), como referencia."""
+    from decimal import Decimal, ROUND_HALF_UP
+    for level, value in table.items():
+        if not isinstance(value, (list, tuple)) or len(value) != 2:
+            continue
+        lo, hi = value
+        score_decimal = float(Decimal(str(score)).quantize(Decimal('.1'), rounding=ROUND_HALF_UP))
+        if lo <= score_decimal <= hi:
+            return level
+    return "Muy Alto"
+
+
+def _all_baremo_tables(baremos):
+    """Todas las tablas de rangos del archivo de baremos."""
+    tables = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if any(isinstance(v, list) and len(v) == 2 for v in node.values()):
+                tables.append(node)
+            for v in node.values():
+                walk(v)
+    walk(baremos)
+    return tables
+
+
+class TestFastRiskClassification:
+    """classify_risk en décimas enteras debe coincidir con el algoritmo Decimal original."""
+
+    ODD_TABLES = [
+        {"Alto": [50.0, 100], "Sin Riesgo": [0.0, 20.0], "Medio": [20.1, 49.9]},   # desordenada
+        {"Sin Riesgo": [0, 25], "Bajo": [25, 50], "Medio": [49.95, 100]},           # solapes y bordes no décimos
+        {"factor_transformacion": 16, "Sin Riesgo": [0.05, 7.849], "Bajo": [7.85, 12.65]},
+        {"Sin Riesgo": [float("-inf"), 0.3], "Bajo": [0.4, float("inf")]},
+        {},
+    ]
+
+    def test_all_tenths_match_reference(self, engine):
+        tables = _all_baremo_tables(engine.baremos) + self.ODD_TABLES
+        assert len(tables) > 20
+        scores = [t / 10 for t in range(0, 1001)]
+        for table in tables:
+            for score in scores:
+                assert engine.classify_risk(score, table) == _classify_risk_reference(score, table), (score, table)
+
+    def test_unrounded_scores_match_reference(self, engine):
+        import random
+        rng = random.Random(7)
+        scores = [rng.uniform(-5, 105) for _ in range(2000)]
+        # Puntajes justo en la mitad de una décima y con ruido de punto flotante
+        scores += [t / 100 for t in range(-50, 10050, 5)] + [0.1 + 0.2, 12.65, 2.675, -0.0, 0, 100, 7]
+        for table in _all_baremo_tables(engine.baremos)[:10] + self.ODD_TABLES:
+            for score in scores:
+                assert engine.classify_risk(score, table) == _classify_risk_reference(score, table), (score, table)
+
+    def test_nan_is_muy_alto(self, engine):
+        assert engine.classify_risk(float("nan"), {"Sin Riesgo": [0, 100]}) == "Muy Alto"
+
+
 # ──────────────────────────────────────────────────────────────
 # CA-11 a CA-15: Estrés — calificación especial
 # ──────────────────────────────────────────────────────────────
@@ -339,3 +400,94 @@ class TestBaremos:
         responses = _make_responses(_all_estres_ids(), 2)
         result = engine.score_estres(responses)
         assert "version_baremos" in result
+
+
+# ──────────────────────────────────────────────────────────────
+# Caché de resultados calificados
+# ──────────────────────────────────────────────────────────────
+
+class TestScoreCache:
+    @pytest.fixture
+    def baremos_copy(self, tmp_path):
+        import shutil
+        path = tmp_path / "baremos.json"
+        shutil.copy(PsychosocialScoringEngine().baremos_path, path)
+        return str(path)
+
+    def test_repeated_scoring_hits_cache(self, engine):
+        responses = _make_responses(_all_intra_b_ids(), 3)
+        first = engine.score_intralaboral_b(responses)
+        second = engine.score_intralaboral_b(responses)
+        assert second == first
+        assert engine.cache.stats()["aciertos"] == 1
+
+    def test_hash_ignores_extra_fields(self, engine):
+        responses = _make_responses(_all_estres_ids(), 2)
+        with_text = [dict(r, question_text="texto") for r in reversed(responses)]
+        assert engine._compute_hash(with_text) == engine._compute_hash(responses)
+
+    def test_tipo_cargo_group_is_part_of_key(self, engine):
+        responses = _make_responses(_all_estres_ids(), 2)
+        aux = engine.score_estres(responses, "auxiliar")
+        prof = engine.score_estres(responses, "profesional")
+        assert aux["tipo_cargo_grupo"] == "auxiliares_operativos"
+        assert prof["tipo_cargo_grupo"] == "profesionales_directivos"
+
+    def test_update_baremos_invalidates(self, baremos_copy):
+        engine = PsychosocialScoringEngine(baremos_copy)
+        responses = _make_responses(_all_estres_ids(), 2)
+        before = engine.score_estres(responses)
+
+        baremos = json.loads(json.dumps(engine.baremos))
+        for level in baremos["estres"]["auxiliares_operativos"]:
+            baremos["estres"]["auxiliares_operativos"][level] = [0.0, 100.0]
+        engine.update_baremos(baremos)
+        after = engine.score_estres(responses)
+        assert before["nivel_riesgo"] != "Sin Riesgo"
+        assert after["nivel_riesgo"] == "Sin Riesgo"
+        assert engine.cache.stats()["aciertos"] == 0
+
+    def test_disk_store_survives_new_engine(self, tmp_path, baremos_copy):
+        from analisis.score_cache import ScoreCache
+        db_path = str(tmp_path / "score_cache.db")
+        responses = _make_responses(_all_intra_a_ids(), 4)
+        expected = PsychosocialScoringEngine(baremos_copy, ScoreCache(db_path=db_path)).score_intralaboral_a(responses)
+
+        engine = PsychosocialScoringEngine(baremos_copy, ScoreCache(max_entries=0, db_path=db_path))
+        assert engine.score_intralaboral_a(responses) == expected
+        assert engine.cache.stats()["aciertos"] == 1
+
+
+# ──────────────────────────────────────────────────────────────
+# Planes de calificación precompilados
+# ──────────────────────────────────────────────────────────────
+
+class TestScoringPlans:
+    def test_plan_is_compiled_once(self, engine):
+        responses = _make_responses(_all_intra_a_ids(), 2)
+        engine.score_intralaboral_a(responses)
+        plan = engine._plan("intralaboral_a")
+        engine.score_intralaboral_a(_make_responses(_all_intra_a_ids(), 4))
+        assert engine._plan("intralaboral_a") is plan
+        assert plan.max == 123 * 4
+
+    def test_plan_rebuilt_when_baremos_change(self, engine, tmp_path):
+        import shutil
+        path = tmp_path / "baremos.json"
+        shutil.copy(engine.baremos_path, path)
+        engine = PsychosocialScoringEngine(str(path))
+        plan = engine._plan("extralaboral", "auxiliares_operativos")
+        engine.update_baremos(json.loads(json.dumps(engine.baremos)))
+        assert engine._plan("extralaboral", "auxiliares_operativos") is plan  # same tables
+        baremos = json.loads(json.dumps(engine.baremos))
+        baremos["extralaboral"]["auxiliares_operativos"]["total"]["Sin Riesgo"] = [0.0, 99.0]
+        engine.update_baremos(baremos)
+        assert engine._plan("extralaboral", "auxiliares_operativos") is not plan
+
+    def test_precomputed_grades_match_scalar_path(self, engine):
+        plan = engine._plan("intralaboral_b")
+        for dom in plan.domains:
+            for dim in dom.dimensions:
+                for raw, (score, level) in enumerate(dim.grades):
+                    assert score == engine._transformed_score(raw, dim.max)
+                    assert level == engine.classify_risk(score, dim.risk.table)
@@ -1,33 +1,37 @@
-from typing import List, Dict, Any, Counter
-import json
-import os
+from typing import List, Dict, Any, Callable, Counter, Hashable, Optional, Tuple
+import threading
+from storage.repository import ResponseRepository, get_repository
 from scoring_config import INVERSE_QUESTIONS, INTRALABORAL_A_STRUCTURE, INTRALABORAL_B_STRUCTURE
 
 class AnalysisEngine:
-    def __init__(self, data_dir: str, questionnaires_dir: str):
+    def __init__(self, data_dir: str, questionnaires_dir: str, repository: ResponseRepository = None):
         self.data_dir = data_dir
         self.questionnaires_dir = questionnaires_dir
+        self.repo = repository or get_repository(data_dir)
+        # Running score tallies per questionnaire and the last sociodemographic
+        # counts, each with the repository revision they reflect
+        self._tallies: Dict[str, Tuple[Hashable, "ScoreTally"]] = {}
+        self._sociodemographics: Optional[Tuple[Hashable, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
 
     def load_responses(self, q_id: str) -> List[Dict[str, Any]]:
-        path = os.path.join(self.data_dir, f"responses_{q_id}.json")
-        if not os.path.exists(path):
-            return []
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return self.repo.list_responses(q_id)
 
     def get_sociodemographic_stats(self) -> Dict[str, Any]:
+        revision = self.repo.revision(["datos-generales"])
+        cached = self._sociodemographics
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+        stats = self._count_sociodemographics()
+        self._sociodemographics = (revision, stats)
+        return stats
+
+    def _count_sociodemographics(self) -> Dict[str, Any]:
         # Load legacy responses
         responses_legacy = self.load_responses("datos-generales")
         
         # Load new form responses
-        path_new = os.path.join(self.data_dir, "form_datos-generales.json")
-        responses_new = []
-        if os.path.exists(path_new):
-            try:
-                with open(path_new, "r", encoding="utf-8") as f:
-                    responses_new = json.load(f)
-            except:
-                responses_new = []
+        responses_new = self.repo.list_form_responses("datos-generales")
 
         stats = {
             "sexo": Counter(),
@@ -74,109 +78,25 @@ class AnalysisEngine:
 
     def calculate_score(self, q_id: str, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculates transformed scores and risk levels"""
-        if not responses:
-            return {}
-
-        inverse_ids = INVERSE_QUESTIONS.get(q_id, [])
-        structure = None
-        if q_id == "intralaborales-a":
-            structure = INTRALABORAL_A_STRUCTURE
-        elif q_id == "intralaborales-b":
-            structure = INTRALABORAL_B_STRUCTURE
-        
-        participant_scores = []
-        domain_raw_scores = {} # {domain: [scores]}
-        dimension_raw_scores = {} # {dimension: [scores]}
-        
-        for resp in responses:
-            raw_sum = 0
-            count = 0
-            
-            # For domain/dimension calculation per participant
-            # Original reading: val = r["response_value"] (1-5 range)
-            # Subtract 1 to get 0-4 range for simpler math if needed, but let's be explicit
-            resp_dict = {r["question_id"]: r["response_value"] for r in resp["responses"]}
-            
-            # Map of processed points (0-4) for structure calculation
-            processed_points = {}
-
-            for q_id_item, val in resp_dict.items():
-                # Logic based on scoring_config.py comments:
-                # Direct: Siempre(1)=4, Casi siempre(2)=3, A veces(3)=2, Casi nunca(4)=1, Nunca(5)=0
-                # Inverse: Siempre(1)=0, Casi siempre(2)=1, A veces(3)=2, Casi nunca(4)=3, Nunca(5)=4
-                
-                points = 0
-                if q_id_item in inverse_ids:
-                    # Inverse Question
-                    # Value 1 -> 0
-                    # Value 5 -> 4
-                    points = val - 1
-                else:
-                    # Direct Question
-                    # Value 1 -> 4
-                    # Value 5 -> 0
-                    points = 5 - val
-                
-                # Clamp points between 0 and 4 just in case
-                points = max(0, min(4, points))
-                
-                processed_points[q_id_item] = points
-                raw_sum += points
-                count += 1
-            
-            if count > 0:
-                transformed = (raw_sum / (count * 4)) * 100
-                participant_scores.append(transformed)
-
-            # Domain/Dimension logic
-            if structure:
-                for domain, dimensions in structure.items():
-                    if domain not in domain_raw_scores: domain_raw_scores[domain] = []
-                    domain_sum = 0
-                    domain_count = 0
-                    
-                    for dim, questions in dimensions.items():
-                        if dim not in dimension_raw_scores: dimension_raw_scores[dim] = []
-                        dim_sum = 0
-                        dim_count = 0
-                        
-                        for q_idx in questions:
-                            if q_idx in processed_points:
-                                p = processed_points[q_idx]
-                                dim_sum += p
-                                dim_count += 1
-                                domain_sum += p
-                                domain_count += 1
-                        
-                        if dim_count > 0:
-                            dimension_raw_scores[dim].append((dim_sum / (dim_count * 4)) * 100)
-                    
-                    if domain_count > 0:
-                        domain_raw_scores[domain].append((domain_sum / (domain_count * 4)) * 100)
-        
-        if not participant_scores:
-            return {}
-
-        avg_score = sum(participant_scores) / len(participant_scores)
-        
-        # Risk levels distribution
-        levels = {"Sin Riesgo": 0, "Bajo": 0, "Medio": 0, "Alto": 0, "Muy Alto": 0}
-        for s in participant_scores:
-            lvl = self.get_risk_level(s)
-            levels[lvl] += 1
-            
-        result = {
-            "average": round(avg_score, 1),
-            "distribution": levels,
-            "total_participants": len(participant_scores),
-            "risk_level": self.get_risk_level(avg_score)
-        }
-
-        if domain_raw_scores:
-            result["domains"] = {d: round(sum(scores)/len(scores), 1) for d, scores in domain_raw_scores.items() if scores}
-            result["dimensions"] = {d: round(sum(scores)/len(scores), 1) for d, scores in dimension_raw_scores.items() if scores}
-
-        return result
+        tally = ScoreTally(q_id, self.get_risk_level)
+        tally.add(responses)
+        return tally.result()
+
+    def questionnaire_report(self, q_id: str) -> Dict[str, Any]:
+        """``calculate_score`` of every response of ``q_id``, scoring only responses added since the last call."""
+        revision = self.repo.revision([q_id])
+        with self._lock:
+            entry = self._tallies.get(q_id)
+            if entry is not None and entry[0] == revision:
+                return entry[1].result()
+            responses = self.load_responses(q_id)
+            if entry is not None and entry[1].extends(responses):
+                tally = entry[1]
+            else:
+                tally = ScoreTally(q_id, self.get_risk_level)
+            tally.add(responses[tally.count:])
+            self._tallies[q_id] = (revision, tally)
+            return tally.result()
 
     def get_risk_level(self, score: float) -> str:
         if score < 25: return "Sin Riesgo"
@@ -192,7 +112,124 @@ class AnalysisEngine:
         }
         
         for q_id in ["estres", "extralaborales", "intralaborales-a", "intralaborales-b"]:
-            responses = self.load_responses(q_id)
-            report["questionnaires"][q_id] = self.calculate_score(q_id, responses)
+            report["questionnaires"][q_id] = self.questionnaire_report(q_id)
             
         return report
+
+
+class ScoreTally:
+    """Running sums behind ``calculate_score`` for one questionnaire.
+
+    Responses are only ever appended, so the global report extends a tally with
+    the new responses instead of rescoring all of them. Sums are accumulated in
+    submission order, which gives the same floats as scoring the whole list.
+    """
+
+    def __init__(self, q_id: str, risk_level: Callable[[float], str]):
+        self.risk_level = risk_level
+        self.inverse_ids = INVERSE_QUESTIONS.get(q_id, [])
+        self.structure = None
+        if q_id == "intralaborales-a":
+            self.structure = INTRALABORAL_A_STRUCTURE
+        elif q_id == "intralaborales-b":
+            self.structure = INTRALABORAL_B_STRUCTURE
+
+        self.count = 0            # responses added
+        self.last_id = None       # id of the last response added
+        self.score_sum = 0
+        self.participants = 0
+        self.levels = {"Sin Riesgo": 0, "Bajo": 0, "Medio": 0, "Alto": 0, "Muy Alto": 0}
+        self.domains: Dict[str, List] = {}      # {domain: [sum, n]}
+        self.dimensions: Dict[str, List] = {}   # {dimension: [sum, n]}
+
+    def extends(self, responses: List[Dict[str, Any]]) -> bool:
+        """Whether ``responses`` starts with the responses already added."""
+        if self.count == 0:
+            return True
+        if len(responses) < self.count or self.last_id is None:
+            return False
+        return responses[self.count - 1].get("id") == self.last_id
+
+    def add(self, responses: List[Dict[str, Any]]):
+        for resp in responses:
+            self._add_one(resp)
+            self.count += 1
+            self.last_id = resp.get("id")
+
+    def _add_one(self, resp: Dict[str, Any]):
+        raw_sum = 0
+        count = 0
+
+        # Original reading: val = r["response_value"] (1-5 range)
+        resp_dict = {r["question_id"]: r["response_value"] for r in resp["responses"]}
+
+        # Map of processed points (0-4) for structure calculation
+        processed_points = {}
+
+        for q_id_item, val in resp_dict.items():
+            # Logic based on scoring_config.py comments:
+            # Direct: Siempre(1)=4, Casi siempre(2)=3, A veces(3)=2, Casi nunca(4)=1, Nunca(5)=0
+            # Inverse: Siempre(1)=0, Casi siempre(2)=1, A veces(3)=2, Casi nunca(4)=3, Nunca(5)=4
+            if q_id_item in self.inverse_ids:
+                points = val - 1
+            else:
+                points = 5 - val
+
+            # Clamp points between 0 and 4 just in case
+            points = max(0, min(4, points))
+
+            processed_points[q_id_item] = points
+            raw_sum += points
+            count += 1
+
+        if count > 0:
+            transformed = (raw_sum / (count * 4)) * 100
+            self.score_sum += transformed
+            self.participants += 1
+            self.levels[self.risk_level(transformed)] += 1
+
+        # Domain/Dimension logic
+        if self.structure:
+            for domain, dimensions in self.structure.items():
+                domain_totals = self.domains.setdefault(domain, [0, 0])
+                domain_sum = 0
+                domain_count = 0
+
+                for dim, questions in dimensions.items():
+                    dim_totals = self.dimensions.setdefault(dim, [0, 0])
+                    dim_sum = 0
+                    dim_count = 0
+
+                    for q_idx in questions:
+                        if q_idx in processed_points:
+                            p = processed_points[q_idx]
+                            dim_sum += p
+                            dim_count += 1
+                            domain_sum += p
+                            domain_count += 1
+
+                    if dim_count > 0:
+                        dim_totals[0] += (dim_sum / (dim_count * 4)) * 100
+                        dim_totals[1] += 1
+
+                if domain_count > 0:
+                    domain_totals[0] += (domain_sum / (domain_count * 4)) * 100
+                    domain_totals[1] += 1
+
+    def result(self) -> Dict[str, Any]:
+        if not self.participants:
+            return {}
+
+        avg_score = self.score_sum / self.participants
+        result = {
+            "average": round(avg_score, 1),
+            "distribution": dict(self.levels),
+            "total_participants": self.participants,
+            "risk_level": self.risk_level(avg_score)
+        }
+
+        if self.domains:
+            result["domains"] = {d: round(t[0] / t[1], 1) for d, t in self.domains.items() if t[1]}
+            result["dimensions"] = {d: round(t[0] / t[1], 1) for d, t in self.dimensions.items() if t[1]}
+
+        return result
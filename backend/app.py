@@ -2,21 +2,35 @@
 Backend API for Multi-Questionnaire System
 Supports multiple questionnaires loaded from JSON files
 """
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import itertools
 import json
 import os
 import uuid
-import glob
-import io
+import base64
+import functools
 from analysis_engine import AnalysisEngine
+from storage.repository import form_cedula, get_repository, response_cedula
 from dotenv import load_dotenv
-from analisis.router import router as analisis_router
+from analisis.router import router as analisis_router, service as analisis_service
+from analisis.router import report_gen as analisis_report_gen
+from analisis.analysis_service import respondent_routing
+from services.browser_pool import browser_pool
+from services.concurrency import analysis_pool, concurrency_stats, loop_lag, run_analysis, run_storage, storage_pool
+from services.http_cache import CachedContent, CachedStaticFiles
+from services.exports import Sheet, iter_file, spooled_csv, spooled_xlsx
+from services.questionnaires import QuestionnaireDefinition, QuestionnaireRegistry
+from services.statistics import StatisticsCache, question_statistics
+from services.pdf_archive import PdfArchive, safe_filename
+from services.pdf_jobs import PdfJobManager, ReportTemplate
+from services.jobs import JobQueue, JobResult
+from services.zip_stream import iter_zip
+from contextlib import asynccontextmanager
 
 # Load environment variables
 load_dotenv()
@@ -28,16 +42,50 @@ QUESTIONNAIRES_DIR = os.path.join(BACKEND_DIR, "questionnaires")
 DATA_DIR = os.path.join(BACKEND_DIR, "data")
 RESULTS_PDF_DIR = os.path.join(DATA_DIR, "resultados_pdf")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keep one headless Chromium alive for all PDF rendering, run background jobs and flush sessions on shutdown."""
+    await loop_lag.start()
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        # PDF endpoints retry the launch on first use
+        print(f"Warning: could not start PDF browser: {e}")
+    # Resume jobs interrupted by the last shutdown
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await browser_pool.stop()
+    await loop_lag.stop()
+    storage_pool.shutdown()
+    analysis_pool.shutdown()
+    analisis_service.parallel.shutdown()
+    repo.flush()
+
+
 app = FastAPI(
     title="Sistema de Cuestionarios",
     description="API for managing multiple questionnaires and responses",
     version="2.0.0",
-    root_path="/cuestionarios"
+    root_path="/cuestionarios",
+    lifespan=lifespan,
 )
 
 # Ensure directories exist
 os.makedirs(RESULTS_PDF_DIR, exist_ok=True)
 
+# Responses, forms and sessions (JSON files or SQLite, see STORAGE_BACKEND)
+repo = get_repository(DATA_DIR)
+
+# Questionnaire definitions, parsed once and reloaded when their files change
+questionnaire_registry = QuestionnaireRegistry(QUESTIONNAIRES_DIR)
+
+# /api/statistics results, until the questionnaire's responses change
+statistics_cache = StatisticsCache()
+
+# /api/analysis-report, scoring only the responses added since the last request
+analysis_engine = AnalysisEngine(DATA_DIR, QUESTIONNAIRES_DIR, repository=repo)
+
 from fastapi import UploadFile, File
 import shutil
 
@@ -359,421 +407,328 @@ class PDFFromHTMLRequest(BaseModel):
     filename: str
 
 
-@app.post("/api/generate-pdf-server")
-async def generate_pdf_server(data: PDFFromHTMLRequest):
-    """Receive rendered HTML from the frontend and convert it to PDF using Playwright."""
-    from playwright.async_api import async_playwright
+SERVER_PDF_OPTIONS = {
+    "format": "Letter",
+    "margin": {"top": "1.01cm", "bottom": "1.01cm", "left": "1.01cm", "right": "1.01cm"},
+    "print_background": True,
+}
 
-    file_dir = os.path.join(RESULTS_PDF_DIR, "stress")
-    if "extralaborales" in data.filename.lower():
-        file_dir = os.path.join(RESULTS_PDF_DIR, "extralaborales")
-    elif "intralaboral_a" in data.filename.lower() or "intralaborales-a" in data.filename.lower():
-        file_dir = os.path.join(RESULTS_PDF_DIR, "intralaborales-a")
-    elif "intralaboral_b" in data.filename.lower() or "intralaborales-b" in data.filename.lower():
-        file_dir = os.path.join(RESULTS_PDF_DIR, "intralaborales-b")
-        
-    os.makedirs(file_dir, exist_ok=True)
-    file_path = os.path.join(file_dir, data.filename)
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
-        await page.set_content(data.html, wait_until="networkidle")
-        await page.pdf(
-            path=file_path,
-            format="Letter",
-            margin={"top": "1.01cm", "bottom": "1.01cm", "left": "1.01cm", "right": "1.01cm"},
-            print_background=True,
-        )
-        await browser.close()
 
-    return {"success": True, "filename": data.filename}
+def _image_data_uri(filename: str) -> str:
+    """Frontend image as a base64 data URI, so Playwright needs no network access."""
+    with open(os.path.join(FRONTEND_DIR, filename), "rb") as f:
+        return "data:image/png;base64," + base64.b64encode(f.read()).decode()
 
 
-@app.get("/api/pdfs/stress")
-async def list_generated_pdfs():
-    """List all PDF files in the stress directory."""
-    folder = os.path.join(RESULTS_PDF_DIR, "stress")
-    if not os.path.exists(folder):
-        return []
-    
-    files = []
-    for f in os.listdir(folder):
-        if f.lower().endswith(".pdf"):
-            path = os.path.join(folder, f)
-            size = os.path.getsize(path) / 1024  # KB
-            created = os.path.getctime(path)
-            files.append({
-                "filename": f,
-                "size_kb": round(size, 2),
-                "created_at": datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S")
-            })
-    
-    # Sort by newest first
-    files.sort(key=lambda x: x["created_at"], reverse=True)
-    return files
+@functools.lru_cache(maxsize=1)
+def _report_logos() -> tuple:
+    return _image_data_uri("escudo_colombia.png"), _image_data_uri("logo_javeriana.png")
 
 
-@app.get("/api/pdfs/stress/{filename}")
-async def download_generated_pdf(filename: str):
-    """Download a specific PDF file."""
-    path = os.path.join(RESULTS_PDF_DIR, "stress", filename)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(path, media_type="application/pdf", filename=filename)
+def render_stress_report(record: dict) -> str:
+    """Stress report HTML of a stored response record."""
+    data = PDFGenerationRequest(
+        respondent_cedula=response_cedula(record),
+        submitted_at=record.get("submitted_at", ""),
+        responses=record.get("responses", []),
+    )
+    return build_report_html(data, *_report_logos())
 
 
-@app.delete("/api/pdfs/stress/{filename}")
-async def delete_generated_pdf(filename: str):
-    """Delete a specific PDF file."""
-    path = os.path.join(RESULTS_PDF_DIR, "stress", filename)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found")
-    os.remove(path)
-    return {"success": True, "message": f"Deleted {filename}"}
+# Index of the generated PDFs, shared by the listing endpoints and every writer
+pdf_archive = PdfArchive(RESULTS_PDF_DIR)
 
+# Bulk PDF jobs; only questionnaires with a server-side template can be queued
+pdf_jobs = PdfJobManager(browser_pool, RESULTS_PDF_DIR, repo, archive=pdf_archive)
+pdf_jobs.register("estres", ReportTemplate(
+    folder="stress",
+    filename="Reporte_Estres_{cedula}.pdf",
+    render=render_stress_report,
+    pdf_options=SERVER_PDF_OPTIONS,
+))
 
-@app.post("/api/pdfs/stress/bulk-download")
-async def bulk_download_pdfs(filenames: List[str]):
-    """Download multiple PDF files as a ZIP archive."""
-    import zipfile
-    import io
-    
-    if not filenames:
-        raise HTTPException(status_code=400, detail="No files specified")
-    
-    folder = os.path.join(RESULTS_PDF_DIR, "stress")
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for fname in filenames:
-            file_path = os.path.join(folder, fname)
-            if os.path.exists(file_path):
-                zip_file.write(file_path, arcname=fname)
-    
-    zip_buffer.seek(0)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return StreamingResponse(
-        zip_buffer, 
-        media_type="application/zip", 
-        headers={"Content-Disposition": f"attachment; filename=reportes_estres_{timestamp}.zip"}
+
+class PDFJobRequest(BaseModel):
+    questionnaire_id: str
+    cedulas: Optional[List[str]] = None
+
+
+# Folder of each questionnaire's PDFs under RESULTS_PDF_DIR
+PDF_FOLDERS = {
+    "estres": "stress",
+    "extralaborales": "extralaborales",
+    "intralaborales-a": "intralaborales-a",
+    "intralaborales-b": "intralaborales-b",
+}
+PDF_ARCHIVE_IDS = {folder: questionnaire_id for questionnaire_id, folder in PDF_FOLDERS.items()}
+
+
+def iter_pdf_zip(folder_name: str, filenames: List[str]):
+    """Stream a ZIP (stored, PDFs are already compressed) of the given PDFs of a results folder.
+
+    Missing files and names that point outside the folder are skipped.
+    """
+    folder = os.path.join(RESULTS_PDF_DIR, folder_name)
+    return iter_zip(
+        (os.path.join(folder, fname), fname)
+        for fname in filenames
+        if safe_filename(fname)
     )
 
 
-@app.post("/api/pdfs/stress/bulk-delete")
-async def bulk_delete_pdfs(filenames: List[str]):
-    """Delete multiple PDF files."""
-    deleted_count = 0
-    errors = []
-    
-    folder = os.path.join(RESULTS_PDF_DIR, "stress")
-    
-    for fname in filenames:
-        try:
-            file_path = os.path.join(folder, fname)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                deleted_count += 1
-        except Exception as e:
-            errors.append(f"{fname}: {str(e)}")
-            
-    return {
-        "success": True, 
-        "deleted_count": deleted_count, 
-        "errors": errors
-    }
+@app.post("/api/generate-pdf-server")
+async def generate_pdf_server(data: PDFFromHTMLRequest):
+    """Receive rendered HTML from the frontend and convert it to PDF using Playwright."""
+    if not safe_filename(data.filename):
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    folder = "stress"
+    if "extralaborales" in data.filename.lower():
+        folder = "extralaborales"
+    elif "intralaboral_a" in data.filename.lower() or "intralaborales-a" in data.filename.lower():
+        folder = "intralaborales-a"
+    elif "intralaboral_b" in data.filename.lower() or "intralaborales-b" in data.filename.lower():
+        folder = "intralaborales-b"
 
+    with pdf_archive.writing(folder, data.filename) as file_path:
+        await browser_pool.render_pdf(data.html, path=file_path, **SERVER_PDF_OPTIONS)
 
-# ==========================================
-# EXTRALABORALES PDF ENDPOINTS
-# ==========================================
+    return {"success": True, "filename": data.filename}
 
-# ==========================================
-# EXTRALABORALES PDF ENDPOINTS
-# ==========================================
 
-@app.get("/api/pdfs/extralaborales")
-async def list_generated_pdfs_extralaborales():
-    """List all PDF files in the extralaborales directory."""
-    folder = os.path.join(RESULTS_PDF_DIR, "extralaborales")
-    if not os.path.exists(folder):
-        return []
-    
-    files = []
-    for f in os.listdir(folder):
-        if f.lower().endswith(".pdf"):
-            path = os.path.join(folder, f)
-            size = os.path.getsize(path) / 1024  # KB
-            created = os.path.getctime(path)
-            files.append({
-                "filename": f,
-                "size_kb": round(size, 2),
-                "created_at": datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S")
-            })
-    
-    # Sort by newest first
-    files.sort(key=lambda x: x["created_at"], reverse=True)
-    return files
+@app.post("/api/pdf-jobs")
+async def create_pdf_job(data: PDFJobRequest):
+    """Render the PDFs of all (or the given) respondents of a questionnaire on the server."""
+    try:
+        job = await pdf_jobs.submit(data.questionnaire_id, data.cedulas)
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No server-side report template for {data.questionnaire_id}. "
+                   f"Available: {sorted(pdf_jobs.templates)}"
+        )
+    return job.to_dict()
 
 
-@app.get("/api/pdfs/extralaborales/{filename}")
-async def download_generated_pdf_extralaborales(filename: str):
-    """Download a specific PDF file."""
-    path = os.path.join(RESULTS_PDF_DIR, "extralaborales", filename)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(path, media_type="application/pdf", filename=filename)
+@app.get("/api/pdf-jobs")
+async def list_pdf_jobs():
+    return {"jobs": [job.to_dict() for job in pdf_jobs.list()]}
 
 
-@app.delete("/api/pdfs/extralaborales/{filename}")
-async def delete_generated_pdf_extralaborales(filename: str):
-    """Delete a specific PDF file."""
-    path = os.path.join(RESULTS_PDF_DIR, "extralaborales", filename)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found")
-    os.remove(path)
-    return {"success": True, "message": f"Deleted {filename}"}
+@app.get("/api/pdf-jobs/{job_id}")
+async def get_pdf_job(job_id: str):
+    """Progress of a bulk PDF job: done, failed, PDFs per second and ETA."""
+    job = pdf_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 
-@app.post("/api/pdfs/extralaborales/bulk-download")
-async def bulk_download_pdfs_extralaborales(filenames: List[str]):
-    """Download multiple PDF files as a ZIP archive."""
-    import zipfile
-    import io
-    
-    if not filenames:
-        raise HTTPException(status_code=400, detail="No files specified")
-    
-    folder = os.path.join(RESULTS_PDF_DIR, "extralaborales")
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for fname in filenames:
-            file_path = os.path.join(folder, fname)
-            if os.path.exists(file_path):
-                zip_file.write(file_path, arcname=fname)
-    
-    zip_buffer.seek(0)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return StreamingResponse(
-        zip_buffer, 
-        media_type="application/zip", 
-        headers={"Content-Disposition": f"attachment; filename=reportes_extralaborales_{timestamp}.zip"}
-    )
+@app.post("/api/pdf-jobs/{job_id}/cancel")
+async def cancel_pdf_job(job_id: str):
+    """Stop a running job; PDFs already written are kept."""
+    job = pdf_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 
-@app.post("/api/pdfs/extralaborales/bulk-delete")
-async def bulk_delete_pdfs_extralaborales(filenames: List[str]):
-    """Delete multiple PDF files."""
-    deleted_count = 0
-    errors = []
-    
-    folder = os.path.join(RESULTS_PDF_DIR, "extralaborales")
-    
-    for fname in filenames:
-        try:
-            file_path = os.path.join(folder, fname)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                deleted_count += 1
-        except Exception as e:
-            errors.append(f"{fname}: {str(e)}")
-            
-    return {
-        "success": True, 
-        "deleted_count": deleted_count, 
-        "errors": errors
-    }
+# ─── Background jobs (enqueue and fetch later) ───────────────
 
+async def _group_pdf_job(params: Dict[str, Any]) -> JobResult:
+    group_data = await run_analysis(
+        analisis_service.analyze_group,
+        filtro_area=params.get("area"), filtro_cargo=params.get("cargo"), filtro_sexo=params.get("sexo"),
+    )
+    pdf_bytes = await analisis_report_gen.generate_group_pdf(group_data)
+    filename = f"reporte_grupal_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+    return JobResult(pdf_bytes, filename, "application/pdf")
 
-# ==========================================
-# INTRALABORALES A PDF ENDPOINTS
-# ==========================================
 
-@app.get("/api/pdfs/intralaborales-a")
-async def list_generated_pdfs_intralaborales_a():
-    """List all PDF files in the intralaborales-a directory."""
-    folder = os.path.join(RESULTS_PDF_DIR, "intralaborales-a")
-    if not os.path.exists(folder):
-        return []
-    
-    files = []
-    for f in os.listdir(folder):
-        if f.lower().endswith(".pdf"):
-            path = os.path.join(folder, f)
-            size = os.path.getsize(path) / 1024  # KB
-            created = os.path.getctime(path)
-            files.append({
-                "filename": f,
-                "size_kb": round(size, 2),
-                "created_at": datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S")
-            })
-    
-    # Sort by newest first
-    files.sort(key=lambda x: x["created_at"], reverse=True)
-    return files
+def _excel_export_job(params: Dict[str, Any]) -> JobResult:
+    export, filename = build_excel_export(params["questionnaire_id"])
+    return JobResult(iter_file(export), filename, XLSX_MEDIA_TYPE)
 
 
-@app.get("/api/pdfs/intralaborales-a/{filename}")
-async def download_generated_pdf_intralaborales_a(filename: str):
-    """Download a specific PDF file."""
-    path = os.path.join(RESULTS_PDF_DIR, "intralaborales-a", filename)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(path, media_type="application/pdf", filename=filename)
+def _campaign_export_job(params: Dict[str, Any]) -> JobResult:
+    export, filename = build_campaign_export()
+    return JobResult(iter_file(export), filename, XLSX_MEDIA_TYPE)
 
 
-@app.delete("/api/pdfs/intralaborales-a/{filename}")
-async def delete_generated_pdf_intralaborales_a(filename: str):
-    """Delete a specific PDF file."""
-    path = os.path.join(RESULTS_PDF_DIR, "intralaborales-a", filename)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found")
-    os.remove(path)
-    return {"success": True, "message": f"Deleted {filename}"}
+def _csv_export_job(params: Dict[str, Any]) -> JobResult:
+    export, filename = build_csv_export(params["questionnaire_id"])
+    return JobResult(iter_file(export), filename, CSV_MEDIA_TYPE)
 
 
-@app.post("/api/pdfs/intralaborales-a/bulk-download")
-async def bulk_download_pdfs_intralaborales_a(filenames: List[str]):
-    """Download multiple PDF files as a ZIP archive."""
-    import zipfile
-    import io
-    
-    if not filenames:
-        raise HTTPException(status_code=400, detail="No files specified")
-    
-    folder = os.path.join(RESULTS_PDF_DIR, "intralaborales-a")
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for fname in filenames:
-            file_path = os.path.join(folder, fname)
-            if os.path.exists(file_path):
-                zip_file.write(file_path, arcname=fname)
-    
-    zip_buffer.seek(0)
+def _pdf_zip_job(params: Dict[str, Any]) -> JobResult:
+    questionnaire_id = params["questionnaire_id"]
+    if questionnaire_id not in PDF_FOLDERS:
+        raise ValueError(f"Unknown questionnaire: {questionnaire_id}")
+    chunks = iter_pdf_zip(PDF_FOLDERS[questionnaire_id], params.get("filenames", []))
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return StreamingResponse(
-        zip_buffer, 
-        media_type="application/zip", 
-        headers={"Content-Disposition": f"attachment; filename=reportes_intralaborales_a_{timestamp}.zip"}
-    )
+    filename = f"reportes_{questionnaire_id.replace('-', '_')}_{timestamp}.zip"
+    return JobResult(chunks, filename, "application/zip")
 
 
-@app.post("/api/pdfs/intralaborales-a/bulk-delete")
-async def bulk_delete_pdfs_intralaborales_a(filenames: List[str]):
-    """Delete multiple PDF files."""
-    deleted_count = 0
-    errors = []
-    
-    folder = os.path.join(RESULTS_PDF_DIR, "intralaborales-a")
-    
-    for fname in filenames:
-        try:
-            file_path = os.path.join(folder, fname)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                deleted_count += 1
-        except Exception as e:
-            errors.append(f"{fname}: {str(e)}")
-            
-    return {
-        "success": True, 
-        "deleted_count": deleted_count, 
-        "errors": errors
-    }
+job_queue = JobQueue(
+    os.getenv("JOBS_DB") or os.path.join(DATA_DIR, "jobs.db"),
+    os.path.join(DATA_DIR, "job_results"),
+)
+job_queue.register("group-pdf", _group_pdf_job)
+job_queue.register("excel-export", _excel_export_job)
+job_queue.register("csv-export", _csv_export_job)
+job_queue.register("campaign-export", _campaign_export_job, runner=run_analysis)
+job_queue.register("pdf-zip", _pdf_zip_job)
 
 
-@app.get("/api/pdfs/intralaborales-b")
-async def list_generated_pdfs_intralaborales_b():
-    """List all PDF files in the intralaborales-b directory."""
-    folder = os.path.join(RESULTS_PDF_DIR, "intralaborales-b")
-    if not os.path.exists(folder):
-        return []
-    
-    files = []
-    for f in os.listdir(folder):
-        if f.lower().endswith(".pdf"):
-            path = os.path.join(folder, f)
-            size = os.path.getsize(path) / 1024  # KB
-            created = os.path.getctime(path)
-            files.append({
-                "filename": f,
-                "size_kb": round(size, 2),
-                "created_at": datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S")
-            })
-    
-    # Sort by newest first
-    files.sort(key=lambda x: x["created_at"], reverse=True)
-    return files
+class JobRequest(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+
+def _job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    job = {k: v for k, v in job.items() if k != "result_path"}
+    job["result_url"] = f"/api/jobs/{job['id']}/result" if job["status"] == "completed" else None
+    return job
+
+
+@app.post("/api/jobs")
+async def create_job(data: JobRequest):
+    """Enqueue a long-running export (group-pdf, excel-export, csv-export, campaign-export, pdf-zip) and return its id."""
+    try:
+        job = await job_queue.submit(data.kind, data.params)
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown job kind: {data.kind}. Available: {sorted(job_queue.handlers)}"
+        )
+    return _job_response(job)
+
+
+@app.get("/api/jobs")
+async def list_jobs():
+    return {"jobs": [_job_response(job) for job in await run_storage(job_queue.list)]}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_storage(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Download the file produced by a completed job."""
+    job = await run_storage(job_queue.result, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Result not available")
+    return FileResponse(job["result_path"], media_type=job["media_type"], filename=job["result_filename"])
+
+
+@app.get("/api/metrics/event-loop")
+async def event_loop_metrics():
+    """Event-loop lag (current, mean, p99, max, stalls) and load of the worker pools."""
+    return concurrency_stats()
+
+
+@app.get("/api/pdf-browser/health")
+async def pdf_browser_health():
+    """State of the shared PDF browser (connected, pages in flight, renders, restarts)."""
+    return browser_pool.health()
+
+
+def _pdf_folder(questionnaire: str) -> str:
+    """Results folder of a questionnaire id or folder name (``estres`` and ``stress`` both work)."""
+    folder = PDF_FOLDERS.get(questionnaire, questionnaire)
+    if folder not in PDF_ARCHIVE_IDS:
+        raise HTTPException(status_code=404, detail=f"Unknown PDF archive: {questionnaire}")
+    return folder
+
+
+@app.get("/api/pdfs/{questionnaire}")
+async def list_generated_pdfs(
+    questionnaire: str,
+    request: Request,
+    cedula: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """List the PDFs of a questionnaire, newest first.
+
+    Optional filters: ``cedula`` (part of the filename) and ``since`` / ``until``
+    (YYYY-MM-DD, inclusive); ``sort`` by created_at, filename or size_kb with
+    ``order`` asc/desc; ``offset`` / ``limit`` paging. The body is the plain list
+    of the page; ``X-Total-Count`` carries the number of matches and ``ETag``
+    lets clients poll with ``If-None-Match``.
+    """
+    folder = _pdf_folder(questionnaire)
+    items, total, etag = await run_storage(
+        pdf_archive.list, folder, cedula=cedula, since=since, until=until, sort=sort, order=order, offset=offset, limit=limit
+    )
+    headers = {"ETag": etag, "X-Total-Count": str(total)}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(items, headers=headers)
 
 
-@app.get("/api/pdfs/intralaborales-b/{filename}")
-async def download_generated_pdf_intralaborales_b(filename: str):
+@app.get("/api/pdfs/{questionnaire}/{filename}")
+async def download_generated_pdf(questionnaire: str, filename: str):
     """Download a specific PDF file."""
-    path = os.path.join(RESULTS_PDF_DIR, "intralaborales-b", filename)
-    if not os.path.exists(path):
+    path = pdf_archive.path(_pdf_folder(questionnaire), filename)
+    if path is None:
         raise HTTPException(status_code=404, detail="File not found")
     return FileResponse(path, media_type="application/pdf", filename=filename)
 
 
-@app.delete("/api/pdfs/intralaborales-b/{filename}")
-async def delete_generated_pdf_intralaborales_b(filename: str):
+@app.delete("/api/pdfs/{questionnaire}/{filename}")
+async def delete_generated_pdf(questionnaire: str, filename: str):
     """Delete a specific PDF file."""
-    path = os.path.join(RESULTS_PDF_DIR, "intralaborales-b", filename)
-    if not os.path.exists(path):
+    if not await run_storage(pdf_archive.delete, _pdf_folder(questionnaire), filename):
         raise HTTPException(status_code=404, detail="File not found")
-    os.remove(path)
     return {"success": True, "message": f"Deleted {filename}"}
 
 
-@app.post("/api/pdfs/intralaborales-b/bulk-download")
-async def bulk_download_pdfs_intralaborales_b(filenames: List[str]):
+@app.post("/api/pdfs/{questionnaire}/bulk-download")
+async def bulk_download_pdfs(questionnaire: str, filenames: List[str]):
     """Download multiple PDF files as a ZIP archive."""
-    import zipfile
-    import io
-    
+    folder = _pdf_folder(questionnaire)
     if not filenames:
         raise HTTPException(status_code=400, detail="No files specified")
-    
-    folder = os.path.join(RESULTS_PDF_DIR, "intralaborales-b")
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for fname in filenames:
-            file_path = os.path.join(folder, fname)
-            if os.path.exists(file_path):
-                zip_file.write(file_path, arcname=fname)
-    
-    zip_buffer.seek(0)
+
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    zip_name = f"reportes_{PDF_ARCHIVE_IDS[folder].replace('-', '_')}_{timestamp}.zip"
     return StreamingResponse(
-        zip_buffer, 
-        media_type="application/zip", 
-        headers={"Content-Disposition": f"attachment; filename=reportes_intralaborales_b_{timestamp}.zip"}
+        iter_pdf_zip(folder, filenames),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={zip_name}"}
     )
 
 
-@app.post("/api/pdfs/intralaborales-b/bulk-delete")
-async def bulk_delete_pdfs_intralaborales_b(filenames: List[str]):
+@app.post("/api/pdfs/{questionnaire}/bulk-delete")
+async def bulk_delete_pdfs(questionnaire: str, filenames: List[str]):
     """Delete multiple PDF files."""
-    deleted_count = 0
-    errors = []
-    
-    folder = os.path.join(RESULTS_PDF_DIR, "intralaborales-b")
-    
-    for fname in filenames:
-        try:
-            file_path = os.path.join(folder, fname)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                deleted_count += 1
-        except Exception as e:
-            errors.append(f"{fname}: {str(e)}")
-            
+    folder = _pdf_folder(questionnaire)
+
+    def delete_all():
+        deleted_count = 0
+        errors = []
+        for fname in filenames:
+            try:
+                if pdf_archive.delete(folder, fname):
+                    deleted_count += 1
+            except Exception as e:
+                errors.append(f"{fname}: {str(e)}")
+        return deleted_count, errors
+
+    deleted_count, errors = await run_storage(delete_all)
     return {
-        "success": True, 
-        "deleted_count": deleted_count, 
+        "success": True,
+        "deleted_count": deleted_count,
         "errors": errors
     }
 
@@ -831,21 +786,24 @@ class FormSubmission(BaseModel):
 
 # Helper functions
 
-def enforce_intralaboral_exclusion(cedula: str, completed: set) -> set:
-    """Re-applies the intralaboral A/B mutex rule based on datos-generales.
+def ensure_session_routing(session: dict) -> dict:
+    """Fill the forma / tipo_cargo_grupo of a session saved before they were stored."""
+    if "forma" not in session or "tipo_cargo_grupo" not in session:
+        entry = repo.latest_form_response("datos-generales", session["cedula"])
+        session.update(respondent_routing(entry["data"] if entry else {}))
+    return session
+
+
+def enforce_intralaboral_exclusion(session: dict, completed: set) -> set:
+    """Re-applies the intralaboral A/B mutex rule based on the session's forma
+    (resolved from datos-generales when it was submitted).
     Ensures that a user always has exactly one of intralaborales-a/b skipped."""
-    general_responses = load_form_responses("datos-generales")
-    personal_cargo = None
-    # Find the latest datos-generales entry for this cedula
-    for entry in reversed(general_responses):
-        if entry.get("data", {}).get("numero_identificacion") == cedula:
-            personal_cargo = entry["data"].get("tiene_personal_cargo")
-            break
-    if personal_cargo == "si":
+    forma = ensure_session_routing(session)["forma"]
+    if forma == "A":
         # Tiene personal a cargo -> hace intralaborales-A, salta B
         completed.add("intralaborales-b")
         completed.discard("intralaborales-a")
-    elif personal_cargo == "no":
+    elif forma == "B":
         completed.add("intralaborales-a")
         completed.discard("intralaborales-b")
     return completed
@@ -856,33 +814,13 @@ def ensure_dirs():
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(QUESTIONNAIRES_DIR, exist_ok=True)
 
-def get_sessions_file() -> str:
-    """Get the sessions file path"""
-    ensure_dirs()
-    return os.path.join(DATA_DIR, "sessions.json")
-
 def load_sessions() -> Dict[str, dict]:
     """Load all sessions"""
-    file_path = get_sessions_file()
-    if not os.path.exists(file_path):
-        return {}
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {}
+    return repo.list_sessions()
 
 def save_session(session_data: dict):
     """Save/Update a session"""
-    file_path = get_sessions_file()
-    sessions = load_sessions()
-    
-    # Update specific session
-    sessions[session_data["cedula"]] = session_data
-    
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(sessions, f, ensure_ascii=False, indent=2)
+    repo.save_session(session_data)
 
 def get_next_step(completed_forms: List[str]) -> str:
     """Determine the next step based on completed starts"""
@@ -891,90 +829,41 @@ def get_next_step(completed_forms: List[str]) -> str:
             return step
     return "completed"
 
-def load_questionnaire(questionnaire_id: str) -> Dict[str, Any]:
+def get_definition(questionnaire_id: str) -> QuestionnaireDefinition:
+    """Parsed questionnaire with its lookup tables; 404 if it does not exist."""
+    definition = questionnaire_registry.get(questionnaire_id)
+    if definition is None:
+        raise HTTPException(status_code=404, detail=f"Questionnaire '{questionnaire_id}' not found")
+    return definition
+
 
+def load_questionnaire(questionnaire_id: str) -> Dict[str, Any]:
     """Load a questionnaire by ID"""
-    file_path = os.path.join(QUESTIONNAIRES_DIR, f"{questionnaire_id}.json")
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail=f"Questionnaire '{questionnaire_id}' not found")
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return get_definition(questionnaire_id).data
 
 def get_all_questionnaires() -> List[Dict[str, Any]]:
     """Get list of all available questionnaires"""
     ensure_dirs()
-    questionnaires = []
-    
-    for file_path in glob.glob(os.path.join(QUESTIONNAIRES_DIR, "*.json")):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                questionnaires.append({
-                    "id": data.get("id"),
-                    "name": data.get("name"),
-                    "description": data.get("description"),
-                    "version": data.get("version"),
-                    "icon": data.get("icon", "📋"),
-                    "color": data.get("color", "#6366f1"),
-                    "question_count": len(data.get("questions", []))
-                })
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"Error loading questionnaire {file_path}: {e}")
-    
-    return questionnaires
-
-def get_responses_file(questionnaire_id: str) -> str:
-    """Get the responses file path for a questionnaire"""
-    ensure_dirs()
-    return os.path.join(DATA_DIR, f"responses_{questionnaire_id}.json")
+    return [definition.summary for definition in questionnaire_registry.all()]
 
 def load_responses(questionnaire_id: str) -> List[dict]:
     """Load all saved responses for a questionnaire"""
-    file_path = get_responses_file(questionnaire_id)
-    if not os.path.exists(file_path):
-        return []
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
+    return repo.list_responses(questionnaire_id)
 
 def save_response(questionnaire_id: str, response_data: dict):
     """Save a new response for a questionnaire"""
-    file_path = get_responses_file(questionnaire_id)
-    responses = load_responses(questionnaire_id)
-    responses.append(response_data)
-    
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(responses, f, ensure_ascii=False, indent=2)
-
-def get_form_responses_file(form_id: str) -> str:
-    """Get the responses file path for a form"""
-    ensure_dirs()
-    return os.path.join(DATA_DIR, f"form_{form_id}.json")
+    # Keeps the group aggregates current: only this respondent is re-scored
+    with analisis_service.submission(response_cedula(response_data)):
+        repo.add_response(questionnaire_id, response_data)
 
 def load_form_responses(form_id: str) -> List[dict]:
     """Load all saved responses for a form"""
-    file_path = get_form_responses_file(form_id)
-    if not os.path.exists(file_path):
-        return []
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
+    return repo.list_form_responses(form_id)
 
 def save_form_response(form_id: str, response_data: dict):
     """Save a new response for a form"""
-    file_path = get_form_responses_file(form_id)
-    responses = load_form_responses(form_id)
-    responses.append(response_data)
-    
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(responses, f, ensure_ascii=False, indent=2)
+    with analisis_service.submission(form_cedula(response_data)):
+        repo.add_form_response(form_id, response_data)
 
 # API Endpoints
 @app.get("/api/questionnaires")
@@ -986,11 +875,11 @@ async def list_questionnaires():
         "total": len(questionnaires)
     }
 
-@app.get("/api/questionnaires/{questionnaire_id}")
-async def get_questionnaire(questionnaire_id: str):
-    """Get a specific questionnaire with its questions and options"""
-    data = load_questionnaire(questionnaire_id)
-    return {
+@functools.lru_cache(maxsize=32)
+def questionnaire_content(definition: QuestionnaireDefinition) -> CachedContent:
+    """Serialized detail of a questionnaire; a reloaded file is a new definition."""
+    data = definition.data
+    detail = {
         "id": data.get("id"),
         "name": data.get("name"),
         "short_name": data.get("short_name"),
@@ -1005,27 +894,57 @@ async def get_questionnaire(questionnaire_id: str):
         "conditional_questions": data.get("conditional_questions", []),
         "total_questions": len(data.get("questions", []))
     }
+    body = json.dumps(detail, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    return CachedContent(body, "application/json", definition.signature[0] / 1e9)
+
+
+@app.get("/api/questionnaires/{questionnaire_id}")
+async def get_questionnaire(questionnaire_id: str, request: Request):
+    """Get a specific questionnaire with its questions and options (ETag, gzip/brotli)"""
+    return questionnaire_content(get_definition(questionnaire_id)).response(request.headers)
+
+def store_survey_response(questionnaire_id: str, cedula: Optional[str], response_data: dict) -> Optional[str]:
+    """Save a questionnaire response and advance the session; returns the next step, if any."""
+    save_response(questionnaire_id, response_data)
+    
+    # --- SESSION UPDATE LOGIC ---
+    if cedula:
+        # Concurrent submits of the same cédula must not overwrite each other's completed_forms
+        with repo.session_lock(cedula):
+            existing_session = repo.get_session(cedula)
+        
+            if existing_session:
+                completed = set(existing_session.get("completed_forms", []))
+                completed.add(questionnaire_id)
+            
+                # Re-enforce intralaboral A/B exclusion (prevents corruption)
+                completed = enforce_intralaboral_exclusion(existing_session, completed)
+            
+                existing_session["completed_forms"] = list(completed)
+                existing_session["last_active"] = datetime.now().isoformat()
+            
+                # Determine next step
+                next_step = get_next_step(list(completed))
+                existing_session["current_step"] = next_step
+            
+                save_session(existing_session)
+                return next_step
+    return None
 
 @app.post("/api/submit")
 async def submit_survey(submission: SurveySubmission):
     """Submit survey responses"""
-    # Load questionnaire to validate
-    questionnaire = load_questionnaire(submission.questionnaire_id)
-    
-    valid_question_ids = {q["id"] for q in questionnaire.get("questions", [])}
-    valid_response_values = {opt["value"] for opt in questionnaire.get("options", [])}
-    
-    # Get non-conditional question IDs (required questions)
-    required_question_ids = {q["id"] for q in questionnaire.get("questions", []) if not q.get("conditional", False)}
+    # Questionnaire definition with precomputed lookup sets
+    questionnaire = get_definition(submission.questionnaire_id)
     
     # Validate responses
     for response in submission.responses:
-        if response.question_id not in valid_question_ids:
+        if response.question_id not in questionnaire.valid_question_ids:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid question ID: {response.question_id}"
             )
-        if response.response_value not in valid_response_values:
+        if response.response_value not in questionnaire.option_values:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid response value: {response.response_value}"
@@ -1033,7 +952,7 @@ async def submit_survey(submission: SurveySubmission):
     
     # Check all required (non-conditional) questions are answered
     answered_ids = {r.question_id for r in submission.responses}
-    missing_required = required_question_ids - answered_ids
+    missing_required = questionnaire.required_question_ids - answered_ids
     if missing_required:
         raise HTTPException(
             status_code=400,
@@ -1042,8 +961,8 @@ async def submit_survey(submission: SurveySubmission):
     
     # Create response record
     response_id = str(uuid.uuid4())
-    questions_dict = {q["id"]: q for q in questionnaire.get("questions", [])}
-    options_dict = {opt["value"]: opt for opt in questionnaire.get("options", [])}
+    questions_dict = questionnaire.questions_by_id
+    options_dict = questionnaire.options_by_value
     
     response_data = {
         "id": response_id,
@@ -1063,36 +982,17 @@ async def submit_survey(submission: SurveySubmission):
         ]
     }
     
-    # Save to file
-    save_response(submission.questionnaire_id, response_data)
-    
-    # --- SESSION UPDATE LOGIC ---
-    if submission.respondent_cedula:
-        sessions = load_sessions()
-        existing_session = sessions.get(submission.respondent_cedula)
-        
-        if existing_session:
-            completed = set(existing_session.get("completed_forms", []))
-            completed.add(submission.questionnaire_id)
-            
-            # Re-enforce intralaboral A/B exclusion (prevents corruption)
-            completed = enforce_intralaboral_exclusion(submission.respondent_cedula, completed)
-            
-            existing_session["completed_forms"] = list(completed)
-            existing_session["last_active"] = datetime.now().isoformat()
-            
-            # Determine next step
-            next_step = get_next_step(list(completed))
-            existing_session["current_step"] = next_step
-            
-            save_session(existing_session)
-            
-            return {
-                "success": True,
-                "message": "Encuesta enviada exitosamente",
-                "submission_id": response_id,
-                "next_step": next_step
-            }
+    # Save to file and update the session, off the event loop
+    next_step = await run_storage(
+        store_survey_response, submission.questionnaire_id, submission.respondent_cedula, response_data
+    )
+    if next_step is not None:
+        return {
+            "success": True,
+            "message": "Encuesta enviada exitosamente",
+            "submission_id": response_id,
+            "next_step": next_step
+        }
     
     return {
         "success": True,
@@ -1106,13 +1006,48 @@ async def get_all_responses(questionnaire_id: str):
     # Verify questionnaire exists
     load_questionnaire(questionnaire_id)
     
-    responses = load_responses(questionnaire_id)
+    responses = await run_storage(load_responses, questionnaire_id)
     return {
         "questionnaire_id": questionnaire_id,
         "responses": responses,
         "total": len(responses)
     }
 
+def store_form_response(form_id: str, data: Dict[str, Any], response_data: dict) -> Optional[str]:
+    """Save a form submission; datos-generales also (re)starts the session. Returns the next step, if any."""
+    save_form_response(form_id, response_data)
+    
+    # --- SESSION UPDATE LOGIC ---
+    if form_id == "datos-generales":
+        cedula = data.get("numero_identificacion")
+        nombre = data.get("nombre_completo")
+        
+        if cedula:
+            with repo.session_lock(cedula):
+                existing_session = repo.get_session(cedula) or {}
+            
+                # Merge completed forms
+                completed = set(existing_session.get("completed_forms", []))
+                completed.add(form_id)
+            
+                # Logic for Intralaboral Form Selection, stored in the session so
+                # later submits and the analysis do not go back to datos-generales
+                # If has personnel (Si) -> Do Intralaboral A (Skip B)
+                # If no personnel (No) -> Do Intralaboral B (Skip A)
+                new_session = {
+                    "cedula": cedula,
+                    "name": nombre or existing_session.get("name"),
+                    **respondent_routing(data),
+                    "last_active": datetime.now().isoformat(),
+                }
+                new_session["completed_forms"] = list(enforce_intralaboral_exclusion(new_session, completed))
+                # Determine next step (re-calculation)
+                new_session["current_step"] = get_next_step(new_session["completed_forms"])
+            
+                save_session(new_session)
+                return new_session["current_step"]
+    return None
+
 @app.post("/api/submit-form")
 async def submit_form(submission: FormSubmission):
     """Submit form data (datos generales)"""
@@ -1124,53 +1059,15 @@ async def submit_form(submission: FormSubmission):
         "data": submission.data
     }
     
-    # Save to file
-    save_form_response(submission.form_id, response_data)
-    
-    # --- SESSION UPDATE LOGIC ---
-    if submission.form_id == "datos-generales":
-        cedula = submission.data.get("numero_identificacion")
-        nombre = submission.data.get("nombre_completo")
-        
-        if cedula:
-            sessions = load_sessions()
-            existing_session = sessions.get(cedula, {})
-            
-            # Merge completed forms
-            completed = set(existing_session.get("completed_forms", []))
-            completed.add(submission.form_id)
-            
-            # Logic for Intralaboral Form Selection
-            # If has personnel (Si) -> Do Intralaboral A (Skip B)
-            # If no personnel (No) -> Do Intralaboral B (Skip A)
-            personal_cargo = submission.data.get("tiene_personal_cargo")
-            
-            if personal_cargo == "si":
-                completed.add("intralaborales-b")
-                if "intralaborales-a" in completed:
-                    completed.remove("intralaborales-a")
-            elif personal_cargo == "no":
-                completed.add("intralaborales-a")
-                if "intralaborales-b" in completed:
-                    completed.remove("intralaborales-b")
-            
-            new_session = {
-                "cedula": cedula,
-                "name": nombre or existing_session.get("name"),
-                "completed_forms": list(completed),
-                "last_active": datetime.now().isoformat(),
-            }
-            # Determine next step (re-calculation)
-            new_session["current_step"] = get_next_step(new_session["completed_forms"])
-            
-            save_session(new_session)
-            
-            return {
-                "success": True,
-                "message": "Datos guardados exitosamente",
-                "submission_id": response_id,
-                "next_step": new_session["current_step"]
-            }
+    # Save to file and update the session, off the event loop
+    next_step = await run_storage(store_form_response, submission.form_id, submission.data, response_data)
+    if next_step is not None:
+        return {
+            "success": True,
+            "message": "Datos guardados exitosamente",
+            "submission_id": response_id,
+            "next_step": next_step
+        }
 
     return {
         "success": True,
@@ -1181,7 +1078,7 @@ async def submit_form(submission: FormSubmission):
 @app.get("/api/form-responses/{form_id}")
 async def get_form_responses(form_id: str):
     """Get all saved responses for a form"""
-    responses = load_form_responses(form_id)
+    responses = await run_storage(load_form_responses, form_id)
     return {
         "form_id": form_id,
         "responses": responses,
@@ -1191,19 +1088,18 @@ async def get_form_responses(form_id: str):
 @app.get("/api/lookup-cedula/{cedula}")
 async def lookup_cedula(cedula: str):
     """Look up respondent data by cedula from datos-generales form"""
-    responses = load_form_responses("datos-generales")
+    response = await run_storage(repo.latest_form_response, "datos-generales", cedula)
     
-    for response in responses:
+    if response:
         data = response.get("data", {})
-        if data.get("numero_identificacion") == cedula:
-            return {
-                "found": True,
-                "cedula": cedula,
-                "nombre": data.get("nombre_completo"),
-                "departamento": data.get("departamento_area"),
-                "cargo": data.get("nombre_cargo"),
-                "tipo_cargo": data.get("tipo_cargo")
-            }
+        return {
+            "found": True,
+            "cedula": cedula,
+            "nombre": data.get("nombre_completo"),
+            "departamento": data.get("departamento_area"),
+            "cargo": data.get("nombre_cargo"),
+            "tipo_cargo": data.get("tipo_cargo")
+        }
     
     return {
         "found": False,
@@ -1217,8 +1113,7 @@ async def lookup_cedula(cedula: str):
 @app.get("/api/analysis-report")
 async def get_analysis_report():
     """Get the full analysis report for all questionnaires"""
-    engine = AnalysisEngine(DATA_DIR, QUESTIONNAIRES_DIR)
-    return engine.get_global_report()
+    return await run_analysis(analysis_engine.get_global_report)
 
 @app.post("/api/ai-analysis")
 async def generate_ai_analysis(data: Dict[str, Any]):
@@ -1251,134 +1146,230 @@ async def generate_ai_analysis(data: Dict[str, Any]):
 @app.get("/api/statistics/{questionnaire_id}")
 async def get_statistics(questionnaire_id: str):
     """Get survey statistics for a questionnaire"""
-    questionnaire = load_questionnaire(questionnaire_id)
-    responses = load_responses(questionnaire_id)
-    
-    if not responses:
-        return {
-            "questionnaire_id": questionnaire_id,
-            "questionnaire_name": questionnaire.get("name"),
-            "total_responses": 0,
-            "question_stats": {},
-            "options": questionnaire.get("options", [])
-        }
-    
-    # Calculate statistics per question
-    question_stats = {}
-    options = questionnaire.get("options", [])
-    option_values = [opt["value"] for opt in options]
-    
-    for question in questionnaire.get("questions", []):
-        q_id = question["id"]
-        values = []
-        for response in responses:
-            for r in response["responses"]:
-                if r["question_id"] == q_id:
-                    try:
-                        values.append(int(r["response_value"]))
-                    except (ValueError, TypeError):
-                        pass  # skip malformed entries
-        
-        if values:
-            avg = sum(values) / len(values)
-            distribution = {int(v): values.count(int(v)) for v in option_values}
-            
-            question_stats[q_id] = {
-                "question_text": question["text"],
-                "category": question.get("category", ""),
-                "average": round(avg, 2),
-                "total_responses": len(values),
-                "distribution": distribution
-            }
-    
+    definition = get_definition(questionnaire_id)
+    questionnaire = definition.data
+    # Recomputed only when the responses or the questionnaire definition change
+    revision = (await run_storage(repo.revision, [questionnaire_id]), definition.signature)
+    total, question_stats = await run_analysis(
+        statistics_cache.get,
+        questionnaire_id,
+        revision,
+        lambda: question_statistics(definition.questions, definition.options, repo.iter_responses(questionnaire_id)),
+    )
+
     return {
         "questionnaire_id": questionnaire_id,
         "questionnaire_name": questionnaire.get("name"),
-        "total_responses": len(responses),
+        "total_responses": total,
         "question_stats": question_stats,
         "options": questionnaire.get("options", [])
     }
 
-@app.get("/api/export/excel/{questionnaire_id}")
-async def export_excel(questionnaire_id: str):
-    """Export questionnaire responses to Excel file"""
-    try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    except ImportError:
-        raise HTTPException(status_code=500, detail="openpyxl not installed")
-    
-    # Load questionnaire and responses
+def response_sheet(questionnaire_id: str, title: str = "Respuestas") -> Optional[Sheet]:
+    """Sheet of every response of a questionnaire (None if there are none); rows are read lazily."""
     questionnaire = load_questionnaire(questionnaire_id)
-    responses = load_responses(questionnaire_id)
-    
-    if not responses:
-        raise HTTPException(status_code=404, detail="No responses found")
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Respuestas"
-    
-    # Styles
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="6366F1", end_color="6366F1", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Build headers
+    responses = repo.iter_responses(questionnaire_id)
+    first = next(responses, None)
+    if first is None:
+        return None
+
     questions = questionnaire.get("questions", [])
     headers = ["ID", "Fecha", "Cédula", "Nombre", "Departamento"]
     for q in questions:
         headers.append(f"P{q['id']}: {q['text'][:50]}...")
-    
-    # Write headers
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-    
-    # Write data
-    for row_idx, response in enumerate(responses, 2):
-        # Build response dict for quick lookup
-        response_dict = {r["question_id"]: r["response_value"] for r in response.get("responses", [])}
-        
-        # Basic info
-        ws.cell(row=row_idx, column=1, value=response.get("id", "")[:8])
-        ws.cell(row=row_idx, column=2, value=response.get("submitted_at", "")[:10])
-        ws.cell(row=row_idx, column=3, value=response.get("respondent_cedula", ""))
-        ws.cell(row=row_idx, column=4, value=response.get("respondent_name", ""))
-        ws.cell(row=row_idx, column=5, value=response.get("department", ""))
-        
-        # Question responses
-        for col_idx, q in enumerate(questions, 6):
-            value = response_dict.get(q["id"], "")
-            ws.cell(row=row_idx, column=col_idx, value=value)
-    
-    # Adjust column widths
-    ws.column_dimensions['A'].width = 10
-    ws.column_dimensions['B'].width = 12
-    ws.column_dimensions['C'].width = 15
-    ws.column_dimensions['D'].width = 25
-    ws.column_dimensions['E'].width = 20
-    
-    # Save to buffer
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    
+
+    def rows():
+        for response in itertools.chain([first], responses):
+            response_dict = {r["question_id"]: r["response_value"] for r in response.get("responses", [])}
+            yield [
+                response.get("id", "")[:8],
+                response.get("submitted_at", "")[:10],
+                response.get("respondent_cedula", ""),
+                response.get("respondent_name", ""),
+                response.get("department", ""),
+                *(response_dict.get(q["id"], "") for q in questions),
+            ]
+
+    return Sheet(title, headers, rows(), widths=(10, 12, 15, 25, 20))
+
+
+def _required_sheet(questionnaire_id: str) -> Sheet:
+    sheet = response_sheet(questionnaire_id)
+    if sheet is None:
+        raise HTTPException(status_code=404, detail="No responses found")
+    return sheet
+
+
+def build_excel_export(questionnaire_id: str):
+    """Workbook with every response of a questionnaire: (spooled file, filename)."""
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=500, detail="openpyxl not installed")
+
+    export = spooled_xlsx([_required_sheet(questionnaire_id)])
     filename = f"respuestas_{questionnaire_id}_{datetime.now().strftime('%Y%m%d')}.xlsx"
-    
+    return export, filename
+
+
+def build_csv_export(questionnaire_id: str):
+    """Same rows as the Excel export, as CSV: (spooled file, filename)."""
+    export = spooled_csv(_required_sheet(questionnaire_id))
+    filename = f"respuestas_{questionnaire_id}_{datetime.now().strftime('%Y%m%d')}.csv"
+    return export, filename
+
+
+def _cell(value):
+    """Form values as spreadsheet cells (multi-select answers are lists)."""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def form_sheet() -> Sheet:
+    """Sheet of the datos-generales forms, one column per form field."""
+    fields = [
+        field
+        for section in load_questionnaire("datos-generales").get("sections", [])
+        for field in section.get("fields", [])
+    ]
+    headers = ["Fecha", "Cédula"] + [field["label"][:50] for field in fields]
+
+    def rows():
+        for record in repo.list_form_responses("datos-generales"):
+            data = record.get("data") or {}
+            yield [
+                record.get("submitted_at", "")[:10],
+                form_cedula(record),
+                *(_cell(data.get(field["id"], "")) for field in fields),
+            ]
+
+    return Sheet("Datos generales", headers, rows(), widths=(12, 15, 25))
+
+
+# Column groups of the campaign results sheet: (header prefix, key in "cuestionarios")
+CAMPAIGN_RESULTS = (
+    ("Intralaboral", "intralaboral"),
+    ("Extralaboral", "extralaboral"),
+    ("Estrés", "estres"),
+)
+
+
+def campaign_sheets(scored: List[Dict[str, Any]]) -> List[Sheet]:
+    """Results, domains and dimensions sheets of ``AnalysisService.score_campaign`` rows."""
+    results_header = ["Cédula", "Nombre", "Área", "Cargo", "Tipo de cargo", "Forma"]
+    for title, _ in CAMPAIGN_RESULTS:
+        results_header += [f"{title} puntaje", f"{title} nivel"]
+    results_header += ["Total general puntaje", "Total general nivel"]
+
+    def score_cells(result: Optional[Dict]) -> List:
+        if not result or "puntaje_transformado" not in result:
+            return ["", ""]
+        return [result["puntaje_transformado"], result["nivel_riesgo"]]
+
+    def results_rows():
+        for row in scored:
+            meta = row["meta"]
+            cells = [
+                row["cedula"],
+                meta.get("nombre_completo", ""),
+                meta.get("departamento_area", ""),
+                meta.get("nombre_cargo", ""),
+                row["tipo_cargo"] or "",
+                row["forma"],
+            ]
+            for _, key in CAMPAIGN_RESULTS:
+                cells += score_cells(row["cuestionarios"].get(key))
+            yield cells + score_cells(row["total_general"])
+
+    def domain_rows():
+        for row in scored:
+            intra = row["cuestionarios"].get("intralaboral") or {}
+            for dominio, data in intra.get("dominios", {}).items():
+                yield [row["cedula"], intra["cuestionario"], dominio,
+                       data["puntaje_bruto"], data["puntaje_transformado"], data["nivel_riesgo"]]
+
+    def dimension_rows():
+        for row in scored:
+            intra = row["cuestionarios"].get("intralaboral") or {}
+            for dominio, data in intra.get("dominios", {}).items():
+                for dimension, dim in data["dimensiones"].items():
+                    yield [row["cedula"], intra["cuestionario"], dominio, dimension,
+                           dim["puntaje_bruto"], dim["puntaje_transformado"], dim["nivel_riesgo"]]
+            extra = row["cuestionarios"].get("extralaboral") or {}
+            for dimension, dim in extra.get("dimensiones", {}).items():
+                yield [row["cedula"], "extralaborales", "", dimension,
+                       dim["puntaje_bruto"], dim["puntaje_transformado"], dim["nivel_riesgo"]]
+
+    detail = ["Puntaje bruto", "Puntaje transformado", "Nivel de riesgo"]
+    return [
+        Sheet("Resultados", results_header, results_rows(), widths=(15, 25, 20, 25, 20, 8)),
+        Sheet("Dominios", ["Cédula", "Cuestionario", "Dominio"] + detail, domain_rows(), widths=(15, 18, 40)),
+        Sheet("Dimensiones", ["Cédula", "Cuestionario", "Dominio", "Dimensión"] + detail,
+              dimension_rows(), widths=(15, 18, 40, 45)),
+    ]
+
+
+def build_campaign_export():
+    """One workbook for the whole campaign: scored results, datos-generales and
+    the raw responses of each questionnaire: (spooled file, filename)."""
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=500, detail="openpyxl not installed")
+
+    scored = analisis_service.score_campaign()
+    if not scored:
+        raise HTTPException(status_code=404, detail="No responses found")
+
+    def sheets():
+        yield from campaign_sheets(scored)
+        yield form_sheet()
+        for questionnaire_id in SEQUENCE[1:]:
+            sheet = response_sheet(questionnaire_id, f"Respuestas {questionnaire_id}")
+            if sheet is not None:
+                yield sheet
+
+    export = spooled_xlsx(sheets())
+    filename = f"campana_{datetime.now().strftime('%Y%m%d')}.xlsx"
+    return export, filename
+
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv"
+
+
+@app.get("/api/export/excel/{questionnaire_id}")
+async def export_excel(questionnaire_id: str):
+    """Export questionnaire responses to Excel file"""
+    export, filename = await run_storage(build_excel_export, questionnaire_id)
+    return StreamingResponse(
+        iter_file(export),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@app.get("/api/export/campaign")
+async def export_campaign():
+    """Export the whole campaign (scores, datos-generales, raw responses) to one Excel file"""
+    export, filename = await run_analysis(build_campaign_export)
+    return StreamingResponse(
+        iter_file(export),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@app.get("/api/export/csv/{questionnaire_id}")
+async def export_csv(questionnaire_id: str):
+    """Export questionnaire responses to CSV (for exports too large for Excel)"""
+    export, filename = await run_storage(build_csv_export, questionnaire_id)
     return StreamingResponse(
-        buffer,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        iter_file(export),
+        media_type=CSV_MEDIA_TYPE,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
@@ -1396,8 +1387,7 @@ async def get_auth_config():
 @app.get("/api/session/{cedula}")
 async def get_session(cedula: str):
     """Get session status for a user"""
-    sessions = load_sessions()
-    session = sessions.get(cedula)
+    session = await run_storage(repo.get_session, cedula)
     
     if session:
         # Calculate progress
@@ -1418,60 +1408,67 @@ async def get_session(cedula: str):
     return {"found": False}
 
 
-# Serve frontend static files
+# Serve frontend static files (ETag, gzip/brotli, see services/http_cache.py)
+frontend_files = CachedStaticFiles(directory=FRONTEND_DIR, html=True)
+
+
+def serve_page(request: Request, filename: str) -> Response:
+    return frontend_files.response(os.path.join(FRONTEND_DIR, filename), request.headers, request.url.query)
+
+
 @app.get("/")
-async def serve_index():
+async def serve_index(request: Request):
     """Serve the questionnaire selector page"""
-    return FileResponse(os.path.join(FRONTEND_DIR, "index.html"))
+    return serve_page(request, "index.html")
 
 @app.get("/encuesta/{questionnaire_id}")
-async def serve_survey(questionnaire_id: str):
+async def serve_survey(questionnaire_id: str, request: Request):
     """Serve the survey page for a specific questionnaire"""
-    return FileResponse(os.path.join(FRONTEND_DIR, "encuesta.html"))
+    return serve_page(request, "encuesta.html")
 
 @app.get("/resultados/{questionnaire_id}")
-async def serve_results(questionnaire_id: str):
+async def serve_results(questionnaire_id: str, request: Request):
     """Serve the results page for a specific questionnaire"""
-    return FileResponse(os.path.join(FRONTEND_DIR, "resultados.html"))
+    return serve_page(request, "resultados.html")
 
 @app.get("/ficha-datos")
-async def serve_ficha_datos():
+async def serve_ficha_datos(request: Request):
     """Serve the ficha de datos generales page"""
-    return FileResponse(os.path.join(FRONTEND_DIR, "ficha-datos.html"))
+    return serve_page(request, "ficha-datos.html")
 
 @app.get("/resultados-dashboard")
-async def serve_results_dashboard():
+async def serve_results_dashboard(request: Request):
     """Serve the results dashboard page"""
-    return FileResponse(os.path.join(FRONTEND_DIR, "resultados-dashboard.html"))
+    return serve_page(request, "resultados-dashboard.html")
 
 @app.get("/reporte-global")
-async def serve_global_report():
+async def serve_global_report(request: Request):
     """Serve the global analysis report page"""
-    return FileResponse(os.path.join(FRONTEND_DIR, "reporte-global.html"))
+    return serve_page(request, "reporte-global.html")
 
 @app.get("/reporte-premium")
-async def serve_premium_report():
+async def serve_premium_report(request: Request):
     """Serve the premium multi-page report"""
-    return FileResponse(os.path.join(FRONTEND_DIR, "reporte-premium.html"))
+    return serve_page(request, "reporte-premium.html")
 
 # Legacy routes for backwards compatibility
 @app.get("/encuesta")
-async def serve_survey_legacy():
+async def serve_survey_legacy(request: Request):
     """Redirect to selector if no questionnaire specified"""
-    return FileResponse(os.path.join(FRONTEND_DIR, "index.html"))
+    return serve_page(request, "index.html")
 
 @app.get("/resultados")
-async def serve_results_legacy():
+async def serve_results_legacy(request: Request):
     """Redirect to selector if no questionnaire specified"""
-    return FileResponse(os.path.join(FRONTEND_DIR, "index.html"))
+    return serve_page(request, "index.html")
 
 @app.get("/analisis-dashboard")
-async def serve_analysis_dashboard():
+async def serve_analysis_dashboard(request: Request):
     """Serve the psychosocial analysis dashboard"""
-    return FileResponse(os.path.join(FRONTEND_DIR, "analisis-dashboard.html"))
+    return serve_page(request, "analisis-dashboard.html")
 
 # Mount static files (CSS, JS) - must be after API routes
-app.mount("/", StaticFiles(directory=FRONTEND_DIR, html=True), name="static")
+app.mount("/", frontend_files, name="static")
 
 if __name__ == "__main__":
     import uvicorn
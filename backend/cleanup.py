@@ -27,9 +27,9 @@ def clean_data():
         print(f"\nDirectory not found: {data_dir}")
         return
 
-    # Files to delete: all .json files in the data directory
+    # Files to delete: all .json files and response journals (.jsonl) in the data directory
     # We use glob to match patterns
-    files = glob.glob(os.path.join(data_dir, "*.json"))
+    files = glob.glob(os.path.join(data_dir, "*.json")) + glob.glob(os.path.join(data_dir, "*.jsonl"))
     
     if not files:
         print("\nNo data files found to delete.")
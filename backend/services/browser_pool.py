@@ -0,0 +1,175 @@
+"""
+Shared headless Chromium for every HTML → PDF conversion.
+
+Launching Chromium costs far more than rendering one report, so instead of
+``async_playwright()`` + ``chromium.launch()`` per PDF, one browser is kept
+alive and each render gets its own short-lived context/page:
+
+- ``PDF_MAX_PAGES`` (default 4) bounds concurrent renders; extra requests wait.
+- The browser is checked before each render and relaunched if it crashed; a
+  render interrupted by a crash is retried once on the new browser.
+- After ``PDF_RECYCLE_AFTER`` renders (default 200) a fresh browser takes over
+  and the old one is closed once its in-flight pages finish, which bounds
+  Chromium's memory growth.
+
+``app.py`` starts the pool in the FastAPI lifespan and stops it on shutdown;
+if nobody started it, the first render starts it.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "4"))
+PDF_RECYCLE_AFTER = int(os.getenv("PDF_RECYCLE_AFTER", "200"))
+
+
+class BrowserCrashedError(RuntimeError):
+    """The browser died while a page was rendering."""
+
+
+class BrowserPool:
+    """One long-lived Chromium serving a bounded number of concurrent pages."""
+
+    def __init__(self, max_pages: int = PDF_MAX_PAGES, recycle_after: int = PDF_RECYCLE_AFTER):
+        self.max_pages = max(1, max_pages)
+        self.recycle_after = max(1, recycle_after)
+        self.total_renders = 0
+        self.restarts = 0
+        self._reset()
+
+    def _reset(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._playwright = None
+        self._browser = None
+        self._renders = 0                   # renders served by the current browser
+        self._in_flight: Dict[Any, int] = {}
+
+    def _bind_loop(self):
+        """Playwright objects belong to the loop that created them."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._reset()
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.max_pages)
+
+    # ─── Lifecycle ─────────────────────────────────────────────
+
+    async def start(self):
+        """Start Playwright and launch the browser (idempotent)."""
+        self._bind_loop()
+        async with self._lock:
+            await self._ensure_browser()
+
+    async def stop(self):
+        if self._lock is None or self._loop is not asyncio.get_running_loop():
+            self._reset()
+            return
+        async with self._lock:
+            for browser in list(self._in_flight):
+                await self._close(browser)
+            if self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception as e:
+                    print(f"Error stopping Playwright: {e}")
+        self._reset()
+
+    async def _launch(self):
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch()
+
+    async def _ensure_browser(self):
+        """Current browser, relaunched if it crashed or served ``recycle_after`` renders."""
+        browser = self._browser
+        if browser is not None and browser.is_connected() and self._renders < self.recycle_after:
+            return browser
+        if browser is not None:
+            if browser.is_connected():
+                await self._retire(browser)
+            else:
+                print("PDF browser disconnected, relaunching")
+                self._in_flight.pop(browser, None)
+            self.restarts += 1
+        self._browser = browser = await self._launch()
+        self._renders = 0
+        self._in_flight[browser] = 0
+        return browser
+
+    async def _retire(self, browser):
+        """Stop handing out ``browser``; close it once its pages are done."""
+        if not self._in_flight.get(browser):
+            await self._close(browser)
+
+    async def _close(self, browser):
+        self._in_flight.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception as e:
+            print(f"Error closing PDF browser: {e}")
+
+    # ─── Rendering ─────────────────────────────────────────────
+
+    @asynccontextmanager
+    async def page(self):
+        """A fresh page in its own context; closed (and its slot freed) on exit."""
+        self._bind_loop()
+        async with self._slots:
+            async with self._lock:
+                browser = await self._ensure_browser()
+                self._renders += 1
+                self._in_flight[browser] += 1
+            context = None
+            try:
+                context = await browser.new_context()
+                yield await context.new_page()
+            except Exception as e:
+                if not browser.is_connected():
+                    raise BrowserCrashedError(str(e)) from e
+                raise
+            finally:
+                if context is not None and browser.is_connected():
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        print(f"Error closing PDF context: {e}")
+                async with self._lock:
+                    self.total_renders += 1
+                    if browser in self._in_flight:
+                        self._in_flight[browser] -= 1
+                        if browser is not self._browser and self._in_flight[browser] == 0:
+                            await self._close(browser)
+
+    async def render_pdf(self, html: str, wait_until: str = "networkidle", **pdf_options) -> bytes:
+        """Render ``html`` and return ``page.pdf(**pdf_options)``."""
+        try:
+            return await self._render_once(html, wait_until, pdf_options)
+        except BrowserCrashedError as e:
+            print(f"PDF browser crashed during render, retrying: {e}")
+            return await self._render_once(html, wait_until, pdf_options)
+
+    async def _render_once(self, html: str, wait_until: str, pdf_options: Dict) -> bytes:
+        async with self.page() as page:
+            await page.set_content(html, wait_until=wait_until)
+            return await page.pdf(**pdf_options)
+
+    def health(self) -> Dict[str, Any]:
+        browser = self._browser
+        return {
+            "running":       browser is not None,
+            "connected":     bool(browser is not None and browser.is_connected()),
+            "max_pages":     self.max_pages,
+            "in_flight":     sum(self._in_flight.values()),
+            "renders":       self._renders,
+            "recycle_after": self.recycle_after,
+            "total_renders": self.total_renders,
+            "restarts":      self.restarts,
+        }
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,153 @@
+"""
+Worker pools for the blocking work of the request handlers, and event-loop lag.
+
+Every handler is ``async def``, so storage reads/writes and scoring called
+directly from them ran on the event loop: one slow group report stalled every
+employee's submit. Handlers now hand that work to one of two sized pools:
+
+- ``storage_pool`` (``STORAGE_WORKERS``, default 16): journal appends, session
+  saves, index lookups, listings, exports of raw responses;
+- ``analysis_pool`` (``ANALYSIS_WORKERS``, default 4): scoring, group
+  aggregates, statistics and the campaign export. Kept small so a burst of
+  reports cannot take every thread away from submits.
+
+``LoopLagMonitor`` measures how late the event loop wakes up from a short
+sleep; ``GET /api/metrics/event-loop`` reports it with the pools' load.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+STORAGE_WORKERS = int(os.getenv("STORAGE_WORKERS", "16"))
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+
+# Sampling period of the lag monitor and number of samples kept (~1 min)
+LOOP_LAG_INTERVAL_MS = int(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_LAG_WINDOW = 600
+# A wake-up this late counts as a stall
+LOOP_STALL_MS = 100
+
+
+class BlockingPool:
+    """Named thread pool for blocking calls from async handlers."""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.name)
+            return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Await ``fn(*args, **kwargs)`` run in the pool (context variables included)."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(self._get_executor(), call)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.max_workers, "in_flight": self.in_flight, "completed": self.completed}
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how much later than asked a short sleep returns."""
+
+    def __init__(self, interval_ms: int = LOOP_LAG_INTERVAL_MS, window: int = LOOP_LAG_WINDOW):
+        self.interval = interval_ms / 1000.0
+        self.samples: deque = deque(maxlen=window)   # lag in seconds
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(time.perf_counter() - started - self.interval)
+
+    def record(self, lag: float):
+        lag = max(lag, 0.0)
+        self.samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag * 1000 >= LOOP_STALL_MS:
+            self.stalls += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag over the last window (ms): current, mean, p99, max; max and stalls since start."""
+        samples = sorted(self.samples)
+        if not samples:
+            return {"running": self._task is not None, "samples": 0}
+
+        def ms(seconds: float) -> float:
+            return round(seconds * 1000, 2)
+
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_ms": ms(self.interval),
+            "samples": len(samples),
+            "current_ms": ms(self.samples[-1]),
+            "mean_ms": ms(sum(samples) / len(samples)),
+            "p99_ms": ms(samples[min(len(samples) - 1, int(len(samples) * 0.99))]),
+            "window_max_ms": ms(samples[-1]),
+            "max_ms": ms(self.max_lag),
+            "stalls": self.stalls,
+            "stall_threshold_ms": LOOP_STALL_MS,
+        }
+
+
+storage_pool = BlockingPool("storage", STORAGE_WORKERS)
+analysis_pool = BlockingPool("analysis", ANALYSIS_WORKERS)
+loop_lag = LoopLagMonitor()
+
+
+def run_storage(fn: Callable[..., Any], *args, **kwargs):
+    """Awaitable of ``fn(*args, **kwargs)`` on the storage pool."""
+    return storage_pool.run(fn, *args, **kwargs)
+
+
+def run_analysis(fn: Callable[..., Any], *args, **kwargs):
+    """Awaitable of ``fn(*args, **kwargs)`` on the analysis pool."""
+    return analysis_pool.run(fn, *args, **kwargs)
+
+
+def concurrency_stats() -> Dict[str, Any]:
+    return {
+        "event_loop": loop_lag.stats(),
+        "pools": {pool.name: pool.stats() for pool in (storage_pool, analysis_pool)},
+    }
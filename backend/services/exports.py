@@ -0,0 +1,116 @@
+"""
+Streaming spreadsheet exports.
+
+The Excel export used to build a regular ``Workbook`` (every cell an object in
+memory) and save it to a ``BytesIO``; with Forma A's 123 questions and
+thousands of respondents that is hundreds of thousands of cells held at once.
+Here:
+
+- rows are produced lazily from the response store (``Sheet.rows`` is any
+  iterable) and written to a write-only workbook, which flushes each row to
+  disk instead of keeping cell objects around;
+- the result goes to a ``SpooledTemporaryFile`` (in memory up to
+  ``EXPORT_SPOOL_MB``, 8 MB by default, on disk beyond) that is streamed to
+  the client with ``iter_file``;
+- ``write_csv`` is the plain-CSV alternative for exports too large to open
+  comfortably in Excel.
+"""
+import csv
+import io
+import os
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Sequence
+
+EXPORT_SPOOL_MB = float(os.getenv("EXPORT_SPOOL_MB", "8"))
+CHUNK_SIZE = 64 * 1024
+
+HEADER_COLOR = "6366F1"
+
+
+class Sheet(NamedTuple):
+    title: str
+    header: List[str]
+    rows: Iterable[Sequence]            # consumed once, while writing
+    widths: Sequence[float] = ()        # first columns' widths, in Excel units
+
+
+def _spool() -> BinaryIO:
+    return tempfile.SpooledTemporaryFile(max_size=int(EXPORT_SPOOL_MB * 1024 * 1024))
+
+
+def _header_cells(ws, header: List[str]):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+    font = Font(bold=True, color="FFFFFF")
+    fill = PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type="solid")
+    alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    side = Side(style="thin")
+    border = Border(left=side, right=side, top=side, bottom=side)
+    cells = []
+    for value in header:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font, cell.fill, cell.alignment, cell.border = font, fill, alignment, border
+        cells.append(cell)
+    return cells
+
+
+def write_xlsx(sheets: Iterable[Sheet], target: BinaryIO):
+    """Write ``sheets`` to ``target`` with openpyxl's write-only workbook."""
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    for sheet in sheets:
+        ws = wb.create_sheet(sheet.title[:31])
+        # Column widths must be set before the first row is written
+        for col, width in enumerate(sheet.widths, 1):
+            ws.column_dimensions[get_column_letter(col)].width = width
+        ws.append(_header_cells(ws, sheet.header))
+        for row in sheet.rows:
+            ws.append(row)
+    wb.save(target)
+
+
+def spooled_xlsx(sheets: Iterable[Sheet]) -> BinaryIO:
+    """Workbook in a spooled temporary file, positioned at the start."""
+    target = _spool()
+    try:
+        write_xlsx(sheets, target)
+    except BaseException:
+        target.close()
+        raise
+    target.seek(0)
+    return target
+
+
+def write_csv(sheet: Sheet, target: BinaryIO):
+    """Write one sheet as UTF-8 CSV (with BOM, so Excel detects the encoding)."""
+    text = io.TextIOWrapper(target, encoding="utf-8-sig", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(sheet.header)
+    writer.writerows(sheet.rows)
+    text.flush()
+    text.detach()
+
+
+def spooled_csv(sheet: Sheet) -> BinaryIO:
+    """CSV in a spooled temporary file, positioned at the start."""
+    target = _spool()
+    try:
+        write_csv(sheet, target)
+    except BaseException:
+        target.close()
+        raise
+    target.seek(0)
+    return target
+
+
+def iter_file(f: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the rest of ``f`` in chunks, closing it at the end."""
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,181 @@
+"""
+HTTP caching for the frontend pages and the questionnaire definitions.
+
+Employees open the surveys from phones on plant networks, where re-downloading
+tens of KB of HTML and questionnaire JSON on every page load is what makes the
+first question slow. ``CachedContent`` holds one representation in memory
+with:
+
+- a strong ETag derived from the content (not the mtime), so identical files
+  on different servers or after a redeploy still revalidate with ``304``;
+- ``Last-Modified`` / ``If-Modified-Since`` as a fallback;
+- gzip (and brotli, if the optional ``brotli`` package is installed) variants
+  compressed once, the first time a client asks for them.
+
+``CachedStaticFiles`` serves the frontend directory through that cache:
+HTML and other files revalidate on every load (``no-cache``), while a
+fingerprinted URL (``styles.css?v=<hash>`` with the file's current hash, or a
+``name.<hash>.ext`` file name) is served as ``immutable`` for a year.
+Files larger than ``STATIC_CACHE_MAX_BYTES`` (2 MB) keep the default
+``StaticFiles`` behaviour.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+STATIC_CACHE_MAX_BYTES = int(os.getenv("STATIC_CACHE_MAX_BYTES", str(2 * 1024 * 1024)))
+
+# Below this size compression does not pay for the extra headers
+MIN_COMPRESS_BYTES = 1024
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+NO_CACHE = "no-cache"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+FINGERPRINTED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CachedContent:
+    """One cacheable representation plus its lazily built compressed variants."""
+
+    def __init__(self, body: bytes, media_type: str, mtime: Optional[float] = None):
+        self.body = body
+        self.media_type = media_type
+        self.hash = content_hash(body)
+        self.etag = f'"{self.hash}"'
+        self.last_modified = formatdate(mtime, usegmt=True) if mtime is not None else None
+        self.compressible = len(body) >= MIN_COMPRESS_BYTES and media_type.startswith(COMPRESSIBLE_TYPES)
+        self._variants: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def variant(self, coding: str) -> bytes:
+        with self._lock:
+            data = self._variants.get(coding)
+            if data is None:
+                if coding == "br":
+                    data = brotli.compress(self.body, quality=11)
+                else:
+                    data = gzip.compress(self.body, compresslevel=9, mtime=0)
+                self._variants[coding] = data
+            return data
+
+    def _negotiate(self, request_headers: Headers) -> Tuple[Optional[str], bytes]:
+        if self.compressible:
+            accept = request_headers.get("accept-encoding", "")
+            if brotli is not None and _accepts(accept, "br"):
+                return "br", self.variant("br")
+            if _accepts(accept, "gzip"):
+                return "gzip", self.variant("gzip")
+        return None, self.body
+
+    def _not_modified(self, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            # Any encoding of the same content matches
+            variants = {self.etag, f'"{self.hash}-gzip"', f'"{self.hash}-br"'}
+            return "*" in tags or bool(tags & variants)
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since and self.last_modified:
+            try:
+                return parsedate_to_datetime(self.last_modified) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def response(self, request_headers: Headers, cache_control: str = NO_CACHE, status_code: int = 200) -> Response:
+        """Full, compressed or ``304`` response for a request with ``request_headers``."""
+        headers = {"Cache-Control": cache_control, "ETag": self.etag}
+        if self.compressible:
+            headers["Vary"] = "Accept-Encoding"
+        if self.last_modified:
+            headers["Last-Modified"] = self.last_modified
+        if status_code == 200 and self._not_modified(request_headers):
+            return Response(status_code=304, headers=headers)
+        coding, body = self._negotiate(request_headers)
+        if coding is not None:
+            headers["Content-Encoding"] = coding
+            headers["ETag"] = f'"{self.hash}-{coding}"'
+        return Response(body, status_code=status_code, media_type=self.media_type, headers=headers)
+
+
+class CachedStaticFiles(StaticFiles):
+    """``StaticFiles`` answering from an in-memory, content-hashed cache."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache: Dict[str, Tuple[Tuple[int, int], CachedContent]] = {}
+        self._cache_lock = threading.Lock()
+
+    def content(self, full_path: str, stat_result: Optional[os.stat_result] = None) -> Optional[CachedContent]:
+        """Cached content of a file, re-read when its mtime or size changes."""
+        if stat_result is None:
+            try:
+                stat_result = os.stat(full_path)
+            except OSError:
+                return None
+        if stat_result.st_size > STATIC_CACHE_MAX_BYTES:
+            return None
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
+        with self._cache_lock:
+            entry = self._cache.get(full_path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        with open(full_path, "rb") as f:
+            body = f.read()
+        # Same media type guess as FileResponse
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+        content = CachedContent(body, media_type, stat_result.st_mtime)
+        with self._cache_lock:
+            self._cache[full_path] = (signature, content)
+        return content
+
+    def response(self, full_path: str, request_headers: Headers, query_string: str = "") -> Response:
+        """Response for a file of the directory, used by the page routes too."""
+        content = self.content(full_path)
+        if content is None:
+            return FileResponse(full_path) if os.path.isfile(full_path) else Response(status_code=404)
+        return content.response(request_headers, self._cache_control(full_path, content, query_string))
+
+    @staticmethod
+    def _cache_control(full_path: str, content: CachedContent, query_string: str) -> str:
+        if FINGERPRINTED_NAME.search(os.path.basename(full_path)):
+            return IMMUTABLE
+        version = QueryParams(query_string).get("v")
+        if version and content.hash.startswith(version) and len(version) >= 8:
+            return IMMUTABLE
+        return NO_CACHE
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        content = self.content(str(full_path), stat_result)
+        if content is None:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        query_string = scope.get("query_string", b"").decode("latin-1")
+        cache_control = self._cache_control(str(full_path), content, query_string)
+        return content.response(Headers(scope=scope), cache_control, status_code)
@@ -0,0 +1,261 @@
+"""
+In-process background jobs for long-running report and export work.
+
+Endpoints that can take minutes on large companies (group PDF, Excel export,
+ZIP of PDFs) can be run as "enqueue and fetch later" instead of holding the
+HTTP request open until a proxy times it out:
+
+    POST /api/jobs {"kind": ..., "params": {...}}   → job id
+    GET  /api/jobs/{id}                              → status
+    GET  /api/jobs/{id}/result                       → result file
+
+- Jobs live in a SQLite table (``JOBS_DB``, default ``data/jobs.db``), so
+  status and results survive restarts; jobs that were queued or running when
+  the server stopped are queued again on startup.
+- At most ``JOB_WORKERS`` jobs (default 2) run at once. Async handlers run on
+  the event loop, plain functions on the pool they were registered with
+  (``services.concurrency``: storage by default, analysis for scoring work).
+- Result files are kept under ``results_dir/<job id>/`` and deleted, with
+  their job rows, ``JOB_RETENTION_HOURS`` (default 24) after finishing.
+- Table and result-file I/O is blocking: ``submit``/``start`` and the job
+  runner do it on the storage pool, and endpoints should call ``get``,
+  ``list`` and ``result`` through ``run_storage``.
+"""
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+
+from .concurrency import run_storage
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id              TEXT PRIMARY KEY,
+    kind            TEXT NOT NULL,
+    params          TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    created_at      TEXT NOT NULL,
+    started_at      TEXT,
+    finished_at     TEXT,
+    error           TEXT,
+    result_path     TEXT,
+    result_filename TEXT,
+    media_type      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, finished_at);
+"""
+
+COLUMNS = (
+    "id", "kind", "params", "status", "created_at", "started_at", "finished_at",
+    "error", "result_path", "result_filename", "media_type",
+)
+
+
+class JobResult(NamedTuple):
+    content: Union[bytes, Iterable[bytes]]  # bytes, or chunks written as they come
+    filename: str
+    media_type: str
+
+
+Handler = Callable[[Dict[str, Any]], Union[JobResult, Awaitable[JobResult]]]
+# run_storage / run_analysis: awaitable of fn(*args) on a sized worker pool
+Runner = Callable[..., Awaitable[Any]]
+
+
+class JobQueue:
+    """Persistent job table plus a bounded set of asyncio workers."""
+
+    def __init__(
+        self,
+        db_path: str,
+        results_dir: str,
+        workers: int = JOB_WORKERS,
+        retention_hours: float = JOB_RETENTION_HOURS,
+    ):
+        self.db_path = db_path
+        self.results_dir = results_dir
+        self.workers = max(1, workers)
+        self.retention = timedelta(hours=retention_hours)
+        self.handlers: Dict[str, Handler] = {}
+        self.runners: Dict[str, Runner] = {}
+        self._local = threading.local()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def register(self, kind: str, handler: Handler, runner: Runner = run_storage):
+        """``runner`` runs a plain-function handler off the event loop."""
+        self.handlers[kind] = handler
+        self.runners[kind] = runner
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.workers)
+            self._tasks = {}
+
+    # ─── Lifecycle ─────────────────────────────────────────────
+
+    async def start(self):
+        """Purge expired jobs and resume the ones interrupted by a restart."""
+        self._bind_loop()
+        for job_id in await run_storage(self._requeue_interrupted):
+            self._spawn(job_id)
+
+    async def stop(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._tasks = {}
+
+    # ─── API ───────────────────────────────────────────────────
+
+    async def submit(self, kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Queue a job; raises KeyError for an unknown ``kind``."""
+        if kind not in self.handlers:
+            raise KeyError(kind)
+        self._bind_loop()
+        job = await run_storage(self._insert, kind, params or {})
+        self._spawn(job["id"])
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job row if it completed and its result file is still on disk."""
+        job = self.get(job_id)
+        if job is None or job["status"] != "completed" or not os.path.exists(job["result_path"] or ""):
+            return None
+        return job
+
+    def purge_expired(self, now: Optional[datetime] = None):
+        """Delete finished jobs (and their files) older than the retention period."""
+        cutoff = ((now or datetime.now()) - self.retention).isoformat()
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT id FROM jobs WHERE status IN ('completed', 'failed') AND finished_at < ?", (cutoff,)
+        ).fetchall()
+        for (job_id,) in rows:
+            shutil.rmtree(os.path.join(self.results_dir, job_id), ignore_errors=True)
+        if rows:
+            with conn:
+                conn.executemany("DELETE FROM jobs WHERE id = ?", rows)
+
+    def _insert(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.purge_expired()
+        job_id = uuid.uuid4().hex
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params, ensure_ascii=False), datetime.now().isoformat()),
+            )
+        return self.get(job_id)
+
+    def _requeue_interrupted(self) -> List[str]:
+        self.purge_expired()
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+        ).fetchall()
+        if rows:
+            with conn:
+                conn.executemany("UPDATE jobs SET status = 'queued', started_at = NULL WHERE id = ?", rows)
+        return [job_id for (job_id,) in rows]
+
+    # ─── Execution ─────────────────────────────────────────────
+
+    def _spawn(self, job_id: str):
+        task = self._loop.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _run(self, job_id: str):
+        async with self._slots:
+            job = await run_storage(self.get, job_id)
+            if job is None:
+                return
+            await run_storage(self._update, job_id, status="running", started_at=datetime.now().isoformat())
+            try:
+                handler = self.handlers[job["kind"]]
+                if asyncio.iscoroutinefunction(handler):
+                    result = await handler(job["params"])
+                else:
+                    result = await self.runners[job["kind"]](handler, job["params"])
+                path = await run_storage(self._write_result, job_id, result)
+            except asyncio.CancelledError:
+                # Server shutting down: left as running, resumed by the next start()
+                raise
+            except Exception as e:
+                message = getattr(e, "detail", None) or str(e) or type(e).__name__
+                print(f"Error running job {job_id} ({job['kind']}): {message}")
+                await run_storage(
+                    self._update, job_id, status="failed", error=str(message), finished_at=datetime.now().isoformat()
+                )
+                return
+            await run_storage(
+                self._update,
+                job_id,
+                status="completed",
+                finished_at=datetime.now().isoformat(),
+                result_path=path,
+                result_filename=result.filename,
+                media_type=result.media_type,
+            )
+
+    def _write_result(self, job_id: str, result: JobResult) -> str:
+        folder = os.path.join(self.results_dir, job_id)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, os.path.basename(result.filename))
+        with open(path, "wb") as f:
+            if isinstance(result.content, bytes):
+                f.write(result.content)
+            else:
+                for chunk in result.content:
+                    f.write(chunk)
+        return path
+
+    def _update(self, job_id: str, **fields):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+
+    @staticmethod
+    def _to_dict(row) -> Dict[str, Any]:
+        job = dict(zip(COLUMNS, row))
+        job["params"] = json.loads(job["params"])
+        return job
@@ -0,0 +1,194 @@
+"""
+Cached index of the archived PDFs in ``data/resultados_pdf/<folder>``.
+
+The report pages list a folder on every visit; with tens of thousands of PDFs,
+``os.listdir`` plus one ``stat`` per file on each call dominates. ``PdfArchive``
+keeps, per folder, ``filename → (size, ctime, mtime)`` and:
+
+- updates it in place when the API writes or deletes a PDF (``writing`` /
+  ``delete``), the same way ``RecordIndex`` follows the response journals;
+- rebuilds it when the directory's mtime changes for any other reason
+  (another worker, files copied by hand);
+- re-stats the indexed files on each listing, since rewriting a PDF under the
+  same name does not touch the directory's mtime;
+- maintains an order-independent digest of the entries, so a listing's ETag
+  is stable across processes and restarts and changes whenever a PDF does.
+"""
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from storage.cedula_index import file_stat
+
+SORT_KEYS = ("created_at", "filename", "size_kb")
+
+
+class PdfEntry(NamedTuple):
+    filename: str
+    size: int
+    created: float
+    modified: float
+
+    def to_dict(self) -> Dict:
+        return {
+            "filename": self.filename,
+            "size_kb": round(self.size / 1024, 2),
+            "created_at": datetime.fromtimestamp(self.created).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+def _entry_hash(entry: PdfEntry) -> int:
+    key = f"{entry.filename}\0{entry.size}\0{entry.created}\0{entry.modified}".encode()
+    return int.from_bytes(hashlib.md5(key).digest(), "big")
+
+
+def safe_filename(filename: str) -> bool:
+    """True if ``filename`` names a file directly inside the folder."""
+    return bool(filename) and os.path.basename(filename) == filename and filename not in (".", "..")
+
+
+class _FolderIndex:
+    def __init__(self):
+        self.entries: Dict[str, PdfEntry] = {}
+        self.digest = 0
+        self.signature: Optional[Tuple[int, int]] = None
+
+    def put(self, entry: PdfEntry):
+        self.discard(entry.filename)
+        self.entries[entry.filename] = entry
+        self.digest ^= _entry_hash(entry)
+
+    def discard(self, filename: str):
+        old = self.entries.pop(filename, None)
+        if old is not None:
+            self.digest ^= _entry_hash(old)
+
+
+class PdfArchive:
+    """Listing, download paths and deletion of the PDFs of each results folder."""
+
+    def __init__(self, results_dir: str):
+        self.results_dir = results_dir
+        self._indexes: Dict[str, _FolderIndex] = {}
+        self._lock = threading.Lock()
+
+    def folder_path(self, folder: str) -> str:
+        return os.path.join(self.results_dir, folder)
+
+    def path(self, folder: str, filename: str) -> Optional[str]:
+        """Path of an archived PDF, or None if the name is invalid or the file is missing."""
+        if not safe_filename(filename):
+            return None
+        path = os.path.join(self.folder_path(folder), filename)
+        return path if os.path.isfile(path) else None
+
+    # ─── Index ─────────────────────────────────────────────────
+
+    def _entry(self, folder: str, filename: str) -> Optional[PdfEntry]:
+        try:
+            st = os.stat(os.path.join(self.folder_path(folder), filename))
+        except OSError:
+            return None
+        return PdfEntry(filename, st.st_size, st.st_ctime, st.st_mtime)
+
+    def _current(self, folder: str) -> _FolderIndex:
+        """Index of ``folder``; the caller holds ``_lock``."""
+        signature = file_stat(self.folder_path(folder))
+        index = self._indexes.get(folder)
+        if index is None or index.signature != signature:
+            index = _FolderIndex()
+            # Signature taken before listing: a concurrent change forces another rebuild
+            index.signature = signature
+            if signature is not None:
+                for name in os.listdir(self.folder_path(folder)):
+                    if name.lower().endswith(".pdf"):
+                        entry = self._entry(folder, name)
+                        if entry is not None:
+                            index.put(entry)
+            self._indexes[folder] = index
+        else:
+            for name, entry in list(index.entries.items()):
+                current = self._entry(folder, name)
+                if current is None:
+                    index.discard(name)
+                elif current != entry:
+                    index.put(current)
+        return index
+
+    @contextmanager
+    def writing(self, folder: str, filename: str):
+        """Wrap the write of ``folder/filename`` so the index picks it up without a rebuild."""
+        os.makedirs(self.folder_path(folder), exist_ok=True)
+        with self._lock:
+            index = self._indexes.get(folder)
+            before = file_stat(self.folder_path(folder))
+            fresh = index is not None and index.signature == before
+        yield os.path.join(self.folder_path(folder), filename)
+        self._record(folder, filename, fresh)
+
+    def delete(self, folder: str, filename: str) -> bool:
+        path = self.path(folder, filename)
+        if path is None:
+            return False
+        with self._lock:
+            index = self._indexes.get(folder)
+            fresh = index is not None and index.signature == file_stat(self.folder_path(folder))
+        os.remove(path)
+        self._record(folder, filename, fresh)
+        return True
+
+    def _record(self, folder: str, filename: str, fresh: bool):
+        with self._lock:
+            index = self._indexes.get(folder)
+            if index is None:
+                return
+            if not fresh:
+                # Someone else changed the folder meanwhile: rebuild lazily
+                index.signature = None
+                return
+            entry = self._entry(folder, filename) if filename.lower().endswith(".pdf") else None
+            if entry is None:
+                index.discard(filename)
+            else:
+                index.put(entry)
+            index.signature = file_stat(self.folder_path(folder))
+
+    # ─── Listing ───────────────────────────────────────────────
+
+    def list(
+        self,
+        folder: str,
+        cedula: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        sort: str = "created_at",
+        order: str = "desc",
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Dict], int, str]:
+        """
+        (page of entries, total matching, ETag) for ``folder``.
+
+        ``cedula`` matches part of the filename; ``since`` / ``until`` are
+        inclusive ``YYYY-MM-DD`` bounds on the creation date.
+        """
+        with self._lock:
+            index = self._current(folder)
+            entries = list(index.entries.values())
+            digest = index.digest
+        items = [e.to_dict() for e in entries if not cedula or cedula in e.filename]
+        if since:
+            items = [i for i in items if i["created_at"][:10] >= since]
+        if until:
+            items = [i for i in items if i["created_at"][:10] <= until]
+        sort = sort if sort in SORT_KEYS else "created_at"
+        items.sort(key=lambda i: i[sort], reverse=order != "asc")
+
+        total = len(items)
+        page = items[offset:offset + limit] if limit is not None else items[offset:]
+        query = f"{cedula}|{since}|{until}|{sort}|{order}|{offset}|{limit}"
+        etag = f'"{digest:032x}-{hashlib.md5(query.encode()).hexdigest()[:8]}"'
+        return page, total, etag
@@ -0,0 +1,207 @@
+"""
+Server-side bulk PDF generation.
+
+The generar-reportes-*.html pages used to build each respondent's HTML in the
+browser and POST it to ``/api/generate-pdf-server`` one by one. A ``PdfJob``
+does the same on the server for every (or a chosen set of) respondent of a
+questionnaire:
+
+- the latest response of each cédula is rendered with the questionnaire's
+  server-side ``ReportTemplate`` (registered by ``app.py``); lookups and HTML
+  rendering run on the storage and analysis pools, not on the event loop;
+- ``workers`` coroutines share the browser pool, so at most that many PDFs
+  render at once;
+- progress (done / failed / throughput / ETA) is polled with ``get`` and a
+  job can be cancelled at any time; PDFs already written are kept;
+- finished jobs are forgotten ``PDF_JOB_RETENTION_HOURS`` (default 24) after
+  they end (the PDFs stay in the archive).
+"""
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from .browser_pool import PDF_MAX_PAGES, BrowserPool
+from .concurrency import run_analysis, run_storage
+from .pdf_archive import PdfArchive, safe_filename
+
+# Keep the last errors of a job, not one per failed respondent
+MAX_REPORTED_ERRORS = 20
+
+PDF_JOB_RETENTION_HOURS = float(os.getenv("PDF_JOB_RETENTION_HOURS", "24"))
+
+
+class ReportTemplate(NamedTuple):
+    folder: str                     # sub-folder of the PDF results dir
+    filename: str                   # e.g. "Reporte_Estres_{cedula}.pdf"
+    render: Callable[[dict], str]   # response record → full report HTML
+    pdf_options: Dict
+
+
+class PdfJob:
+    """State and progress of one bulk generation."""
+
+    def __init__(self, questionnaire_id: str, cedulas: List[str]):
+        self.id = uuid.uuid4().hex
+        self.questionnaire_id = questionnaire_id
+        self.cedulas = cedulas
+        self.status = "queued"      # queued → running → completed | cancelled | failed
+        self.done = 0
+        self.failed = 0
+        self.errors: List[Dict[str, str]] = []
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def total(self) -> int:
+        return len(self.cedulas)
+
+    def to_dict(self) -> Dict:
+        processed = self.done + self.failed
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        throughput = processed / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - processed
+        return {
+            "job_id":           self.id,
+            "questionnaire_id": self.questionnaire_id,
+            "status":           self.status,
+            "total":            self.total,
+            "done":             self.done,
+            "failed":           self.failed,
+            "progress_pct":     round(processed / self.total * 100, 1) if self.total else 100.0,
+            "elapsed_seconds":  round(elapsed, 2),
+            "pdfs_per_second":  round(throughput, 2),
+            "eta_seconds":      round(remaining / throughput, 1) if throughput and self.status == "running" else None,
+            "created_at":       self.created_at,
+            "errors":           self.errors,
+        }
+
+
+class PdfJobManager:
+    """Runs bulk PDF jobs on the event loop, rendering through a ``BrowserPool``."""
+
+    def __init__(
+        self,
+        pool: BrowserPool,
+        results_dir: str,
+        repo,
+        workers: int = PDF_MAX_PAGES,
+        archive: Optional[PdfArchive] = None,
+        retention_hours: float = PDF_JOB_RETENTION_HOURS,
+    ):
+        self.pool = pool
+        self.results_dir = results_dir
+        self.archive = archive or PdfArchive(results_dir)
+        self.repo = repo
+        self.workers = max(1, workers)
+        self.retention = retention_hours * 3600
+        self.templates: Dict[str, ReportTemplate] = {}
+        self.jobs: Dict[str, PdfJob] = {}
+
+    def register(self, questionnaire_id: str, template: ReportTemplate):
+        self.templates[questionnaire_id] = template
+
+    # ─── API ───────────────────────────────────────────────────
+
+    async def submit(self, questionnaire_id: str, cedulas: Optional[List[str]] = None) -> PdfJob:
+        """Queue a job for ``cedulas`` (default: every respondent of the questionnaire)."""
+        if questionnaire_id not in self.templates:
+            raise KeyError(questionnaire_id)
+        if cedulas is None:
+            cedulas = await run_storage(self._respondents, questionnaire_id)
+        self.purge_expired()
+        job = PdfJob(questionnaire_id, list(dict.fromkeys(str(c) for c in cedulas)))
+        self.jobs[job.id] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        return job
+
+    def _respondents(self, questionnaire_id: str) -> List[str]:
+        # list_cedulas also counts datos-generales; keep only who answered
+        return [
+            c for c in sorted(self.repo.list_cedulas([questionnaire_id]))
+            if self.repo.latest_response(questionnaire_id, c)
+        ]
+
+    def get(self, job_id: str) -> Optional[PdfJob]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[PdfJob]:
+        self.purge_expired()
+        return list(self.jobs.values())
+
+    def purge_expired(self, now: Optional[float] = None):
+        """Forget jobs that finished more than the retention period ago."""
+        cutoff = (now if now is not None else time.monotonic()) - self.retention
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def cancel(self, job_id: str) -> Optional[PdfJob]:
+        job = self.jobs.get(job_id)
+        if job is not None and job.status in ("queued", "running"):
+            job.status = "cancelled"
+            if job.task is not None:
+                job.task.cancel()
+            if job.started_at is None:
+                # The task never starts, so _run's finally will not stamp it
+                job.finished_at = time.monotonic()
+        return job
+
+    # ─── Execution ─────────────────────────────────────────────
+
+    async def _run(self, job: PdfJob):
+        template = self.templates[job.questionnaire_id]
+        queue: asyncio.Queue = asyncio.Queue()
+        for cedula in job.cedulas:
+            queue.put_nowait(cedula)
+
+        job.status = "running"
+        job.started_at = time.monotonic()
+        workers = [asyncio.create_task(self._worker(job, template, queue)) for _ in range(self.workers)]
+        try:
+            await asyncio.gather(*workers)
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            self._report_error(job, "", str(e))
+        finally:
+            for worker in workers:
+                worker.cancel()
+            job.finished_at = time.monotonic()
+
+    async def _worker(self, job: PdfJob, template: ReportTemplate, queue: asyncio.Queue):
+        while not queue.empty():
+            cedula = queue.get_nowait()
+            try:
+                filename = template.filename.format(cedula=cedula)
+                if not safe_filename(filename):
+                    raise ValueError("invalid cédula")
+                record = await run_storage(self.repo.latest_response, job.questionnaire_id, cedula)
+                if record is None:
+                    raise LookupError("no response for this cédula")
+                html = await run_analysis(template.render, record)
+                with self.archive.writing(template.folder, filename) as path:
+                    await self.pool.render_pdf(html, path=path, **template.pdf_options)
+                job.done += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.failed += 1
+                self._report_error(job, cedula, str(e))
+
+    @staticmethod
+    def _report_error(job: PdfJob, cedula: str, message: str):
+        print(f"Error generating PDF for {cedula} ({job.questionnaire_id}): {message}")
+        job.errors.append({"cedula": cedula, "error": message})
+        del job.errors[:-MAX_REPORTED_ERRORS]
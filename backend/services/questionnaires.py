@@ -0,0 +1,113 @@
+"""
+In-memory catalog of the questionnaire definitions (``backend/questionnaires``).
+
+``load_questionnaire`` used to open and parse the JSON file on every submit,
+statistics and export call, and the listing globbed and parsed every file.
+``QuestionnaireRegistry`` parses each file once and precomputes what the
+endpoints look up:
+
+- ``valid_question_ids``, ``required_question_ids`` and ``option_values`` for
+  submit validation (plain set lookups);
+- ``questions_by_id`` / ``options_by_value`` to label stored answers;
+- ``summary``, the entry of ``GET /api/questionnaires``.
+
+Files are re-checked at most every ``QUESTIONNAIRE_RELOAD_SECONDS`` (default
+2): added, edited and deleted definitions are picked up without a restart.
+A file that fails to parse keeps its previous version, if any.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from storage.cedula_index import file_stat
+
+QUESTIONNAIRE_RELOAD_SECONDS = float(os.getenv("QUESTIONNAIRE_RELOAD_SECONDS", "2"))
+
+
+class QuestionnaireDefinition:
+    """One parsed questionnaire file plus its lookup tables."""
+
+    def __init__(self, data: Dict[str, Any], signature: Tuple[int, int]):
+        self.data = data
+        self.signature = signature          # (mtime_ns, size) of the file it came from
+        self.questions: List[Dict[str, Any]] = data.get("questions", [])
+        self.options: List[Dict[str, Any]] = data.get("options", [])
+        self.questions_by_id: Dict[Any, Dict[str, Any]] = {q["id"]: q for q in self.questions}
+        self.options_by_value: Dict[Any, Dict[str, Any]] = {opt["value"]: opt for opt in self.options}
+        self.valid_question_ids: FrozenSet = frozenset(self.questions_by_id)
+        self.required_question_ids: FrozenSet = frozenset(
+            q["id"] for q in self.questions if not q.get("conditional", False)
+        )
+        self.option_values: FrozenSet = frozenset(self.options_by_value)
+        self.summary = {
+            "id": data.get("id"),
+            "name": data.get("name"),
+            "description": data.get("description"),
+            "version": data.get("version"),
+            "icon": data.get("icon", "📋"),
+            "color": data.get("color", "#6366f1"),
+            "question_count": len(self.questions),
+        }
+
+
+class QuestionnaireRegistry:
+    """Questionnaire definitions of a directory, keyed by file name (``<id>.json``)."""
+
+    def __init__(self, directory: str, reload_seconds: float = QUESTIONNAIRE_RELOAD_SECONDS):
+        self.directory = directory
+        self.reload_seconds = reload_seconds
+        self._definitions: Dict[str, QuestionnaireDefinition] = {}
+        self._broken: Dict[str, Tuple[int, int]] = {}   # file name → signature that failed to parse
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def get(self, questionnaire_id: str) -> Optional[QuestionnaireDefinition]:
+        self._maybe_refresh()
+        return self._definitions.get(questionnaire_id)
+
+    def all(self) -> List[QuestionnaireDefinition]:
+        """Every definition, in file name order."""
+        self._maybe_refresh()
+        definitions = self._definitions
+        return [definitions[key] for key in sorted(definitions)]
+
+    def _maybe_refresh(self):
+        checked_at = self._checked_at
+        if checked_at is None or time.monotonic() - checked_at >= self.reload_seconds:
+            self.refresh()
+
+    def refresh(self):
+        """Re-read the files whose mtime or size changed; drop the deleted ones."""
+        with self._lock:
+            try:
+                names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+            except FileNotFoundError:
+                names = []
+            definitions = {}
+            for name in names:
+                key = name[:-len(".json")]
+                path = os.path.join(self.directory, name)
+                signature = file_stat(path)
+                if signature is None:
+                    continue
+                current = self._definitions.get(key)
+                unchanged = current is not None and current.signature == signature
+                if unchanged or self._broken.get(key) == signature:
+                    if current is not None:
+                        definitions[key] = current
+                    continue
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        definitions[key] = QuestionnaireDefinition(json.load(f), signature)
+                    self._broken.pop(key, None)
+                except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                    print(f"Error loading questionnaire {path}: {e}")
+                    self._broken[key] = signature
+                    if current is not None:
+                        definitions[key] = current
+            # Swapped whole: readers never see a half-updated catalog
+            self._definitions = definitions
+            self._checked_at = time.monotonic()
@@ -0,0 +1,85 @@
+"""
+Per-question statistics of a questionnaire (``/api/statistics/{id}``).
+
+The endpoint used to scan every response once per question and then call
+``values.count`` once per option: O(questions × responses × answers). Here
+the responses are read once, every ``(question, value)`` pair is tallied in a
+single ``Counter`` (counting runs in C), and averages and distributions are
+derived from the tallies. Results are cached per questionnaire until the
+caller's revision token changes.
+"""
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+
+def _int_value(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None  # malformed entries are skipped
+
+
+def question_statistics(
+    questions: List[Dict[str, Any]],
+    options: List[Dict[str, Any]],
+    responses: Iterable[dict],
+) -> Tuple[int, Dict[Any, Dict[str, Any]]]:
+    """
+    (number of responses, question id → stats) in one pass over ``responses``.
+
+    Every answer to a question counts, including repeated answers within one
+    response; questions without valid answers are left out.
+    """
+    question_ids = {q["id"] for q in questions}
+    total = 0
+
+    def pairs():
+        nonlocal total
+        for response in responses:
+            total += 1
+            for r in response.get("responses", []):
+                q_id = r.get("question_id")
+                if q_id in question_ids:
+                    value = _int_value(r.get("response_value"))
+                    if value is not None:
+                        yield q_id, value
+
+    tallies = Counter(pairs())
+    per_question: Dict[Any, Dict[int, int]] = {}
+    for (q_id, value), count in tallies.items():
+        per_question.setdefault(q_id, {})[value] = count
+
+    option_values = [int(opt["value"]) for opt in options]
+    stats = {}
+    for question in questions:
+        counts = per_question.get(question["id"])
+        if not counts:
+            continue
+        n = sum(counts.values())
+        stats[question["id"]] = {
+            "question_text": question["text"],
+            "category": question.get("category", ""),
+            "average": round(sum(v * c for v, c in counts.items()) / n, 2),
+            "total_responses": n,
+            "distribution": {v: counts.get(v, 0) for v in option_values},
+        }
+    return total, stats
+
+
+class StatisticsCache:
+    """Last computed result per questionnaire, valid while its revision token is unchanged."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Hashable, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, questionnaire_id: str, revision: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(questionnaire_id)
+        if entry is not None and entry[0] == revision:
+            return entry[1]
+        result = compute()
+        with self._lock:
+            self._entries[questionnaire_id] = (revision, result)
+        return result
@@ -0,0 +1,49 @@
+"""
+Pruebas del reporte global (``/api/analysis-report``): las respuestas nuevas se
+suman a los totales sin recalificar las anteriores.
+"""
+import os
+import random
+import sys
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from analysis_engine import AnalysisEngine, ScoreTally
+from storage.repository import JsonRepository
+
+
+def _add(repo, questionnaire_id, n_items, i):
+    rng = random.Random(i)
+    repo.add_response(questionnaire_id, {
+        "id": f"{questionnaire_id}-{i}", "respondent_cedula": str(i), "submitted_at": "2026-01-01T00:00:00",
+        "responses": [{"question_id": q, "response_value": rng.randint(1, 5)} for q in range(1, n_items + 1)],
+    })
+
+
+def test_new_responses_extend_the_report(tmp_path, monkeypatch):
+    repo = JsonRepository(str(tmp_path))
+    for i in range(5):
+        _add(repo, "intralaborales-a", 123, i)
+    engine = AnalysisEngine(str(tmp_path), "", repository=repo)
+    engine.get_global_report()
+
+    scored = []
+    original = ScoreTally._add_one
+    monkeypatch.setattr(ScoreTally, "_add_one", lambda self, resp: scored.append(resp["id"]) or original(self, resp))
+    _add(repo, "intralaborales-a", 123, 5)
+    report = engine.get_global_report()
+
+    assert scored == ["intralaborales-a-5"]
+    responses = repo.list_responses("intralaborales-a")
+    assert report["questionnaires"]["intralaborales-a"] == engine.calculate_score("intralaborales-a", responses)
+    assert report["questionnaires"]["intralaborales-a"]["total_participants"] == 6
+
+
+def test_unchanged_repository_reuses_the_report(tmp_path, monkeypatch):
+    repo = JsonRepository(str(tmp_path))
+    _add(repo, "estres", 31, 0)
+    engine = AnalysisEngine(str(tmp_path), "", repository=repo)
+    first = engine.get_global_report()
+    monkeypatch.setattr(engine, "load_responses", lambda q_id: (_ for _ in ()).throw(AssertionError(q_id)))
+    assert engine.get_global_report() == first
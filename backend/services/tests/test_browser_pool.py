@@ -0,0 +1,127 @@
+"""
+Pruebas del pool de navegador compartido para PDFs, con un navegador falso
+(no requieren Playwright ni Chromium).
+"""
+import asyncio
+import os
+import sys
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.browser_pool import BrowserPool
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def set_content(self, html, wait_until=None):
+        self.html = html
+        await asyncio.sleep(0)
+
+    async def pdf(self, **options):
+        if self.browser.crash_on_render:
+            self.browser.connected = False
+        if not self.browser.connected:
+            raise RuntimeError("Target closed")
+        self.browser.active += 1
+        self.browser.peak = max(self.browser.peak, self.browser.active)
+        await asyncio.sleep(0.01)
+        self.browser.active -= 1
+        return self.html.encode()
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def new_page(self):
+        return FakePage(self.browser)
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.crash_on_render = False
+        self.active = 0
+        self.peak = 0
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        return FakeContext(self)
+
+    async def close(self):
+        self.closed = True
+        self.connected = False
+
+
+class FakePool(BrowserPool):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.launched = []
+
+    async def _launch(self):
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+class TestBrowserPool:
+    def test_reuses_one_browser(self):
+        pool = FakePool()
+
+        async def run():
+            return [await pool.render_pdf(f"<p>{i}</p>") for i in range(5)]
+
+        assert asyncio.run(run()) == [f"<p>{i}</p>".encode() for i in range(5)]
+        assert len(pool.launched) == 1
+
+    def test_bounds_concurrent_pages(self):
+        pool = FakePool(max_pages=2)
+
+        async def run():
+            await asyncio.gather(*(pool.render_pdf("x") for _ in range(8)))
+
+        asyncio.run(run())
+        assert pool.launched[0].peak == 2
+
+    def test_recycles_after_n_renders(self):
+        pool = FakePool(recycle_after=3)
+
+        async def run():
+            for _ in range(7):
+                await pool.render_pdf("x")
+
+        asyncio.run(run())
+        assert len(pool.launched) == 3
+        assert [b.closed for b in pool.launched] == [True, True, False]
+
+    def test_relaunches_and_retries_after_crash(self):
+        pool = FakePool()
+
+        async def run():
+            await pool.render_pdf("a")
+            pool.launched[0].connected = False
+            return await pool.render_pdf("b")
+
+        assert asyncio.run(run()) == b"b"
+        assert len(pool.launched) == 2
+        assert pool.health()["connected"] and pool.health()["restarts"] == 1
+
+    def test_crash_mid_render_is_retried(self):
+        pool = FakePool()
+
+        async def run():
+            await pool.start()
+            pool.launched[0].crash_on_render = True
+            return await pool.render_pdf("c")
+
+        assert asyncio.run(run()) == b"c"
+        assert len(pool.launched) == 2
@@ -0,0 +1,83 @@
+"""
+Pruebas de los pools de trabajo bloqueante y del monitor de latencia del event loop.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.concurrency import BlockingPool, LoopLagMonitor
+
+
+class TestBlockingPool:
+    def test_runs_off_the_event_loop(self):
+        pool = BlockingPool("test", 2)
+
+        async def run():
+            loop_thread = threading.get_ident()
+            worker_thread = await pool.run(threading.get_ident)
+            return loop_thread, worker_thread, await pool.run(lambda a, b=0: a + b, 1, b=2)
+
+        loop_thread, worker_thread, total = asyncio.run(run())
+        assert worker_thread != loop_thread
+        assert total == 3
+        assert pool.stats() == {"workers": 2, "in_flight": 0, "completed": 2}
+        pool.shutdown()
+
+    def test_exceptions_propagate(self):
+        pool = BlockingPool("test", 1)
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            asyncio.run(pool.run(fail))
+        pool.shutdown()
+
+    def test_loop_keeps_serving_while_pool_is_busy(self):
+        pool = BlockingPool("test", 1)
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            await pool.run(time.sleep, 0.3)
+            task.cancel()
+            return ticks
+
+        assert asyncio.run(run()) >= 10
+        pool.shutdown()
+
+
+class TestLoopLagMonitor:
+    def test_blocking_call_is_reported_as_stall(self):
+        monitor = LoopLagMonitor(interval_ms=10)
+
+        async def run():
+            await monitor.start()
+            await asyncio.sleep(0.05)
+            time.sleep(0.25)    # handler blocking the loop
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        asyncio.run(run())
+        stats = monitor.stats()
+        assert stats["samples"] >= 3
+        assert stats["max_ms"] >= 200
+        assert stats["stalls"] >= 1
+        assert stats["p99_ms"] <= stats["max_ms"]
+
+    def test_no_samples_yet(self):
+        assert LoopLagMonitor().stats() == {"running": False, "samples": 0}
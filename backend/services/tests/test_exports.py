@@ -0,0 +1,68 @@
+"""
+Pruebas de las exportaciones por streaming (Excel de solo escritura y CSV).
+"""
+import csv
+import io
+import os
+import sys
+
+import pytest
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services import exports
+from services.exports import Sheet, iter_file, spooled_csv, spooled_xlsx
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _rows(n):
+    for i in range(n):
+        yield [f"id{i}", "2026-01-01", str(1000 + i), "Nombre Ñandú", "", *range(5)]
+
+
+HEADER = ["ID", "Fecha", "Cédula", "Nombre", "Departamento", "P1", "P2", "P3", "P4", "P5"]
+
+
+class TestExports:
+    def test_xlsx_round_trip(self):
+        export = spooled_xlsx([
+            Sheet("Respuestas", HEADER, _rows(50), widths=(10, 12)),
+            Sheet("Otra hoja con un título demasiado largo para Excel", ["A"], iter([[1], [2]])),
+        ])
+        wb = openpyxl.load_workbook(io.BytesIO(b"".join(iter_file(export, chunk_size=1024))))
+        ws = wb["Respuestas"]
+        assert [c.value for c in ws[1]] == HEADER
+        assert ws["A1"].font.bold
+        assert ws.column_dimensions["B"].width == 12
+        assert ws.max_row == 51
+        assert [c.value for c in ws[51]][:4] == ["id49", "2026-01-01", "1049", "Nombre Ñandú"]
+        assert len(wb.sheetnames[1]) == 31
+        assert export.closed
+
+    def test_rows_are_consumed_lazily(self):
+        consumed = []
+
+        def rows():
+            for row in _rows(3):
+                consumed.append(row[0])
+                yield row
+
+        sheet = Sheet("Respuestas", HEADER, rows())
+        assert consumed == []
+        spooled_xlsx([sheet]).close()
+        assert consumed == ["id0", "id1", "id2"]
+
+    def test_csv(self):
+        data = b"".join(iter_file(spooled_csv(Sheet("Respuestas", HEADER, _rows(3)))))
+        assert data.startswith(b"\xef\xbb\xbf")
+        rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+        assert rows[0] == HEADER
+        assert rows[2] == ["id1", "2026-01-01", "1001", "Nombre Ñandú", "", "0", "1", "2", "3", "4"]
+
+    def test_large_exports_spill_to_disk(self, monkeypatch):
+        monkeypatch.setattr(exports, "EXPORT_SPOOL_MB", 0.01)
+        export = spooled_csv(Sheet("Respuestas", HEADER, _rows(2000)))
+        assert export._rolled
+        export.close()
@@ -0,0 +1,78 @@
+"""
+Pruebas de la caché HTTP (ETag por contenido, 304 y variantes comprimidas).
+"""
+import gzip
+import hashlib
+import os
+import sys
+import types
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services import http_cache
+from services.http_cache import IMMUTABLE, NO_CACHE, CachedStaticFiles
+
+PAGE = ("<html><body>" + "<p>pregunta</p>" * 500 + "</body></html>").encode()
+
+
+def _client(tmp_path):
+    (tmp_path / "encuesta.html").write_bytes(PAGE)
+    (tmp_path / "app.3f2a9c1d0b.js").write_bytes(b"console.log(1);" * 100)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" + b"\x00" * 2000)
+    app = FastAPI()
+    app.mount("/", CachedStaticFiles(directory=str(tmp_path), html=True))
+    return TestClient(app)
+
+
+class TestCachedStaticFiles:
+    def test_content_etag_and_revalidation(self, tmp_path):
+        client = _client(tmp_path)
+        r = client.get("/encuesta.html", headers={"Accept-Encoding": "identity"})
+        assert r.content == PAGE
+        assert r.headers["etag"] == f'"{hashlib.sha256(PAGE).hexdigest()[:16]}"'
+        assert r.headers["cache-control"] == NO_CACHE
+        assert client.get("/encuesta.html", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+        assert client.get("/encuesta.html", headers={"If-Modified-Since": r.headers["last-modified"]}).status_code == 304
+        assert client.get("/encuesta.html", headers={"If-None-Match": '"otro"'}).status_code == 200
+
+    def test_gzip_variant(self, tmp_path):
+        client = _client(tmp_path)
+        r = client.get("/encuesta.html", headers={"Accept-Encoding": "gzip"}, )
+        assert r.headers["content-encoding"] == "gzip"
+        assert int(r.headers["content-length"]) < len(PAGE) / 5
+        assert r.content == PAGE    # httpx descomprime
+        assert r.headers["vary"] == "Accept-Encoding"
+        # La ETag de la variante también revalida
+        assert client.get("/encuesta.html", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+    def test_brotli_preferred_when_available(self, tmp_path, monkeypatch):
+        fake = types.SimpleNamespace(compress=lambda body, quality: b"br:" + gzip.compress(body))
+        monkeypatch.setattr(http_cache, "brotli", fake)
+        client = _client(tmp_path)
+        r = client.get("/encuesta.html", headers={"Accept-Encoding": "gzip, br"}, )
+        assert r.headers["content-encoding"] == "br"
+        r = client.get("/encuesta.html", headers={"Accept-Encoding": "gzip, br;q=0"})
+        assert r.headers["content-encoding"] == "gzip"
+
+    def test_binary_files_are_not_compressed(self, tmp_path):
+        r = _client(tmp_path).get("/logo.png", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in r.headers
+
+    def test_fingerprinted_assets_are_immutable(self, tmp_path):
+        client = _client(tmp_path)
+        assert client.get("/app.3f2a9c1d0b.js").headers["cache-control"] == IMMUTABLE
+        version = hashlib.sha256(PAGE).hexdigest()[:10]
+        assert client.get(f"/encuesta.html?v={version}").headers["cache-control"] == IMMUTABLE
+        assert client.get("/encuesta.html?v=0000000000").headers["cache-control"] == NO_CACHE
+
+    def test_changed_file_gets_new_etag(self, tmp_path):
+        client = _client(tmp_path)
+        etag = client.get("/encuesta.html").headers["etag"]
+        (tmp_path / "encuesta.html").write_bytes(PAGE + b"<!-- v2 -->")
+        r = client.get("/encuesta.html", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.content.endswith(b"<!-- v2 -->")
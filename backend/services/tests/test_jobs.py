@@ -0,0 +1,123 @@
+"""
+Pruebas de la cola de trabajos en segundo plano (tabla SQLite, concurrencia,
+resultados y retención).
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.jobs import JobQueue, JobResult
+
+
+def _queue(tmp_path, **kwargs) -> JobQueue:
+    return JobQueue(str(tmp_path / "jobs.db"), str(tmp_path / "results"), **kwargs)
+
+
+async def _finish(queue: JobQueue, job_id: str) -> dict:
+    while queue.get(job_id)["status"] in ("queued", "running"):
+        await asyncio.sleep(0.005)
+    return queue.get(job_id)
+
+
+class TestJobQueue:
+    def test_runs_sync_and_async_handlers(self, tmp_path):
+        queue = _queue(tmp_path)
+        queue.register("sync", lambda p: JobResult(p["text"].encode(), "a.txt", "text/plain"))
+
+        async def async_handler(p):
+            await asyncio.sleep(0)
+            return JobResult(b"async", "b.txt", "text/plain")
+
+        queue.register("async", async_handler)
+
+        async def run():
+            first = await queue.submit("sync", {"text": "hola"})
+            second = await queue.submit("async")
+            return await _finish(queue, first["id"]), await _finish(queue, second["id"])
+
+        first, second = asyncio.run(run())
+        assert first["status"] == second["status"] == "completed"
+        with open(queue.result(first["id"])["result_path"], "rb") as f:
+            assert f.read() == b"hola"
+        assert queue.result(second["id"])["result_filename"] == "b.txt"
+
+    def test_failures_are_recorded(self, tmp_path):
+        queue = _queue(tmp_path)
+
+        def broken(params):
+            raise ValueError("sin datos")
+
+        queue.register("broken", broken)
+
+        async def run():
+            return await _finish(queue, (await queue.submit("broken"))["id"])
+
+        job = asyncio.run(run())
+        assert (job["status"], job["error"]) == ("failed", "sin datos")
+        assert queue.result(job["id"]) is None
+
+    def test_bounds_concurrent_jobs(self, tmp_path):
+        queue = _queue(tmp_path, workers=2)
+        running = {"now": 0, "peak": 0}
+
+        async def slow(params):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.02)
+            running["now"] -= 1
+            return JobResult(b"", "x.bin", "application/octet-stream")
+
+        queue.register("slow", slow)
+
+        async def run():
+            ids = [(await queue.submit("slow"))["id"] for _ in range(6)]
+            for job_id in ids:
+                await _finish(queue, job_id)
+
+        asyncio.run(run())
+        assert running["peak"] == 2
+
+    def test_unknown_kind(self, tmp_path):
+        queue = _queue(tmp_path)
+        with pytest.raises(KeyError):
+            asyncio.run(queue.submit("nope"))
+
+    def test_interrupted_jobs_resume_on_start(self, tmp_path):
+        queue = _queue(tmp_path)
+        queue.register("echo", lambda p: JobResult(b"ok", "ok.txt", "text/plain"))
+        conn = queue._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at) VALUES ('j1', 'echo', '{}', 'running', ?)",
+                (datetime.now().isoformat(),),
+            )
+
+        # Otra instancia (reinicio del servidor) sobre la misma tabla
+        restarted = _queue(tmp_path)
+        restarted.register("echo", lambda p: JobResult(b"ok", "ok.txt", "text/plain"))
+
+        async def run():
+            await restarted.start()
+            return await _finish(restarted, "j1")
+
+        assert asyncio.run(run())["status"] == "completed"
+
+    def test_expired_results_are_purged(self, tmp_path):
+        queue = _queue(tmp_path, retention_hours=1)
+        queue.register("echo", lambda p: JobResult(b"ok", "ok.txt", "text/plain"))
+
+        async def run():
+            return await _finish(queue, (await queue.submit("echo"))["id"])
+
+        job = asyncio.run(run())
+        queue.purge_expired(now=datetime.now() + timedelta(minutes=30))
+        assert queue.get(job["id"]) is not None
+        queue.purge_expired(now=datetime.now() + timedelta(hours=2))
+        assert queue.get(job["id"]) is None
+        assert not os.path.exists(os.path.dirname(job["result_path"]))
@@ -0,0 +1,98 @@
+"""
+Pruebas del índice de PDFs generados.
+"""
+import os
+import sys
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.pdf_archive import PdfArchive
+
+
+def _archive(tmp_path, names=("Reporte_10.pdf", "Reporte_20.pdf", "Reporte_30.pdf")):
+    folder = tmp_path / "stress"
+    folder.mkdir()
+    for i, name in enumerate(names):
+        path = folder / name
+        path.write_bytes(b"x" * (1024 * (i + 1)))
+    (folder / "notas.txt").write_text("no es un PDF")
+    return PdfArchive(str(tmp_path))
+
+
+def _names(items):
+    return [i["filename"] for i in items]
+
+
+class TestPdfArchive:
+    def test_list_matches_folder(self, tmp_path):
+        archive = _archive(tmp_path)
+        items, total, _ = archive.list("stress", sort="filename", order="asc")
+        assert total == 3
+        assert _names(items) == ["Reporte_10.pdf", "Reporte_20.pdf", "Reporte_30.pdf"]
+        assert items[1]["size_kb"] == 2.0
+        assert set(items[0]) == {"filename", "size_kb", "created_at"}
+
+    def test_missing_folder_is_empty(self, tmp_path):
+        assert PdfArchive(str(tmp_path)).list("extralaborales")[:2] == ([], 0)
+
+    def test_filters_sort_and_paging(self, tmp_path):
+        archive = _archive(tmp_path)
+        items, total, _ = archive.list("stress", cedula="20")
+        assert (_names(items), total) == (["Reporte_20.pdf"], 1)
+
+        items, total, _ = archive.list("stress", sort="size_kb", offset=1, limit=1)
+        assert (_names(items), total) == (["Reporte_20.pdf"], 3)
+
+        # created_at is the ctime, i.e. today for every file of the fixture
+        today = archive.list("stress")[0][0]["created_at"][:10]
+        assert archive.list("stress", since=today, until=today)[1] == 3
+        assert archive.list("stress", since="9999-01-01")[1] == 0
+        assert archive.list("stress", until="2000-01-01")[1] == 0
+
+    def test_writes_and_deletes_update_index_without_relisting(self, tmp_path, monkeypatch):
+        archive = _archive(tmp_path)
+        _, _, etag = archive.list("stress")
+
+        with archive.writing("stress", "Reporte_40.pdf") as path:
+            with open(path, "wb") as f:
+                f.write(b"pdf")
+        assert archive.delete("stress", "Reporte_10.pdf")
+
+        def fail(*args):
+            raise AssertionError("folder listed again")
+        monkeypatch.setattr(os, "listdir", fail)
+        items, total, new_etag = archive.list("stress", sort="filename", order="asc")
+        assert _names(items) == ["Reporte_20.pdf", "Reporte_30.pdf", "Reporte_40.pdf"]
+        assert new_etag != etag
+
+    def test_external_changes_are_picked_up(self, tmp_path):
+        archive = _archive(tmp_path)
+        archive.list("stress")
+        (tmp_path / "stress" / "Reporte_99.pdf").write_bytes(b"pdf")
+        assert "Reporte_99.pdf" in _names(archive.list("stress")[0])
+
+    def test_rewrite_in_place_is_picked_up(self, tmp_path):
+        archive = _archive(tmp_path)
+        _, _, etag = archive.list("stress")
+        folder = tmp_path / "stress"
+        folder_times = (os.stat(folder).st_atime_ns, os.stat(folder).st_mtime_ns)
+        # Same name, new content: the folder's mtime does not change
+        (folder / "Reporte_10.pdf").write_bytes(b"y" * 4096)
+        os.utime(folder, ns=folder_times)
+        items, _, new_etag = archive.list("stress", cedula="10")
+        assert items[0]["size_kb"] == 4.0
+        assert new_etag.split("-")[0] != etag.split("-")[0]
+
+    def test_etag_is_stable_and_query_specific(self, tmp_path):
+        etag = _archive(tmp_path).list("stress")[2]
+        assert PdfArchive(str(tmp_path)).list("stress")[2] == etag
+        assert PdfArchive(str(tmp_path)).list("stress", limit=1)[2] != etag
+
+    def test_rejects_names_outside_folder(self, tmp_path):
+        archive = _archive(tmp_path)
+        (tmp_path / "secreto.pdf").write_bytes(b"pdf")
+        assert archive.path("stress", "../secreto.pdf") is None
+        assert not archive.delete("stress", "../secreto.pdf")
+        assert (tmp_path / "secreto.pdf").exists()
+        assert archive.path("stress", "Reporte_10.pdf") is not None
@@ -0,0 +1,128 @@
+"""
+Pruebas de los trabajos de generación masiva de PDFs, con un pool falso que
+escribe el HTML como "PDF".
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.pdf_jobs import PdfJobManager, ReportTemplate
+from storage.repository import JsonRepository
+
+
+class FakePool:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def render_pdf(self, html, path=None, **options):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        if "boom" in html:
+            raise RuntimeError("render failed")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+def _manager(tmp_path, pool, workers=2):
+    repo = JsonRepository(str(tmp_path / "data"))
+    for cedula in ("10", "20", "30", "40"):
+        repo.add_response("estres", {"id": cedula, "submitted_at": "2026-01-01", "respondent_cedula": cedula,
+                                     "responses": [{"question_id": 1, "response_value": int(cedula) // 10}]})
+    repo.add_form_response("datos-generales", {"id": "f", "data": {"numero_identificacion": "99"}})
+    manager = PdfJobManager(pool, str(tmp_path / "pdf"), repo, workers=workers)
+    manager.register("estres", ReportTemplate(
+        folder="stress",
+        filename="Reporte_{cedula}.pdf",
+        render=lambda r: "boom" if r["respondent_cedula"] == "30" else f"cc {r['respondent_cedula']}",
+        pdf_options={},
+    ))
+    return manager
+
+
+async def _wait(job):
+    await asyncio.gather(job.task, return_exceptions=True)
+    return job.to_dict()
+
+
+class TestPdfJobs:
+    def test_renders_every_respondent_and_reports_failures(self, tmp_path):
+        pool = FakePool(delay=0.01)
+        manager = _manager(tmp_path, pool)
+
+        async def run():
+            return await _wait(await manager.submit("estres"))
+
+        status = asyncio.run(run())
+        assert status["status"] == "completed"
+        assert (status["total"], status["done"], status["failed"]) == (4, 3, 1)
+        assert status["errors"][0]["cedula"] == "30"
+        assert sorted(os.listdir(tmp_path / "pdf" / "stress")) == ["Reporte_10.pdf", "Reporte_20.pdf", "Reporte_40.pdf"]
+        assert pool.peak == 2
+
+    def test_filtered_cedulas(self, tmp_path):
+        manager = _manager(tmp_path, FakePool())
+
+        async def run():
+            return await _wait(await manager.submit("estres", ["20", "55", "../x"]))
+
+        status = asyncio.run(run())
+        assert (status["done"], status["failed"]) == (1, 2)
+
+    def test_cancel_keeps_written_pdfs(self, tmp_path):
+        manager = _manager(tmp_path, FakePool(delay=0.05), workers=1)
+
+        async def run():
+            job = await manager.submit("estres")
+            await asyncio.sleep(0.07)
+            manager.cancel(job.id)
+            return await _wait(job)
+
+        status = asyncio.run(run())
+        assert status["status"] == "cancelled"
+        assert 1 <= status["done"] < 4
+        assert len(os.listdir(tmp_path / "pdf" / "stress")) == status["done"]
+
+    def test_unknown_questionnaire(self, tmp_path):
+        manager = _manager(tmp_path, FakePool())
+        with pytest.raises(KeyError):
+            asyncio.run(manager.submit("extralaborales"))
+
+    def test_finished_jobs_expire(self, tmp_path):
+        manager = _manager(tmp_path, FakePool(delay=0.05), workers=1)
+
+        async def run():
+            finished = await manager.submit("estres", ["10"])
+            await _wait(finished)
+            running = await manager.submit("estres")
+            manager.purge_expired(now=finished.finished_at + manager.retention + 1)
+            remaining = [job.id for job in manager.list()]
+            manager.cancel(running.id)
+            await _wait(running)
+            return finished, running, remaining
+
+        finished, running, remaining = asyncio.run(run())
+        assert remaining == [running.id]
+        assert manager.get(finished.id) is None
+
+    def test_job_cancelled_before_start_expires(self, tmp_path):
+        manager = _manager(tmp_path, FakePool())
+
+        async def run():
+            job = await manager.submit("estres")
+            manager.cancel(job.id)
+            await _wait(job)
+            manager.purge_expired(now=1e12)
+            return job
+
+        job = asyncio.run(run())
+        assert job.status == "cancelled"
+        assert manager.get(job.id) is None
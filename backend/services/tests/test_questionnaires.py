@@ -0,0 +1,66 @@
+"""
+Pruebas del catálogo de cuestionarios en memoria.
+"""
+import json
+import os
+import sys
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.questionnaires import QuestionnaireRegistry
+
+
+def _write(path, questions=3, name="Estrés", mtime=None):
+    path.write_text(json.dumps({
+        "id": path.stem,
+        "name": name,
+        "options": [{"value": v, "label": f"op{v}"} for v in range(5)],
+        "questions": [{"id": i, "text": f"P{i}", "conditional": i == questions} for i in range(1, questions + 1)],
+    }), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+class TestQuestionnaireRegistry:
+    def test_lookup_tables(self, tmp_path):
+        _write(tmp_path / "estres.json")
+        definition = QuestionnaireRegistry(str(tmp_path)).get("estres")
+        assert definition.valid_question_ids == {1, 2, 3}
+        assert definition.required_question_ids == {1, 2}
+        assert definition.option_values == {0, 1, 2, 3, 4}
+        assert definition.options_by_value[2]["label"] == "op2"
+        assert definition.summary["question_count"] == 3
+
+    def test_files_are_parsed_once(self, tmp_path, monkeypatch):
+        _write(tmp_path / "estres.json")
+        registry = QuestionnaireRegistry(str(tmp_path), reload_seconds=0)
+        first = registry.get("estres")
+        monkeypatch.setattr(json, "load", lambda f: (_ for _ in ()).throw(AssertionError("parsed again")))
+        assert registry.get("estres") is first
+        assert [d.summary["id"] for d in registry.all()] == ["estres"]
+
+    def test_reloads_changed_added_and_deleted_files(self, tmp_path):
+        _write(tmp_path / "estres.json", mtime=1_700_000_000)
+        registry = QuestionnaireRegistry(str(tmp_path), reload_seconds=0)
+        _write(tmp_path / "estres.json", questions=5, mtime=1_700_000_100)
+        _write(tmp_path / "extralaborales.json")
+        assert registry.get("estres").valid_question_ids == {1, 2, 3, 4, 5}
+        assert [d.summary["id"] for d in registry.all()] == ["estres", "extralaborales"]
+        (tmp_path / "extralaborales.json").unlink()
+        assert registry.get("extralaborales") is None
+
+    def test_reload_interval(self, tmp_path):
+        registry = QuestionnaireRegistry(str(tmp_path), reload_seconds=3600)
+        _write(tmp_path / "estres.json")
+        assert registry.get("estres") is None
+        registry.refresh()
+        assert registry.get("estres") is not None
+
+    def test_broken_file_keeps_previous_version(self, tmp_path):
+        path = tmp_path / "estres.json"
+        _write(path, mtime=1_700_000_000)
+        registry = QuestionnaireRegistry(str(tmp_path), reload_seconds=0)
+        path.write_text("{ a medio escribir", encoding="utf-8")
+        assert registry.get("estres").summary["name"] == "Estrés"
+        assert registry.get("no-existe") is None
@@ -0,0 +1,70 @@
+"""
+Pruebas de las estadísticas por pregunta en una sola pasada.
+"""
+import os
+import random
+import sys
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.statistics import StatisticsCache, question_statistics
+
+QUESTIONS = [{"id": i, "text": f"Pregunta {i}", "category": "c"} for i in range(1, 11)]
+OPTIONS = [{"value": v, "label": str(v)} for v in range(5)]
+
+
+def _reference(questions, options, responses):
+    """Cálculo anterior: una pasada por pregunta y ``count`` por opción."""
+    stats = {}
+    for question in questions:
+        values = []
+        for response in responses:
+            for r in response["responses"]:
+                if r["question_id"] == question["id"]:
+                    try:
+                        values.append(int(r["response_value"]))
+                    except (ValueError, TypeError):
+                        pass
+        if values:
+            stats[question["id"]] = {
+                "question_text": question["text"],
+                "category": question.get("category", ""),
+                "average": round(sum(values) / len(values), 2),
+                "total_responses": len(values),
+                "distribution": {int(o["value"]): values.count(int(o["value"])) for o in options},
+            }
+    return len(responses), stats
+
+
+class TestQuestionStatistics:
+    def test_matches_reference(self):
+        rng = random.Random(7)
+        weird = [None, "x", "3", 2.7, 9, -1]
+        responses = []
+        for _ in range(200):
+            answers = [
+                {"question_id": q, "response_value": rng.choice(weird) if rng.random() < 0.1 else rng.randint(0, 4)}
+                for q in rng.sample(range(1, 13), rng.randint(0, 12))
+            ]
+            if answers and rng.random() < 0.1:
+                answers.append(dict(answers[0]))   # respuesta repetida
+            responses.append({"responses": answers})
+        assert question_statistics(QUESTIONS, OPTIONS, iter(responses)) == _reference(QUESTIONS, OPTIONS, responses)
+
+    def test_empty(self):
+        assert question_statistics(QUESTIONS, OPTIONS, []) == (0, {})
+
+
+class TestStatisticsCache:
+    def test_recomputes_only_when_revision_changes(self):
+        cache, calls = StatisticsCache(), []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        assert cache.get("estres", "r1", compute) == 1
+        assert cache.get("estres", "r1", compute) == 1
+        assert cache.get("extralaborales", "r1", compute) == 2
+        assert cache.get("estres", "r2", compute) == 3
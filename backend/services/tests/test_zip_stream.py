@@ -0,0 +1,40 @@
+"""
+Pruebas del ZIP por streaming.
+"""
+import io
+import os
+import sys
+import zipfile
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.zip_stream import iter_zip
+
+
+class TestIterZip:
+    def test_archive_is_valid_and_stored(self, tmp_path):
+        files = []
+        for i in range(3):
+            path = tmp_path / f"r{i}.pdf"
+            path.write_bytes(os.urandom(100_000 + i))
+            files.append((str(path), path.name))
+        files.append((str(tmp_path / "missing.pdf"), "missing.pdf"))
+
+        data = b"".join(iter_zip(files, chunk_size=8192))
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.testzip() is None
+            assert archive.namelist() == ["r0.pdf", "r1.pdf", "r2.pdf"]
+            assert {i.compress_type for i in archive.infolist()} == {zipfile.ZIP_STORED}
+            assert archive.read("r1.pdf") == (tmp_path / "r1.pdf").read_bytes()
+
+    def test_streams_in_chunks(self, tmp_path):
+        path = tmp_path / "big.pdf"
+        path.write_bytes(b"x" * 1_000_000)
+        chunks = list(iter_zip([(str(path), "big.pdf")], chunk_size=64 * 1024))
+        assert len(chunks) > 10
+        assert max(len(c) for c in chunks) <= 64 * 1024 + 1024
+
+    def test_empty_archive(self):
+        with zipfile.ZipFile(io.BytesIO(b"".join(iter_zip([])))) as archive:
+            assert archive.namelist() == []
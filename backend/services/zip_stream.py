@@ -0,0 +1,69 @@
+"""
+ZIP archives streamed chunk by chunk.
+
+``zipfile`` can write to an unseekable stream: each entry is followed by a
+data descriptor with its CRC and sizes instead of seeking back to patch the
+local header. ``iter_zip`` hands ``zipfile`` a writer that only collects the
+bytes produced so far and yields them as soon as each chunk of a file is
+written, so memory stays at about one chunk whatever the archive size, and
+the client gets the first bytes immediately.
+
+PDFs are already compressed, so entries are ``ZIP_STORED`` by default.
+"""
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkWriter:
+    """Write-only file object that buffers bytes until they are drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(
+    files: Iterable[Tuple[str, str]],
+    compression: int = zipfile.ZIP_STORED,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Yield a ZIP archive of ``(path, arcname)`` pairs; missing paths are skipped."""
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, "w", compression=compression) as archive:
+        for path, arcname in files:
+            try:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                source = open(path, "rb")
+            except OSError:
+                continue
+            info.compress_type = compression
+            with source, archive.open(info, "w", force_zip64=info.file_size >= zipfile.ZIP64_LIMIT) as entry:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    entry.write(chunk)
+                    data = writer.drain()
+                    if data:
+                        yield data
+            data = writer.drain()
+            if data:
+                yield data
+    # Central directory
+    data = writer.drain()
+    if data:
+        yield data
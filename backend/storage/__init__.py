@@ -0,0 +1 @@
+# Storage layer for questionnaire responses
@@ -0,0 +1,107 @@
+"""
+Process-wide cédula → latest record indexes for the JSON repository.
+
+``lookup-cedula``, the session flow and every per-respondent analysis ask for
+"the latest record of cédula X" in a responses or form file. Instead of
+reloading and scanning the file each time, ``RecordIndex`` loads it once and
+keeps a dict keyed by cédula.
+
+- Writes made through the repository update the index in place.
+- Writes made by anyone else (another uvicorn worker, the maintenance
+  scripts) change the files' mtime/size, which drops the index and rebuilds
+  it on the next lookup.
+"""
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .files import file_lock
+from .journal import get_journal, load_records
+
+Signature = Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]
+
+
+def file_stat(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of ``path``, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def file_signature(snapshot_path: str) -> Signature:
+    """(mtime, size) of a journaled file's snapshot and journal."""
+    return file_stat(snapshot_path), file_stat(get_journal(snapshot_path).journal_path)
+
+
+def newest_submission(current: dict, candidate: dict) -> bool:
+    """Responses: the most recent ``submitted_at`` wins, ties keep the earlier record."""
+    return candidate.get("submitted_at", "") > current.get("submitted_at", "")
+
+
+def last_submission(current: dict, candidate: dict) -> bool:
+    """Forms: the last record in submission order wins."""
+    return True
+
+
+class RecordIndex:
+    """cédula → latest record of one journaled file."""
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        key_fn: Callable[[dict], str],
+        replaces: Callable[[dict, dict], bool],
+    ):
+        self.snapshot_path = snapshot_path
+        self.key_fn = key_fn
+        self.replaces = replaces
+        self._lock = threading.Lock()
+        self._latest: Dict[str, dict] = {}
+        self._signature: Optional[Signature] = None
+
+    # ─── Reads ─────────────────────────────────────────────────
+
+    def get(self, cedula: str) -> Optional[dict]:
+        return self._current().get(str(cedula))
+
+    def cedulas(self) -> List[str]:
+        return [c for c in self._current() if c]
+
+    def _current(self) -> Dict[str, dict]:
+        signature = file_signature(self.snapshot_path)
+        with self._lock:
+            if signature != self._signature:
+                # Signature taken before reading: a write racing the rebuild
+                # leaves a mismatch and triggers another rebuild next time.
+                self._latest = self._build(load_records(self.snapshot_path))
+                self._signature = signature
+            return self._latest
+
+    def _build(self, records: List[dict]) -> Dict[str, dict]:
+        latest: Dict[str, dict] = {}
+        for record in records:
+            self._offer(latest, record)
+        return latest
+
+    def _offer(self, latest: Dict[str, dict], record: dict):
+        key = self.key_fn(record)
+        current = latest.get(key)
+        if current is None or self.replaces(current, record):
+            latest[key] = record
+
+    # ─── Writes ────────────────────────────────────────────────
+
+    def append(self, record: dict):
+        """Append ``record`` to the journal and fold it into the index."""
+        with file_lock(self.snapshot_path):
+            before = file_signature(self.snapshot_path)
+            get_journal(self.snapshot_path).append(record)
+            with self._lock:
+                if self._signature is not None and self._signature == before:
+                    self._offer(self._latest, record)
+                    self._signature = file_signature(self.snapshot_path)
+                else:
+                    # Someone else wrote since we last looked: rebuild lazily
+                    self._signature = None
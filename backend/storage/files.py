@@ -0,0 +1,188 @@
+"""
+Primitives for safe writes to the flat-file store.
+
+- ``file_lock``: per-file lock, re-entrant within a thread, shared by every
+  thread of the process and, where ``fcntl`` exists, by every uvicorn worker
+  (advisory ``flock`` on a ``<file>.lock`` sidecar).
+- ``atomic_write_json``: write to a temp file in the same directory, fsync it
+  and ``os.replace`` it over the target, so readers never see a truncated file.
+- ``read_json_for_update``: strict read for read-modify-write paths. A corrupt
+  file is moved aside instead of being treated as empty and overwritten.
+- ``fsync_later``: batched fsync of append-only files (group commit).
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only cover threads of this process
+    fcntl = None
+
+# Max delay before appended data is fsynced; 0 disables batching (fsync on every append)
+FSYNC_INTERVAL_MS = int(os.getenv("STORAGE_FSYNC_INTERVAL_MS", "200"))
+
+
+# ─── Locks ─────────────────────────────────────────────────────
+
+class _PathLock:
+    """Thread lock + inter-process flock for one path."""
+
+    def __init__(self, path: str):
+        self.lock_path = path + ".lock"
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._rlock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._rlock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._rlock.release()
+
+
+_locks: Dict[str, _PathLock] = {}
+_locks_guard = threading.Lock()
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock for every read-modify-write of ``path``."""
+    key = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = _PathLock(key)
+    lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+# ─── Atomic writes ─────────────────────────────────────────────
+
+def atomic_write_json(path: str, data: Any):
+    """Replace ``path`` with ``data`` serialized as JSON, all-or-nothing."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json_for_update(path: str, default: Any) -> Any:
+    """Read ``path`` before rewriting it.
+
+    Missing file → ``default``. Unparseable file → it is renamed to
+    ``<file>.corrupt-<timestamp>`` and ``default`` is returned, so the next
+    write cannot silently destroy what was there.
+    """
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        quarantine = f"{path}.corrupt-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        os.replace(path, quarantine)
+        print(f"Corrupt data file {path} moved to {quarantine}: {e}")
+        return default
+
+
+# ─── Batched fsync ─────────────────────────────────────────────
+
+class FsyncBatcher:
+    """Background thread that fsyncs dirty append-only files every interval.
+
+    Many submits landing within the same interval share a single fsync per
+    file instead of paying one each.
+    """
+
+    def __init__(self, interval_ms: int = FSYNC_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self._dirty: Set[str] = set()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def mark_dirty(self, path: str):
+        if self.interval <= 0:
+            _fsync_path(path)
+            return
+        with self._cond:
+            self._dirty.add(path)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="fsync-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self):
+        """Fsync everything pending right now."""
+        with self._cond:
+            dirty, self._dirty = self._dirty, set()
+        for path in dirty:
+            _fsync_path(path)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+            time.sleep(self.interval)
+            self.flush()
+
+
+def _fsync_path(path: str):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_batcher = FsyncBatcher()
+atexit.register(_batcher.flush)
+
+
+def fsync_later(path: str):
+    """Schedule ``path`` for the next batched fsync."""
+    _batcher.mark_dirty(path)
+
+
+def flush_pending_fsyncs():
+    """Fsync all files with pending appends (call on shutdown)."""
+    _batcher.flush()
@@ -0,0 +1,135 @@
+"""
+Append-only response journal.
+
+Each questionnaire keeps its history in ``responses_{id}.json`` (a JSON array,
+the format every script in this repo already reads) plus a JSON-Lines journal
+``responses_{id}.jsonl`` that receives new submissions. Appending one line is
+constant-time regardless of how many responses exist; once the journal grows
+past ``JOURNAL_COMPACT_EVERY`` records it is folded back into the snapshot.
+
+Writers serialize on ``file_lock(snapshot)``; readers take no lock and read
+the journal before the snapshot, so a concurrent compaction can at worst show
+them a record twice, which ``_merge`` drops by id.
+"""
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from .files import atomic_write_json, file_lock, fsync_later, read_json_for_update
+
+# Number of journal records that triggers a compaction into the snapshot
+COMPACT_EVERY = int(os.getenv("JOURNAL_COMPACT_EVERY", "500"))
+
+
+class ResponseJournal:
+    """Snapshot + JSON-Lines journal for a single responses file."""
+
+    def __init__(self, snapshot_path: str, compact_every: int = COMPACT_EVERY):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + ".jsonl"
+        self.compact_every = compact_every
+        self._pending: Optional[int] = None  # records in the journal, counted lazily
+
+    # ─── Writes ────────────────────────────────────────────────
+
+    def append(self, record: dict):
+        """Append one record to the journal, compacting when it gets too long."""
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with file_lock(self.snapshot_path):
+            with open(self.journal_path, "a+b") as f:
+                # A crash mid-append leaves a line without its newline; end it so
+                # this record does not get glued to (and dropped with) it
+                f.seek(0, os.SEEK_END)
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                f.write(line)
+            fsync_later(self.journal_path)
+            if self._pending is None:
+                self._pending = len(self._read_journal())
+            else:
+                self._pending += 1
+            if self._pending >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        """Fold the journal into the snapshot and empty the journal."""
+        with file_lock(self.snapshot_path):
+            self._compact()
+
+    def _compact(self):
+        journal = self._read_journal()
+        if journal:
+            records = self._merge(read_json_for_update(self.snapshot_path, []), journal)
+            atomic_write_json(self.snapshot_path, records)
+        # Truncate only after the snapshot holds every journal record
+        if os.path.exists(self.journal_path):
+            open(self.journal_path, "w").close()
+        self._pending = 0
+
+    # ─── Reads ─────────────────────────────────────────────────
+
+    def load(self) -> List[dict]:
+        """Return snapshot + journal records as a single list, in submission order."""
+        journal = self._read_journal()
+        return self._merge(self._read_snapshot(), journal)
+
+    def _read_snapshot(self) -> List[dict]:
+        if not os.path.exists(self.snapshot_path):
+            return []
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return []
+
+    def _read_journal(self) -> List[dict]:
+        if not os.path.exists(self.journal_path):
+            return []
+        records = []
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A crash mid-append leaves a partial last line; skip it
+                    continue
+        return records
+
+    @staticmethod
+    def _merge(snapshot: List[dict], journal: List[dict]) -> List[dict]:
+        """Concatenate, dropping journal records already present in the snapshot.
+
+        This happens when the process died between writing the compacted
+        snapshot and truncating the journal, or when a lock-free reader raced
+        a compaction.
+        """
+        if not journal:
+            return snapshot
+        seen = {r.get("id") for r in snapshot if isinstance(r, dict) and r.get("id")}
+        snapshot.extend(r for r in journal if not r.get("id") or r["id"] not in seen)
+        return snapshot
+
+
+_journals: Dict[str, ResponseJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(snapshot_path: str) -> ResponseJournal:
+    """Return the process-wide journal for a responses file."""
+    key = os.path.abspath(snapshot_path)
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = _journals[key] = ResponseJournal(key)
+        return journal
+
+
+def load_records(snapshot_path: str) -> List[dict]:
+    """Read every record of a responses file, including journaled ones."""
+    return get_journal(snapshot_path).load()
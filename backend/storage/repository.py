@@ -0,0 +1,237 @@
+"""
+Repository interface for responses, forms and sessions.
+
+``app.py``, ``AnalysisEngine`` and ``AnalysisService`` talk to storage only
+through ``ResponseRepository``. Two implementations exist:
+
+- ``JsonRepository``: today's flat files in ``backend/data`` (journaled
+  ``responses_*.json`` / ``form_*.json`` and ``sessions.json``).
+- ``SqliteRepository`` (``storage.sqlite_repository``): one embedded SQLite
+  database in WAL mode with indexes on cedula, questionnaire and submitted_at.
+
+The backend is selected with ``STORAGE_BACKEND=json|sqlite`` (default json);
+the SQLite file defaults to ``data/cuestionarios.db`` (``SQLITE_PATH``).
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import ContextManager, Dict, Hashable, Iterable, Iterator, List, Optional
+
+from .cedula_index import RecordIndex, file_signature, last_submission, newest_submission
+from .journal import load_records
+from .sessions import SessionStore
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BACKEND_DIR, "data")
+
+# Likert questionnaires whose respondents count as "respondentes"
+LIKERT_QUESTIONNAIRES = ["estres", "extralaborales", "intralaborales-a", "intralaborales-b"]
+
+# Per-cédula session locks of backends without a lock of their own
+_session_locks: Dict[str, threading.Lock] = {}
+_session_locks_guard = threading.Lock()
+
+
+def response_cedula(record: dict) -> str:
+    """Cédula of a questionnaire response record."""
+    return str(record.get("respondent_cedula") or "")
+
+
+def form_cedula(record: dict) -> str:
+    """Cédula of a form (datos-generales) record."""
+    return str((record.get("data") or {}).get("numero_identificacion") or "")
+
+
+class ResponseRepository(ABC):
+    """Persistence of questionnaire responses, form submissions and sessions."""
+
+    # ─── Questionnaire responses ───────────────────────────────
+
+    @abstractmethod
+    def list_responses(self, questionnaire_id: str) -> List[dict]:
+        """All responses of a questionnaire, in submission order."""
+
+    def iter_responses(self, questionnaire_id: str) -> Iterator[dict]:
+        """Lazily iterate the responses of a questionnaire."""
+        return iter(self.list_responses(questionnaire_id))
+
+    @abstractmethod
+    def add_response(self, questionnaire_id: str, record: dict):
+        """Persist a new response record."""
+
+    @abstractmethod
+    def latest_response(self, questionnaire_id: str, cedula: str) -> Optional[dict]:
+        """Most recent response (by ``submitted_at``) of a respondent, or None."""
+
+    # ─── Form submissions ──────────────────────────────────────
+
+    @abstractmethod
+    def list_form_responses(self, form_id: str) -> List[dict]:
+        """All submissions of a form, in submission order."""
+
+    @abstractmethod
+    def add_form_response(self, form_id: str, record: dict):
+        """Persist a new form submission."""
+
+    @abstractmethod
+    def latest_form_response(self, form_id: str, cedula: str) -> Optional[dict]:
+        """Last submission of a form for a cédula, or None."""
+
+    # ─── Sessions ──────────────────────────────────────────────
+
+    @abstractmethod
+    def list_sessions(self) -> Dict[str, dict]:
+        """All sessions keyed by cédula."""
+
+    @abstractmethod
+    def get_session(self, cedula: str) -> Optional[dict]:
+        """Session of a respondent, or None."""
+
+    @abstractmethod
+    def save_session(self, session: dict):
+        """Insert or replace the session of ``session["cedula"]``."""
+
+    def session_lock(self, cedula: str) -> ContextManager:
+        """Lock to hold across a ``get_session`` → modify → ``save_session`` of ``cedula``."""
+        with _session_locks_guard:
+            lock = _session_locks.get(str(cedula))
+            if lock is None:
+                lock = _session_locks[str(cedula)] = threading.Lock()
+        return lock
+
+    def flush(self):
+        """Persist anything still buffered in memory (called on shutdown)."""
+
+    # ─── Respondents ───────────────────────────────────────────
+
+    def list_cedulas(self, questionnaire_ids: Iterable[str] = LIKERT_QUESTIONNAIRES) -> List[str]:
+        """Unique cédulas from datos-generales plus the given questionnaires."""
+        cedulas = {form_cedula(r) for r in self.list_form_responses("datos-generales")}
+        for q in questionnaire_ids:
+            cedulas.update(response_cedula(r) for r in self.iter_responses(q))
+        cedulas.discard("")
+        return list(cedulas)
+
+    @abstractmethod
+    def revision(self, questionnaire_ids: Iterable[str] = LIKERT_QUESTIONNAIRES) -> Hashable:
+        """Opaque token that changes whenever datos-generales or the given questionnaires are written."""
+
+
+class JsonRepository(ResponseRepository):
+    """Flat-file repository: the historical ``backend/data/*.json`` layout.
+
+    Per-cédula lookups are answered from in-memory ``RecordIndex`` instances
+    (see ``storage.cedula_index``); sessions live in a ``SessionStore``
+    (``sessions.json`` snapshot + ``sessions.jsonl`` log, see
+    ``storage.sessions``).
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, read_only: bool = False):
+        """``read_only``: responses and forms only, for worker processes. No
+        ``SessionStore`` is opened, so nothing snapshots sessions at exit;
+        sessions read as empty and writes raise ``PermissionError``."""
+        self.data_dir = data_dir
+        self.read_only = read_only
+        if not read_only:
+            os.makedirs(self.data_dir, exist_ok=True)
+        self._indexes: Dict[str, RecordIndex] = {}
+        self._indexes_lock = threading.Lock()
+        self._sessions = None if read_only else SessionStore(self.sessions_path())
+
+    def responses_path(self, questionnaire_id: str) -> str:
+        return os.path.join(self.data_dir, f"responses_{questionnaire_id}.json")
+
+    def form_path(self, form_id: str) -> str:
+        return os.path.join(self.data_dir, f"form_{form_id}.json")
+
+    def sessions_path(self) -> str:
+        return os.path.join(self.data_dir, "sessions.json")
+
+    def _index(self, path: str, key_fn, replaces) -> RecordIndex:
+        with self._indexes_lock:
+            index = self._indexes.get(path)
+            if index is None:
+                index = self._indexes[path] = RecordIndex(path, key_fn, replaces)
+            return index
+
+    def _check_writable(self):
+        if self.read_only:
+            raise PermissionError(f"Read-only repository: {self.data_dir}")
+
+    def _response_index(self, questionnaire_id: str) -> RecordIndex:
+        return self._index(self.responses_path(questionnaire_id), response_cedula, newest_submission)
+
+    def _form_index(self, form_id: str) -> RecordIndex:
+        return self._index(self.form_path(form_id), form_cedula, last_submission)
+
+    # ─── Questionnaire responses ───────────────────────────────
+
+    def list_responses(self, questionnaire_id: str) -> List[dict]:
+        return load_records(self.responses_path(questionnaire_id))
+
+    def add_response(self, questionnaire_id: str, record: dict):
+        self._check_writable()
+        self._response_index(questionnaire_id).append(record)
+
+    def latest_response(self, questionnaire_id: str, cedula: str) -> Optional[dict]:
+        return self._response_index(questionnaire_id).get(cedula)
+
+    # ─── Form submissions ──────────────────────────────────────
+
+    def list_form_responses(self, form_id: str) -> List[dict]:
+        return load_records(self.form_path(form_id))
+
+    def add_form_response(self, form_id: str, record: dict):
+        self._check_writable()
+        self._form_index(form_id).append(record)
+
+    def latest_form_response(self, form_id: str, cedula: str) -> Optional[dict]:
+        return self._form_index(form_id).get(cedula)
+
+    # ─── Sessions ──────────────────────────────────────────────
+
+    def list_sessions(self) -> Dict[str, dict]:
+        return self._sessions.all() if self._sessions is not None else {}
+
+    def get_session(self, cedula: str) -> Optional[dict]:
+        return self._sessions.get(cedula) if self._sessions is not None else None
+
+    def save_session(self, session: dict):
+        self._check_writable()
+        self._sessions.save(session)
+
+    def flush(self):
+        if self._sessions is not None:
+            self._sessions.snapshot()
+
+    # ─── Respondents ───────────────────────────────────────────
+
+    def list_cedulas(self, questionnaire_ids: Iterable[str] = LIKERT_QUESTIONNAIRES) -> List[str]:
+        cedulas = set(self._form_index("datos-generales").cedulas())
+        for q in questionnaire_ids:
+            cedulas.update(self._response_index(q).cedulas())
+        return list(cedulas)
+
+    def revision(self, questionnaire_ids: Iterable[str] = LIKERT_QUESTIONNAIRES) -> Hashable:
+        paths = [self.form_path("datos-generales")] + [self.responses_path(q) for q in questionnaire_ids]
+        return tuple(file_signature(path) for path in paths)
+
+
+_repositories: Dict[str, ResponseRepository] = {}
+_repositories_lock = threading.Lock()
+
+
+def get_repository(data_dir: str = DATA_DIR) -> ResponseRepository:
+    """Process-wide repository for ``data_dir``, per ``STORAGE_BACKEND``."""
+    key = os.path.abspath(data_dir)
+    with _repositories_lock:
+        repo = _repositories.get(key)
+        if repo is None:
+            if os.getenv("STORAGE_BACKEND", "json").lower() == "sqlite":
+                from .sqlite_repository import SqliteRepository
+                db_path = os.getenv("SQLITE_PATH") or os.path.join(key, "cuestionarios.db")
+                repo = SqliteRepository(db_path)
+            else:
+                repo = JsonRepository(key)
+            _repositories[key] = repo
+        return repo
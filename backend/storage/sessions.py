@@ -0,0 +1,165 @@
+"""
+Session store of the JSON repository: ``sessions.json`` + ``sessions.jsonl``.
+
+``save_session`` used to read the whole ``sessions.json``, replace one key and
+rewrite the file on every submit. ``SessionStore`` keeps every session in an
+in-memory dict and persists it write-behind:
+
+- each save appends the full session as one line to ``sessions.jsonl``
+  (constant-time, fsynced in batches like the response journal);
+- a snapshot of the dict is written to ``sessions.json`` at most every
+  ``SESSION_SNAPSHOT_SECONDS`` (default 5) and the log is truncated after it;
+  0 writes the snapshot on every save.
+
+Recovery replays the log over the snapshot. A session line holds the whole
+session, so replaying a line the snapshot already contains (crash between
+snapshot and truncation) is harmless, and a partial last line is skipped.
+
+Other processes writing the same files (uvicorn workers, scripts) are picked
+up on the next read: new log lines are replayed from the last offset, and a
+rewritten snapshot or truncated log triggers a full reload.
+"""
+import atexit
+import json
+import os
+import threading
+import weakref
+from typing import Dict, Optional
+
+from .cedula_index import file_stat
+from .files import atomic_write_json, file_lock, fsync_later
+
+SNAPSHOT_SECONDS = float(os.getenv("SESSION_SNAPSHOT_SECONDS", "5"))
+
+
+class SessionStore:
+    """cédula → session, persisted as snapshot + append log."""
+
+    def __init__(self, snapshot_path: str, snapshot_seconds: float = SNAPSHOT_SECONDS):
+        self.snapshot_path = snapshot_path
+        self.log_path = os.path.splitext(snapshot_path)[0] + ".jsonl"
+        self.snapshot_seconds = snapshot_seconds
+        self._lock = threading.RLock()
+        self._sessions: Dict[str, dict] = {}
+        self._snapshot_stat = None
+        self._log_offset = 0            # bytes of the log already applied
+        self._loaded = False
+        self._timer: Optional[threading.Timer] = None
+        _stores.add(self)
+
+    # ─── Reads ─────────────────────────────────────────────────
+
+    def get(self, cedula: str) -> Optional[dict]:
+        session = self._current().get(cedula)
+        # Callers update the session in place before saving it
+        return dict(session) if session is not None else None
+
+    def all(self) -> Dict[str, dict]:
+        return dict(self._current())
+
+    def _current(self) -> Dict[str, dict]:
+        snapshot_stat = file_stat(self.snapshot_path)
+        log_stat = file_stat(self.log_path)
+        log_size = log_stat[1] if log_stat else 0
+        with self._lock:
+            if not self._loaded or snapshot_stat != self._snapshot_stat or log_size < self._log_offset:
+                self._reload(snapshot_stat)
+            elif log_size > self._log_offset:
+                self._replay()
+            return self._sessions
+
+    def _reload(self, snapshot_stat):
+        sessions = {}
+        if snapshot_stat is not None:
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    sessions = json.load(f)
+            except (ValueError, FileNotFoundError):
+                sessions = {}
+        self._sessions = sessions
+        self._snapshot_stat = snapshot_stat
+        self._log_offset = 0
+        self._loaded = True
+        self._replay()
+
+    def _replay(self):
+        """Apply the complete log lines written after ``_log_offset``."""
+        try:
+            f = open(self.log_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(self._log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # being written right now, or cut by a crash
+                self._log_offset += len(line)
+                try:
+                    session = json.loads(line)
+                    self._sessions[str(session["cedula"])] = session
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    # ─── Writes ────────────────────────────────────────────────
+
+    def save(self, session: dict):
+        """Insert or replace ``session`` in memory and append it to the log."""
+        line = (json.dumps(session, ensure_ascii=False) + "\n").encode("utf-8")
+        with file_lock(self.snapshot_path):
+            self._current()
+            with open(self.log_path, "ab") as f:
+                if f.tell() > self._log_offset:
+                    # Finish a line cut by a crash so it does not swallow this one
+                    f.write(b"\n")
+                f.write(line)
+                end = f.tell()
+            fsync_later(self.log_path)
+            with self._lock:
+                self._sessions[str(session["cedula"])] = session
+                self._log_offset = end
+        self._schedule_snapshot()
+
+    def _schedule_snapshot(self):
+        if self.snapshot_seconds <= 0:
+            self.snapshot()
+            return
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.snapshot_seconds, self.snapshot)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def snapshot(self):
+        """Write every session to ``sessions.json`` and empty the log."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        with file_lock(self.snapshot_path):
+            self._current()
+            if not os.path.exists(self.log_path) or self._log_offset == 0:
+                return
+            with self._lock:
+                sessions = dict(self._sessions)
+            atomic_write_json(self.snapshot_path, sessions)
+            # Truncate only after the snapshot holds every logged session
+            open(self.log_path, "w").close()
+            with self._lock:
+                self._snapshot_stat = file_stat(self.snapshot_path)
+                self._log_offset = 0
+
+
+_stores: "weakref.WeakSet[SessionStore]" = weakref.WeakSet()
+
+
+def flush_sessions():
+    """Snapshot every store with logged sessions (call on shutdown)."""
+    for store in list(_stores):
+        try:
+            store.snapshot()
+        except OSError as e:
+            # The log still holds the sessions; they are replayed on the next start
+            print(f"Could not snapshot {store.snapshot_path}: {e}")
+
+
+atexit.register(flush_sessions)
@@ -0,0 +1,268 @@
+"""
+SQLite implementation of ``ResponseRepository``.
+
+One embedded database file in WAL mode: readers never block the writer and
+lookups by cédula use indexes instead of scanning every response. Records are
+kept verbatim as JSON in ``payload`` so API responses are identical to the
+JSON backend; the indexed columns are extracted on insert.
+
+Import existing flat files with:
+
+    python -m storage.sqlite_repository --import-json data/ [--db data/cuestionarios.db]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import urllib.parse
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from .repository import (
+    DATA_DIR, JsonRepository, LIKERT_QUESTIONNAIRES, ResponseRepository, form_cedula, response_cedula,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    seq              INTEGER PRIMARY KEY AUTOINCREMENT,
+    id               TEXT,
+    questionnaire_id TEXT NOT NULL,
+    cedula           TEXT,
+    submitted_at     TEXT,
+    payload          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_cedula    ON responses (questionnaire_id, cedula, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_responses_submitted ON responses (questionnaire_id, submitted_at);
+
+CREATE TABLE IF NOT EXISTS form_responses (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    id           TEXT,
+    form_id      TEXT NOT NULL,
+    cedula       TEXT,
+    submitted_at TEXT,
+    payload      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_forms_cedula    ON form_responses (form_id, cedula);
+CREATE INDEX IF NOT EXISTS idx_forms_submitted ON form_responses (form_id, submitted_at);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    cedula      TEXT PRIMARY KEY,
+    last_active TEXT,
+    payload     TEXT NOT NULL
+);
+"""
+
+# A record id is stored once per questionnaire/form, so importing the same JSON
+# data again adds nothing. Duplicates left by imports made before these indexes
+# existed are dropped (keeping the first copy) when the index is created.
+UNIQUE_IDS = {
+    "idx_responses_id": ("responses", "questionnaire_id"),
+    "idx_forms_id":     ("form_responses", "form_id"),
+}
+
+
+class SqliteRepository(ResponseRepository):
+    """Repository backed by a single SQLite database in WAL mode."""
+
+    def __init__(self, db_path: str, read_only: bool = False):
+        """``read_only``: open the existing database without creating or writing anything."""
+        self.db_path = db_path
+        self.read_only = read_only
+        self._local = threading.local()
+        if not read_only:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            self._create_unique_ids(conn)
+            conn.commit()
+
+    @staticmethod
+    def _create_unique_ids(conn: sqlite3.Connection):
+        existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for index, (table, scope) in UNIQUE_IDS.items():
+            if index in existing:
+                continue
+            with conn:
+                conn.execute(
+                    f"DELETE FROM {table} WHERE id IS NOT NULL AND seq NOT IN "
+                    f"(SELECT min(seq) FROM {table} WHERE id IS NOT NULL GROUP BY {scope}, id)"
+                )
+                conn.execute(f"CREATE UNIQUE INDEX {index} ON {table} ({scope}, id)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets them read concurrently."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.read_only:
+                uri = "file:" + urllib.parse.quote(os.path.abspath(self.db_path)) + "?mode=ro"
+                conn = sqlite3.connect(uri, uri=True, timeout=30)
+            else:
+                conn = sqlite3.connect(self.db_path, timeout=30)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ─── Questionnaire responses ───────────────────────────────
+
+    def list_responses(self, questionnaire_id: str) -> List[dict]:
+        return list(self.iter_responses(questionnaire_id))
+
+    def iter_responses(self, questionnaire_id: str) -> Iterator[dict]:
+        cursor = self._conn().execute(
+            "SELECT payload FROM responses WHERE questionnaire_id = ? ORDER BY seq", (questionnaire_id,)
+        )
+        for (payload,) in cursor:
+            yield json.loads(payload)
+
+    def add_response(self, questionnaire_id: str, record: dict):
+        self.add_responses(questionnaire_id, [record])
+
+    def add_responses(self, questionnaire_id: str, records: List[dict]) -> int:
+        """Insert ``records``, skipping ids already stored; returns how many were added."""
+        conn = self._conn()
+        with conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO responses (id, questionnaire_id, cedula, submitted_at, payload) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (r.get("id"), questionnaire_id, response_cedula(r), r.get("submitted_at", ""),
+                     json.dumps(r, ensure_ascii=False))
+                    for r in records
+                ],
+            )
+        return cursor.rowcount
+
+    def latest_response(self, questionnaire_id: str, cedula: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT payload FROM responses WHERE questionnaire_id = ? AND cedula = ? "
+            "ORDER BY submitted_at DESC, seq ASC LIMIT 1",
+            (questionnaire_id, str(cedula)),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # ─── Form submissions ──────────────────────────────────────
+
+    def list_form_responses(self, form_id: str) -> List[dict]:
+        rows = self._conn().execute(
+            "SELECT payload FROM form_responses WHERE form_id = ? ORDER BY seq", (form_id,)
+        )
+        return [json.loads(payload) for (payload,) in rows]
+
+    def add_form_response(self, form_id: str, record: dict):
+        self.add_form_responses(form_id, [record])
+
+    def add_form_responses(self, form_id: str, records: List[dict]) -> int:
+        """Insert ``records``, skipping ids already stored; returns how many were added."""
+        conn = self._conn()
+        with conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO form_responses (id, form_id, cedula, submitted_at, payload) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (r.get("id"), form_id, form_cedula(r), r.get("submitted_at", ""),
+                     json.dumps(r, ensure_ascii=False))
+                    for r in records
+                ],
+            )
+        return cursor.rowcount
+
+    def latest_form_response(self, form_id: str, cedula: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT payload FROM form_responses WHERE form_id = ? AND cedula = ? ORDER BY seq DESC LIMIT 1",
+            (form_id, str(cedula)),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # ─── Sessions ──────────────────────────────────────────────
+
+    def list_sessions(self) -> Dict[str, dict]:
+        rows = self._conn().execute("SELECT cedula, payload FROM sessions")
+        return {cedula: json.loads(payload) for cedula, payload in rows}
+
+    def get_session(self, cedula: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT payload FROM sessions WHERE cedula = ?", (str(cedula),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_session(self, session: dict):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (cedula, last_active, payload) VALUES (?, ?, ?)",
+                (str(session["cedula"]), session.get("last_active"), json.dumps(session, ensure_ascii=False)),
+            )
+
+    @contextmanager
+    def session_lock(self, cedula: str):
+        """Run the read-modify-write in ``BEGIN IMMEDIATE``: also excludes other workers on the database."""
+        if self.read_only:
+            with super().session_lock(cedula):
+                yield
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    # ─── Respondents ───────────────────────────────────────────
+
+    def list_cedulas(self, questionnaire_ids=LIKERT_QUESTIONNAIRES) -> List[str]:
+        questionnaire_ids = list(questionnaire_ids)
+        placeholders = ",".join("?" for _ in questionnaire_ids) or "NULL"
+        rows = self._conn().execute(
+            "SELECT cedula FROM form_responses WHERE form_id = 'datos-generales' AND cedula != '' "
+            f"UNION SELECT cedula FROM responses WHERE questionnaire_id IN ({placeholders}) AND cedula != ''",
+            questionnaire_ids,
+        )
+        return [cedula for (cedula,) in rows]
+
+    def revision(self, questionnaire_ids=LIKERT_QUESTIONNAIRES):
+        # Rows are only ever appended, so the highest seq changes on every write
+        return self._conn().execute(
+            "SELECT (SELECT max(seq) FROM responses), (SELECT max(seq) FROM form_responses)"
+        ).fetchone()
+
+    # ─── Migration ─────────────────────────────────────────────
+
+    def import_json(self, data_dir: str = DATA_DIR) -> Dict[str, int]:
+        """Copy every record of a JSON data directory into this database.
+
+        Safe to run again: records already imported (same id) are skipped and
+        the counts only include what was added.
+        """
+        source = JsonRepository(data_dir)
+        counts = {}
+        for q in _ids_with_prefix(data_dir, "responses_"):
+            counts[f"responses_{q}"] = self.add_responses(q, source.list_responses(q))
+        for form_id in _ids_with_prefix(data_dir, "form_"):
+            counts[f"form_{form_id}"] = self.add_form_responses(form_id, source.list_form_responses(form_id))
+        sessions = source.list_sessions()
+        for session in sessions.values():
+            self.save_session(session)
+        counts["sessions"] = len(sessions)
+        return counts
+
+
+def _ids_with_prefix(data_dir: str, prefix: str) -> List[str]:
+    """Questionnaire/form ids present in ``data_dir`` as ``<prefix><id>.json[l]``."""
+    ids = set()
+    for name in os.listdir(data_dir):
+        base, ext = os.path.splitext(name)
+        if ext in (".json", ".jsonl") and base.startswith(prefix):
+            ids.add(base[len(prefix):])
+    return sorted(ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importar datos JSON a SQLite")
+    parser.add_argument("--import-json", default=DATA_DIR, help="Directorio de datos JSON (default: backend/data)")
+    parser.add_argument("--db", default=None, help="Archivo SQLite destino (default: <datos>/cuestionarios.db)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(args.import_json, "cuestionarios.db")
+    counts = SqliteRepository(db_path).import_json(args.import_json)
+    for name, n in counts.items():
+        print(f"{name}: {n}")
@@ -0,0 +1,328 @@
+"""
+Pruebas de la capa de almacenamiento (journal de respuestas, escrituras atómicas,
+repositorios JSON y SQLite).
+"""
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Ensure the backend directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from storage.files import atomic_write_json, file_lock, read_json_for_update
+from storage.journal import ResponseJournal
+from storage.repository import JsonRepository
+from storage.sessions import SessionStore
+from storage.sqlite_repository import SqliteRepository
+
+
+def _record(i: int) -> dict:
+    return {"id": f"r{i}", "respondent_cedula": str(1000 + i), "responses": []}
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / "responses_estres.json")
+
+
+class TestResponseJournal:
+    def test_append_does_not_touch_snapshot(self, snapshot_path):
+        journal = ResponseJournal(snapshot_path, compact_every=100)
+        journal.append(_record(1))
+        assert not os.path.exists(snapshot_path)
+        assert [r["id"] for r in journal.load()] == ["r1"]
+
+    def test_load_includes_legacy_snapshot(self, snapshot_path):
+        with open(snapshot_path, "w", encoding="utf-8") as f:
+            json.dump([_record(1), _record(2)], f)
+        journal = ResponseJournal(snapshot_path, compact_every=100)
+        journal.append(_record(3))
+        assert [r["id"] for r in journal.load()] == ["r1", "r2", "r3"]
+
+    def test_compaction_folds_journal_into_snapshot(self, snapshot_path):
+        journal = ResponseJournal(snapshot_path, compact_every=3)
+        for i in range(4):
+            journal.append(_record(i))
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            assert [r["id"] for r in json.load(f)] == ["r0", "r1", "r2"]
+        assert [r["id"] for r in journal.load()] == ["r0", "r1", "r2", "r3"]
+
+    def test_partial_last_line_is_ignored(self, snapshot_path):
+        journal = ResponseJournal(snapshot_path, compact_every=100)
+        journal.append(_record(1))
+        with open(journal.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"id": "r2", "respo')
+        assert [r["id"] for r in journal.load()] == ["r1"]
+
+    def test_append_after_partial_line_is_kept(self, snapshot_path):
+        journal = ResponseJournal(snapshot_path, compact_every=100)
+        journal.append(_record(1))
+        journal.append(_record(2))
+        with open(journal.journal_path, "rb+") as f:
+            f.truncate(os.path.getsize(journal.journal_path) - 10)
+        journal.append(_record(3))
+        assert [r["id"] for r in journal.load()] == ["r1", "r3"]
+
+    def test_interrupted_compaction_does_not_duplicate(self, snapshot_path):
+        journal = ResponseJournal(snapshot_path, compact_every=100)
+        journal.append(_record(1))
+        # Snapshot already written but journal not truncated yet
+        with open(snapshot_path, "w", encoding="utf-8") as f:
+            json.dump([_record(1)], f)
+        assert [r["id"] for r in journal.load()] == ["r1"]
+
+
+class TestSafeWrites:
+    def test_atomic_write_leaves_no_temp_files(self, tmp_path):
+        path = str(tmp_path / "sessions.json")
+        atomic_write_json(path, {"1": {"cedula": "1"}})
+        atomic_write_json(path, {"2": {"cedula": "2"}})
+        assert os.listdir(tmp_path) == ["sessions.json"]
+        with open(path, "r", encoding="utf-8") as f:
+            assert json.load(f) == {"2": {"cedula": "2"}}
+
+    def test_corrupt_file_is_quarantined_not_overwritten(self, tmp_path):
+        path = str(tmp_path / "sessions.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"1": {"cedula": "1"')
+        assert read_json_for_update(path, {}) == {}
+        quarantined = [n for n in os.listdir(tmp_path) if ".corrupt-" in n]
+        assert len(quarantined) == 1
+        assert not os.path.exists(path)
+
+    def test_file_lock_is_reentrant(self, tmp_path):
+        path = str(tmp_path / "responses_estres.json")
+        with file_lock(path):
+            with file_lock(path):
+                pass
+
+    def test_concurrent_appends_keep_every_record(self, snapshot_path):
+        journal = ResponseJournal(snapshot_path, compact_every=7)
+        threads = [
+            threading.Thread(target=lambda k=k: [journal.append(_record(k * 50 + i)) for i in range(50)])
+            for k in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(journal.load()) == 200
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "json":
+        return JsonRepository(str(tmp_path))
+    return SqliteRepository(str(tmp_path / "test.db"))
+
+
+def _response(rid: str, cedula: str, submitted_at: str) -> dict:
+    return {"id": rid, "submitted_at": submitted_at, "respondent_cedula": cedula, "responses": []}
+
+
+def _form(rid: str, cedula: str, **data) -> dict:
+    return {"id": rid, "submitted_at": "2026-01-01", "data": {"numero_identificacion": cedula, **data}}
+
+
+def _complete_in_worker(db_path: str, form_id: str):
+    worker = SqliteRepository(db_path)
+    with worker.session_lock("1"):
+        session = worker.get_session("1")
+        time.sleep(0.05)
+        session["completed_forms"] = session["completed_forms"] + [form_id]
+        worker.save_session(session)
+
+
+class TestRepositories:
+    def test_responses_round_trip_in_order(self, repo):
+        repo.add_response("estres", _response("a", "1", "2026-01-01T10:00"))
+        repo.add_response("estres", _response("b", "2", "2026-01-01T09:00"))
+        assert [r["id"] for r in repo.list_responses("estres")] == ["a", "b"]
+        assert repo.list_responses("extralaborales") == []
+
+    def test_latest_response_by_submitted_at(self, repo):
+        repo.add_response("estres", _response("new", "1", "2026-02-01T00:00"))
+        repo.add_response("estres", _response("old", "1", "2026-01-01T00:00"))
+        assert repo.latest_response("estres", "1")["id"] == "new"
+        assert repo.latest_response("estres", "9") is None
+
+    def test_latest_form_response_is_last_submitted(self, repo):
+        repo.add_form_response("datos-generales", _form("f1", "1", tiene_personal_cargo="no"))
+        repo.add_form_response("datos-generales", _form("f2", "1", tiene_personal_cargo="si"))
+        assert repo.latest_form_response("datos-generales", "1")["id"] == "f2"
+
+    def test_sessions(self, repo):
+        repo.save_session({"cedula": "1", "completed_forms": []})
+        repo.save_session({"cedula": "1", "completed_forms": ["estres"]})
+        assert repo.get_session("1")["completed_forms"] == ["estres"]
+        assert list(repo.list_sessions()) == ["1"]
+        assert repo.get_session("2") is None
+
+    def test_session_lock_keeps_concurrent_updates(self, repo):
+        repo.save_session({"cedula": "1", "completed_forms": []})
+
+        def complete(form_id):
+            with repo.session_lock("1"):
+                session = repo.get_session("1")
+                time.sleep(0.01)
+                session["completed_forms"] = session["completed_forms"] + [form_id]
+                repo.save_session(session)
+
+        threads = [threading.Thread(target=complete, args=(f"q{i}",)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(repo.get_session("1")["completed_forms"]) == [f"q{i}" for i in range(6)]
+
+    def test_session_lock_is_per_cedula(self, repo):
+        if isinstance(repo, SqliteRepository):
+            pytest.skip("SQLite serializes writers on the database")
+        with repo.session_lock("1"):
+            acquired = []
+            other = threading.Thread(target=lambda: acquired.append(repo.session_lock("2").acquire(timeout=1)))
+            other.start()
+            other.join()
+            assert acquired == [True]
+            repo.session_lock("2").release()
+
+    def test_sqlite_session_lock_spans_processes(self, tmp_path):
+        db_path = str(tmp_path / "test.db")
+        SqliteRepository(db_path).save_session({"cedula": "1", "completed_forms": []})
+        processes = [
+            multiprocessing.Process(target=_complete_in_worker, args=(db_path, f"q{i}")) for i in range(4)
+        ]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        completed = SqliteRepository(db_path).get_session("1")["completed_forms"]
+        assert sorted(completed) == [f"q{i}" for i in range(4)]
+
+    def test_list_cedulas(self, repo):
+        repo.add_form_response("datos-generales", _form("f1", "1"))
+        repo.add_response("estres", _response("a", "2", "2026-01-01"))
+        repo.add_response("estres", _response("b", "2", "2026-01-02"))
+        assert sorted(repo.list_cedulas()) == ["1", "2"]
+
+
+class TestSessionStore:
+    def test_save_appends_without_rewriting_snapshot(self, tmp_path):
+        store = SessionStore(str(tmp_path / "sessions.json"), snapshot_seconds=60)
+        store.save({"cedula": "1", "completed_forms": []})
+        store.save({"cedula": "1", "completed_forms": ["estres"]})
+        assert not os.path.exists(tmp_path / "sessions.json")
+        assert store.get("1")["completed_forms"] == ["estres"]
+        # Recovery: a fresh store replays the log
+        assert SessionStore(str(tmp_path / "sessions.json")).get("1")["completed_forms"] == ["estres"]
+
+    def test_snapshot_folds_log(self, tmp_path):
+        store = SessionStore(str(tmp_path / "sessions.json"), snapshot_seconds=60)
+        store.save({"cedula": "1", "completed_forms": []})
+        store.save({"cedula": "2", "completed_forms": []})
+        store.snapshot()
+        with open(tmp_path / "sessions.json", "r", encoding="utf-8") as f:
+            assert sorted(json.load(f)) == ["1", "2"]
+        assert os.path.getsize(store.log_path) == 0
+        assert sorted(store.all()) == ["1", "2"]
+
+    def test_legacy_snapshot_and_crash_leftovers(self, tmp_path):
+        path = tmp_path / "sessions.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"1": {"cedula": "1", "completed_forms": ["estres"]}}, f)
+        # Snapshot written but log not truncated, then a partial last line
+        with open(tmp_path / "sessions.jsonl", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"cedula": "1", "completed_forms": ["estres"]}) + "\n")
+            f.write('{"cedula": "2", "compl')
+        store = SessionStore(str(path), snapshot_seconds=60)
+        assert sorted(store.all()) == ["1"]
+        store.save({"cedula": "3", "completed_forms": []})
+        assert sorted(SessionStore(str(path)).all()) == ["1", "3"]
+
+    def test_debounced_snapshot(self, tmp_path):
+        store = SessionStore(str(tmp_path / "sessions.json"), snapshot_seconds=0.5)
+        for i in range(5):
+            store.save({"cedula": str(i), "completed_forms": []})
+        timer = store._timer
+        assert not os.path.exists(tmp_path / "sessions.json")
+        timer.join(5)
+        with open(tmp_path / "sessions.json", "r", encoding="utf-8") as f:
+            assert len(json.load(f)) == 5
+
+
+def test_sqlite_import_from_json(tmp_path):
+    source = JsonRepository(str(tmp_path / "data"))
+    source.add_response("estres", _response("a", "1", "2026-01-01"))
+    source.add_form_response("datos-generales", _form("f1", "1"))
+    source.save_session({"cedula": "1", "completed_forms": ["datos-generales"]})
+
+    target = SqliteRepository(str(tmp_path / "test.db"))
+    counts = target.import_json(str(tmp_path / "data"))
+    assert counts == {"responses_estres": 1, "form_datos-generales": 1, "sessions": 1}
+    assert target.latest_response("estres", "1")["id"] == "a"
+    assert target.get_session("1")["completed_forms"] == ["datos-generales"]
+
+
+def test_sqlite_import_twice_adds_nothing(tmp_path):
+    source = JsonRepository(str(tmp_path / "data"))
+    source.add_response("estres", _response("a", "1", "2026-01-01"))
+    source.add_form_response("datos-generales", _form("f1", "1"))
+
+    target = SqliteRepository(str(tmp_path / "test.db"))
+    target.import_json(str(tmp_path / "data"))
+    counts = target.import_json(str(tmp_path / "data"))
+    assert counts == {"responses_estres": 0, "form_datos-generales": 0, "sessions": 0}
+    assert [r["id"] for r in target.list_responses("estres")] == ["a"]
+    assert [r["id"] for r in target.list_form_responses("datos-generales")] == ["f1"]
+
+
+def test_sqlite_drops_duplicates_of_earlier_imports(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    target = SqliteRepository(db_path)
+    conn = target._conn()
+    conn.execute("DROP INDEX idx_responses_id")
+    for _ in range(2):
+        conn.execute(
+            "INSERT INTO responses (id, questionnaire_id, cedula, submitted_at, payload) VALUES (?, ?, ?, ?, ?)",
+            ("a", "estres", "1", "2026-01-01", json.dumps(_response("a", "1", "2026-01-01"))),
+        )
+    conn.commit()
+    assert [r["id"] for r in SqliteRepository(db_path).list_responses("estres")] == ["a"]
+
+
+class TestCedulaIndex:
+    def test_writes_update_index_without_rebuild(self, tmp_path, monkeypatch):
+        repo = JsonRepository(str(tmp_path))
+        repo.add_response("estres", _response("a", "1", "2026-01-01"))
+        assert repo.latest_response("estres", "1")["id"] == "a"
+
+        index = repo._response_index("estres")
+        monkeypatch.setattr(index, "_build", lambda records: pytest.fail("index rebuilt"))
+        repo.add_response("estres", _response("b", "1", "2026-01-02"))
+        repo.add_response("estres", _response("c", "2", "2026-01-01"))
+        assert repo.latest_response("estres", "1")["id"] == "b"
+        assert sorted(repo.list_cedulas()) == ["1", "2"]
+
+    def test_external_write_invalidates_index(self, tmp_path):
+        repo = JsonRepository(str(tmp_path))
+        repo.add_form_response("datos-generales", _form("f1", "1"))
+        assert repo.latest_form_response("datos-generales", "1")["id"] == "f1"
+
+        # Another worker/process appending to the same files
+        JsonRepository(str(tmp_path)).add_form_response("datos-generales", _form("f2", "1"))
+        assert repo.latest_form_response("datos-generales", "1")["id"] == "f2"
+
+    def test_session_cache_follows_file(self, tmp_path):
+        repo = JsonRepository(str(tmp_path))
+        repo.save_session({"cedula": "1", "completed_forms": []})
+        session = repo.get_session("1")
+        session["completed_forms"] = ["estres"]
+        assert repo.get_session("1")["completed_forms"] == []
+
+        JsonRepository(str(tmp_path)).save_session({"cedula": "2", "completed_forms": []})
+        assert sorted(repo.list_sessions()) == ["1", "2"]